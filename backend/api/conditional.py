@@ -0,0 +1,85 @@
+# api/conditional.py
+"""
+読み取りAPIの条件付きGET（ETag / Last-Modified）。
+
+レスポンスを組み立てる前に、対象クエリセットの「指紋」（更新日時の最大値と件数）を
+1回の集計クエリで取得して ETag を作る。クライアントの If-None-Match / If-Modified-Since と
+一致すればシリアライズせずに 304 Not Modified を返す。
+
+- 一覧: ETag のみ（削除は更新日時に現れないため Last-Modified は付けない）
+- 詳細: ETag と Last-Modified
+"""
+import hashlib
+from typing import Callable, Dict, Optional
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet の list / retrieve に条件付きGETを追加する Mixin。
+
+    - conditional_updated_field: 更新日時のフィールド名
+    - conditional_extra_aggregates: 指紋に加える集計（更新日時に現れない関連の変更を拾う場合）
+    APIView では conditional_response() を直接使う。
+    """
+    conditional_updated_field = 'updated_at'
+    conditional_extra_aggregates: Dict = {}
+
+    def list(self, request, *args, **kwargs):
+        def build():
+            return super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+
+        fingerprint = self.get_conditional_fingerprint(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(request, fingerprint, build)
+
+    def retrieve(self, request, *args, **kwargs):
+        def build():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        fingerprint = self.get_conditional_fingerprint(queryset)
+        if not fingerprint['count']:
+            # 存在しない・見えない場合は通常どおり 404 を返す
+            return build()
+        return self.conditional_response(request, fingerprint, build, last_modified=fingerprint['last_modified'])
+
+    def get_conditional_fingerprint(self, queryset) -> Dict:
+        """更新日時の最大値・件数（と追加の集計）を1クエリで返す。"""
+        return queryset.order_by().aggregate(
+            last_modified=Max(self.conditional_updated_field),
+            count=Count('pk', distinct=True),
+            **self.conditional_extra_aggregates,
+        )
+
+    def conditional_response(self, request, fingerprint: Dict, build: Callable, last_modified=None):
+        """
+        指紋から ETag を作り、クライアントのキャッシュが有効なら 304 を、
+        そうでなければ build() のレスポンスに ETag / Last-Modified を付けて返す。
+        """
+        renderer = getattr(request, 'accepted_renderer', None)
+        payload = repr((sorted(fingerprint.items()), getattr(renderer, 'format', None)))
+        etag = quote_etag(hashlib.md5(payload.encode('utf-8')).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        response = build()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # ブラウザに毎回再検証させる（変更がなければ 304 で本文を送らない）
+            patch_cache_control(response, no_cache=True, private=True)
+        return response
+
+
+def single_value_fingerprint(value: Optional[object]) -> Dict:
+    """単一の値（最終同期時刻など）から指紋を作る。"""
+    return {'last_modified': value, 'count': 0 if value is None else 1}
@@ -105,6 +105,24 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# 既定はデータベースのキャッシュテーブル（manage.py createcachetable で作成）。
+# gunicorn の各ワーカーと、予約同期を実行する GitHub Actions のランナーが同じDBを使うため、
+# 同期や保存時のキャッシュ無効化（タグのバージョン更新）がすべてのプロセスに届く。
+# プロセスごとのローカルメモリでは無効化が他のプロセスに届かないため、本番では使わないこと
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000')),
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -197,6 +215,8 @@ REST_FRAMEWORK = {
 # BEDS24_API_KEY: Beds24のAPIキー
 BEDS24_ACCOUNT_ID = os.environ.get('BEDS24_ACCOUNT_ID')
 BEDS24_API_KEY = os.environ.get('BEDS24_API_KEY')
+# BEDS24_JSON_API_URL: Beds24 JSON APIのベースURL（ローカルのテスト用エンドポイントに差し替え可能）
+BEDS24_JSON_API_URL = os.environ.get('BEDS24_JSON_API_URL', 'https://api.beds24.com/json')
 
 # Emit errors to stdout/stderr so Render logs capture 500 traces
 LOGGING = {
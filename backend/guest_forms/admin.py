@@ -1,7 +1,7 @@
 # backend/guest_forms/admin.py
 
 from django.contrib import admin
-from .models import Property, FormTemplate, FormField, GuestSubmission, Amenity, FacilityImage, PricingRule
+from .models import Property, FormTemplate, FormField, GuestSubmission, Amenity, FacilityImage, PricingRule, RecurringPricingRule
 
 class FormFieldInline(admin.TabularInline):
     model = FormField
@@ -49,5 +49,12 @@ class PricingRuleAdmin(admin.ModelAdmin):
     date_hierarchy = 'date'
     ordering = ('-date',)
 
+@admin.register(RecurringPricingRule)
+class RecurringPricingRuleAdmin(admin.ModelAdmin):
+    list_display = ('property', 'name', 'rule_type', 'priority', 'price', 'min_nights', 'is_blackout', 'is_active')
+    list_filter = ('property', 'rule_type', 'is_active', 'is_blackout')
+    search_fields = ('property__name', 'name', 'blackout_reason')
+    ordering = ('property', '-priority')
+
 # FormFieldはFormTemplateのインラインで管理するため、単独での登録は不要
 # admin.site.register(FormField)
\ No newline at end of file
@@ -0,0 +1,132 @@
+# guest_forms/countries.py
+"""
+宿泊者名簿の国籍・国名の入力値を ISO 3166-1 alpha-2 の国コードに正規化する。
+
+名簿の入力は自由記述（"Japan" / "日本" / "JPN" / "usa" など）のため、
+国コード・英語名・日本語名・よくある別表記から国コードを引く。
+判別できない値は空文字を返す。名簿にはその入力値を別に残し（GuestSubmission.nationality_input）、
+集計では入力値ごとにまとめる（入力もない場合は「不明」）。
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+# (alpha-2, alpha-3, 日本語名, 英語名, 別表記...)
+COUNTRIES = [
+    ('JP', 'JPN', '日本', 'Japan', 'にほん', 'にっぽん', 'Nippon'),
+    ('CN', 'CHN', '中国', 'China', "People's Republic of China", 'PRC', '中華人民共和国'),
+    ('TW', 'TWN', '台湾', 'Taiwan', 'Republic of China', 'ROC', '臺灣'),
+    ('HK', 'HKG', '香港', 'Hong Kong', 'Hongkong'),
+    ('MO', 'MAC', 'マカオ', 'Macao', 'Macau', '澳門'),
+    ('KR', 'KOR', '韓国', 'South Korea', 'Korea', 'Republic of Korea', '大韓民国', '한국'),
+    ('TH', 'THA', 'タイ', 'Thailand'),
+    ('SG', 'SGP', 'シンガポール', 'Singapore'),
+    ('MY', 'MYS', 'マレーシア', 'Malaysia'),
+    ('ID', 'IDN', 'インドネシア', 'Indonesia'),
+    ('PH', 'PHL', 'フィリピン', 'Philippines'),
+    ('VN', 'VNM', 'ベトナム', 'Vietnam', 'Viet Nam'),
+    ('IN', 'IND', 'インド', 'India'),
+    ('US', 'USA', 'アメリカ', 'United States', 'United States of America', 'America', 'U.S.', 'U.S.A.', '米国', 'アメリカ合衆国'),
+    ('CA', 'CAN', 'カナダ', 'Canada'),
+    ('MX', 'MEX', 'メキシコ', 'Mexico'),
+    ('BR', 'BRA', 'ブラジル', 'Brazil'),
+    ('GB', 'GBR', 'イギリス', 'United Kingdom', 'UK', 'U.K.', 'Great Britain', 'Britain', 'England', 'Scotland', 'Wales', '英国'),
+    ('IE', 'IRL', 'アイルランド', 'Ireland'),
+    ('FR', 'FRA', 'フランス', 'France'),
+    ('DE', 'DEU', 'ドイツ', 'Germany', 'Deutschland'),
+    ('IT', 'ITA', 'イタリア', 'Italy', 'Italia'),
+    ('ES', 'ESP', 'スペイン', 'Spain', 'España'),
+    ('PT', 'PRT', 'ポルトガル', 'Portugal'),
+    ('NL', 'NLD', 'オランダ', 'Netherlands', 'Holland', 'The Netherlands'),
+    ('BE', 'BEL', 'ベルギー', 'Belgium'),
+    ('CH', 'CHE', 'スイス', 'Switzerland'),
+    ('AT', 'AUT', 'オーストリア', 'Austria'),
+    ('SE', 'SWE', 'スウェーデン', 'Sweden'),
+    ('NO', 'NOR', 'ノルウェー', 'Norway'),
+    ('DK', 'DNK', 'デンマーク', 'Denmark'),
+    ('FI', 'FIN', 'フィンランド', 'Finland'),
+    ('PL', 'POL', 'ポーランド', 'Poland'),
+    ('CZ', 'CZE', 'チェコ', 'Czech Republic', 'Czechia'),
+    ('RU', 'RUS', 'ロシア', 'Russia', 'Russian Federation'),
+    ('IL', 'ISR', 'イスラエル', 'Israel'),
+    ('AE', 'ARE', 'アラブ首長国連邦', 'United Arab Emirates', 'UAE'),
+    ('TR', 'TUR', 'トルコ', 'Turkey', 'Türkiye'),
+    ('AU', 'AUS', 'オーストラリア', 'Australia'),
+    ('NZ', 'NZL', 'ニュージーランド', 'New Zealand'),
+]
+
+UNKNOWN_LABEL = '不明'
+
+# 判別できなかった入力値を残すときの最大文字数（GuestSubmission.nationality_input の max_length）
+INPUT_MAX_LENGTH = 100
+
+# submitted_data で国籍を表すキー（小文字・前後の空白を除いて比較）
+NATIONALITY_KEYS = ('nationality', 'country', '国籍', '国籍 / nationality', 'nationality / 国籍')
+
+
+def _normalize_text(value: str) -> str:
+    """大文字・小文字、前後の空白、ピリオド、連続する空白の違いを無視して比較するための形に変換する。"""
+    value = value.strip().casefold().replace('.', '')
+    return re.sub(r'\s+', ' ', value)
+
+
+def _build_lookup() -> Dict[str, str]:
+    lookup = {}
+    for code, *names in COUNTRIES:
+        lookup[_normalize_text(code)] = code
+        for name in names:
+            lookup[_normalize_text(name)] = code
+    return lookup
+
+
+_LOOKUP = _build_lookup()
+_LABELS = {row[0]: row[2] for row in COUNTRIES}
+
+
+def normalize_country(value) -> str:
+    """入力値を国コードに正規化する。判別できない場合は空文字を返す。"""
+    if isinstance(value, (list, tuple)):
+        # multipart で送信された値は1要素のリストとして保存される
+        value = value[0] if value else None
+    if not isinstance(value, str):
+        return ''
+    return _LOOKUP.get(_normalize_text(value), '')
+
+
+def input_text(value) -> str:
+    """判別できなかった入力値を、集計でまとめられるよう前後・連続する空白を除いた形で返す。"""
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    if not isinstance(value, str):
+        return ''
+    return re.sub(r'\s+', ' ', value.strip())[:INPUT_MAX_LENGTH]
+
+
+def read_nationality(submitted_data) -> Tuple[str, str]:
+    """
+    名簿の提出データから国籍を読み取る。
+
+    Returns:
+        (国コード, 判別できなかった入力値)。国コードが判別できた場合、入力値は空文字。
+    """
+    if not isinstance(submitted_data, dict):
+        return '', ''
+    unmatched = ''
+    for key, value in submitted_data.items():
+        if isinstance(key, str) and key.strip().casefold() in NATIONALITY_KEYS:
+            code = normalize_country(value)
+            if code:
+                return code, ''
+            unmatched = unmatched or input_text(value)
+    return '', unmatched
+
+
+def extract_nationality(submitted_data) -> str:
+    """名簿の提出データから国籍（国コード）を取り出す。"""
+    return read_nationality(submitted_data)[0]
+
+
+def country_label(code: Optional[str], input_value: str = '') -> str:
+    """国コードの表示名（日本語名）を返す。国コードがない場合は入力値（それもなければ「不明」）。"""
+    if not code:
+        return input_value or UNKNOWN_LABEL
+    return _LABELS.get(code, code)
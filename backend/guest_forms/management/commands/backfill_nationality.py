@@ -0,0 +1,38 @@
+# guest_forms/management/commands/backfill_nationality.py
+from django.core.management.base import BaseCommand
+
+from guest_forms.countries import read_nationality
+from guest_forms.models import GuestSubmission
+
+
+class Command(BaseCommand):
+    help = '既存の名簿提出データから国籍（国コード・判別できなかった入力値）を取り出して GuestSubmission に保存'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='国籍が設定済みの提出データも再計算する（正規化表の更新後など）')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        submissions = GuestSubmission.objects.exclude(submitted_data=None)
+        if not options['all']:
+            submissions = submissions.filter(nationality='')
+
+        batch_size = options['batch_size']
+        checked = 0
+        updated = 0
+        changed = []
+        fields = ['nationality', 'nationality_input']
+        for submission in submissions.only('id', 'submitted_data', *fields).iterator(chunk_size=batch_size):
+            checked += 1
+            nationality, nationality_input = read_nationality(submission.submitted_data)
+            if (nationality, nationality_input) != (submission.nationality, submission.nationality_input):
+                submission.nationality, submission.nationality_input = nationality, nationality_input
+                changed.append(submission)
+            if len(changed) >= batch_size:
+                GuestSubmission.objects.bulk_update(changed, fields)
+                updated += len(changed)
+                changed = []
+        GuestSubmission.objects.bulk_update(changed, fields)
+        updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {updated} of {checked} submissions updated"))
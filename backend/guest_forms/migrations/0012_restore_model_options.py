@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:50
+
+from django.db import migrations, models
+
+
+def drop_duplicate_pricing_rules(apps, schema_editor):
+    """(property, date) の重複ルールは最後に更新された1件だけ残す"""
+    PricingRule = apps.get_model('guest_forms', 'PricingRule')
+    seen = set()
+    duplicate_ids = []
+    for rule_id, property_id, rule_date in PricingRule.objects.order_by(
+        'property_id', 'date', '-updated_at', '-id'
+    ).values_list('id', 'property_id', 'date'):
+        if (property_id, rule_date) in seen:
+            duplicate_ids.append(rule_id)
+        else:
+            seen.add((property_id, rule_date))
+    PricingRule.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0011_property_google_sheets_id'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='guestsubmission',
+            options={'verbose_name': '名簿提出内容', 'verbose_name_plural': '名簿提出内容'},
+        ),
+        migrations.AlterModelOptions(
+            name='pricingrule',
+            options={'verbose_name': '価格ルール', 'verbose_name_plural': '価格ルール'},
+        ),
+        migrations.RunPython(drop_duplicate_pricing_rules, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='pricingrule',
+            unique_together={('property', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='pricingrule',
+            index=models.Index(fields=['property', 'date'], name='guest_forms_propert_9fa5f9_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0012_restore_model_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringPricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='ルール名')),
+                ('rule_type', models.CharField(choices=[('weekday', '曜日パターン'), ('season', 'シーズン（期間）'), ('holiday', '祝日リスト')], max_length=20, verbose_name='ルール種別')),
+                ('priority', models.IntegerField(default=0, help_text='大きいほど優先', verbose_name='優先度')),
+                ('is_active', models.BooleanField(default=True, verbose_name='有効')),
+                ('weekdays', models.JSONField(blank=True, default=list, help_text='0=月曜〜6=日曜 の配列。空なら全曜日', verbose_name='曜日')),
+                ('start_date', models.DateField(blank=True, help_text='シーズンの開始日（他の種別では適用期間の開始）', null=True, verbose_name='開始日')),
+                ('end_date', models.DateField(blank=True, help_text='シーズンの終了日（他の種別では適用期間の終了）', null=True, verbose_name='終了日')),
+                ('dates', models.JSONField(blank=True, default=list, help_text='祝日リスト。例: ["2026-12-31", "2027-01-01"]', verbose_name='日付リスト')),
+                ('price', models.IntegerField(blank=True, null=True, verbose_name='価格（¥/泊）')),
+                ('min_nights', models.IntegerField(blank=True, null=True, verbose_name='最小宿泊日数')),
+                ('is_blackout', models.BooleanField(default=False, verbose_name='ブラックアウト（予約不可）')),
+                ('blackout_reason', models.CharField(blank=True, max_length=255, verbose_name='ブラックアウト理由')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_pricing_rules', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': '繰り返し価格ルール',
+                'verbose_name_plural': '繰り返し価格ルール',
+                'ordering': ['property', '-priority', 'id'],
+                'indexes': [models.Index(fields=['property', 'is_active'], name='guest_forms_propert_b87218_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:07
+
+import re
+
+from django.db import migrations, models
+
+# マイグレーション作成時点の guest_forms.countries の正規化表と国籍欄のキー
+# （以後の変更の影響を受けないよう固定する）
+# (alpha-2, alpha-3, 日本語名, 英語名, 別表記...)
+COUNTRIES = [
+    ('JP', 'JPN', '日本', 'Japan', 'にほん', 'にっぽん', 'Nippon'),
+    ('CN', 'CHN', '中国', 'China', "People's Republic of China", 'PRC', '中華人民共和国'),
+    ('TW', 'TWN', '台湾', 'Taiwan', 'Republic of China', 'ROC', '臺灣'),
+    ('HK', 'HKG', '香港', 'Hong Kong', 'Hongkong'),
+    ('MO', 'MAC', 'マカオ', 'Macao', 'Macau', '澳門'),
+    ('KR', 'KOR', '韓国', 'South Korea', 'Korea', 'Republic of Korea', '大韓民国', '한국'),
+    ('TH', 'THA', 'タイ', 'Thailand'),
+    ('SG', 'SGP', 'シンガポール', 'Singapore'),
+    ('MY', 'MYS', 'マレーシア', 'Malaysia'),
+    ('ID', 'IDN', 'インドネシア', 'Indonesia'),
+    ('PH', 'PHL', 'フィリピン', 'Philippines'),
+    ('VN', 'VNM', 'ベトナム', 'Vietnam', 'Viet Nam'),
+    ('IN', 'IND', 'インド', 'India'),
+    ('US', 'USA', 'アメリカ', 'United States', 'United States of America', 'America', 'U.S.', 'U.S.A.', '米国', 'アメリカ合衆国'),
+    ('CA', 'CAN', 'カナダ', 'Canada'),
+    ('MX', 'MEX', 'メキシコ', 'Mexico'),
+    ('BR', 'BRA', 'ブラジル', 'Brazil'),
+    ('GB', 'GBR', 'イギリス', 'United Kingdom', 'UK', 'U.K.', 'Great Britain', 'Britain', 'England', 'Scotland', 'Wales', '英国'),
+    ('IE', 'IRL', 'アイルランド', 'Ireland'),
+    ('FR', 'FRA', 'フランス', 'France'),
+    ('DE', 'DEU', 'ドイツ', 'Germany', 'Deutschland'),
+    ('IT', 'ITA', 'イタリア', 'Italy', 'Italia'),
+    ('ES', 'ESP', 'スペイン', 'Spain', 'España'),
+    ('PT', 'PRT', 'ポルトガル', 'Portugal'),
+    ('NL', 'NLD', 'オランダ', 'Netherlands', 'Holland', 'The Netherlands'),
+    ('BE', 'BEL', 'ベルギー', 'Belgium'),
+    ('CH', 'CHE', 'スイス', 'Switzerland'),
+    ('AT', 'AUT', 'オーストリア', 'Austria'),
+    ('SE', 'SWE', 'スウェーデン', 'Sweden'),
+    ('NO', 'NOR', 'ノルウェー', 'Norway'),
+    ('DK', 'DNK', 'デンマーク', 'Denmark'),
+    ('FI', 'FIN', 'フィンランド', 'Finland'),
+    ('PL', 'POL', 'ポーランド', 'Poland'),
+    ('CZ', 'CZE', 'チェコ', 'Czech Republic', 'Czechia'),
+    ('RU', 'RUS', 'ロシア', 'Russia', 'Russian Federation'),
+    ('IL', 'ISR', 'イスラエル', 'Israel'),
+    ('AE', 'ARE', 'アラブ首長国連邦', 'United Arab Emirates', 'UAE'),
+    ('TR', 'TUR', 'トルコ', 'Turkey', 'Türkiye'),
+    ('AU', 'AUS', 'オーストラリア', 'Australia'),
+    ('NZ', 'NZL', 'ニュージーランド', 'New Zealand'),
+]
+
+# submitted_data で国籍を表すキー（小文字・前後の空白を除いて比較）
+NATIONALITY_KEYS = ('nationality', 'country', '国籍', '国籍 / nationality', 'nationality / 国籍')
+
+
+def _normalize_text(value):
+    value = value.strip().casefold().replace('.', '')
+    return re.sub(r'\s+', ' ', value)
+
+
+_LOOKUP = {}
+for _code, *_names in COUNTRIES:
+    for _name in [_code, *_names]:
+        _LOOKUP[_normalize_text(_name)] = _code
+
+
+def extract_nationality(submitted_data):
+    """提出データから国籍（国コード）を取り出す（判別できない場合は空文字）。"""
+    if not isinstance(submitted_data, dict):
+        return ''
+    for key, value in submitted_data.items():
+        if isinstance(key, str) and key.strip().casefold() in NATIONALITY_KEYS:
+            if isinstance(value, (list, tuple)):
+                value = value[0] if value else None
+            code = _LOOKUP.get(_normalize_text(value), '') if isinstance(value, str) else ''
+            if code:
+                return code
+    return ''
+
+
+def backfill_nationality(apps, schema_editor):
+    GuestSubmission = apps.get_model('guest_forms', 'GuestSubmission')
+    updated = []
+    for submission in GuestSubmission.objects.exclude(submitted_data=None).only('id', 'submitted_data').iterator(chunk_size=1000):
+        submission.nationality = extract_nationality(submission.submitted_data)
+        if submission.nationality:
+            updated.append(submission)
+    GuestSubmission.objects.bulk_update(updated, ['nationality'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0013_recurringpricingrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guestsubmission',
+            name='nationality',
+            field=models.CharField(blank=True, db_index=True, help_text='提出データから取り出した ISO 3166-1 alpha-2 の国コード（判別できない場合は空）', max_length=2, verbose_name='国籍（国コード）'),
+        ),
+        migrations.RunPython(backfill_nationality, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:47
+
+import re
+
+from django.db import migrations, models
+
+# マイグレーション作成時点の guest_forms.countries の国籍欄のキー（以後の変更の影響を受けないよう固定する）
+NATIONALITY_KEYS = ('nationality', 'country', '国籍', '国籍 / nationality', 'nationality / 国籍')
+
+
+def _input_text(value):
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    if not isinstance(value, str):
+        return ''
+    return re.sub(r'\s+', ' ', value.strip())[:100]
+
+
+def backfill_nationality_input(apps, schema_editor):
+    """国コードを判別できなかった提出データに、国籍欄の入力値を残す。"""
+    GuestSubmission = apps.get_model('guest_forms', 'GuestSubmission')
+    updated = []
+    for submission in GuestSubmission.objects.filter(nationality='').exclude(submitted_data=None).only('id', 'submitted_data').iterator(chunk_size=1000):
+        if not isinstance(submission.submitted_data, dict):
+            continue
+        for key, value in submission.submitted_data.items():
+            if isinstance(key, str) and key.strip().casefold() in NATIONALITY_KEYS and _input_text(value):
+                submission.nationality_input = _input_text(value)
+                updated.append(submission)
+                break
+    GuestSubmission.objects.bulk_update(updated, ['nationality_input'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0014_guestsubmission_nationality'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guestsubmission',
+            name='nationality_input',
+            field=models.CharField(blank=True, help_text='国コードを判別できなかった場合の国籍欄の入力値（集計で入力値ごとにまとめる）', max_length=100, verbose_name='国籍（入力値）'),
+        ),
+        migrations.RunPython(backfill_nationality_input, migrations.RunPython.noop),
+    ]
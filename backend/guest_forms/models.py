@@ -126,9 +126,24 @@ class GuestSubmission(models.Model):
     token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name="フォームアクセス用トークン")
     status = models.CharField(max_length=20, choices=SubmissionStatus.choices, default=SubmissionStatus.PENDING, verbose_name="提出状況")
     submitted_data = models.JSONField(null=True, blank=True, verbose_name="提出データ")
+    nationality = models.CharField(
+        max_length=2, blank=True, db_index=True, verbose_name="国籍（国コード）",
+        help_text="提出データから取り出した ISO 3166-1 alpha-2 の国コード（判別できない場合は空）"
+    )
+    nationality_input = models.CharField(
+        max_length=100, blank=True, verbose_name="国籍（入力値）",
+        help_text="国コードを判別できなかった場合の国籍欄の入力値（集計で入力値ごとにまとめる）"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
 
+    class Meta:
+        verbose_name = "名簿提出内容"
+        verbose_name_plural = "名簿提出内容"
+
+    def __str__(self):
+        return f"Submission for {self.reservation}"
+
 class PricingRule(models.Model):
     """
     施設ごとの日別価格・在庫管理ルール
@@ -160,9 +175,48 @@ class PricingRule(models.Model):
     def __str__(self):
         return f"{self.property.name} - {self.date}"
 
+
+class RecurringPricingRule(models.Model):
+    """
+    曜日パターン・シーズン・祝日リストで繰り返し適用される価格ルール。
+    日付ごとの PricingRule を大量に作らずに済むよう、必要な期間だけ遅延展開して評価する。
+    同じ日に複数のルールが当てはまる場合は priority の高いルールが優先され、
+    未設定の項目は次に優先度の高いルールから補われる。
+    """
+    class RuleType(models.TextChoices):
+        WEEKDAY = 'weekday', '曜日パターン'
+        SEASON = 'season', 'シーズン（期間）'
+        HOLIDAY = 'holiday', '祝日リスト'
+
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='recurring_pricing_rules', verbose_name="施設")
+    name = models.CharField(max_length=100, verbose_name="ルール名")
+    rule_type = models.CharField(max_length=20, choices=RuleType.choices, verbose_name="ルール種別")
+    priority = models.IntegerField(default=0, verbose_name="優先度", help_text="大きいほど優先")
+    is_active = models.BooleanField(default=True, verbose_name="有効")
+
+    # 適用条件
+    weekdays = models.JSONField(default=list, blank=True, verbose_name="曜日", help_text="0=月曜〜6=日曜 の配列。空なら全曜日")
+    start_date = models.DateField(null=True, blank=True, verbose_name="開始日", help_text="シーズンの開始日（他の種別では適用期間の開始）")
+    end_date = models.DateField(null=True, blank=True, verbose_name="終了日", help_text="シーズンの終了日（他の種別では適用期間の終了）")
+    dates = models.JSONField(default=list, blank=True, verbose_name="日付リスト", help_text='祝日リスト。例: ["2026-12-31", "2027-01-01"]')
+
+    # 適用内容
+    price = models.IntegerField(null=True, blank=True, verbose_name="価格（¥/泊）")
+    min_nights = models.IntegerField(null=True, blank=True, verbose_name="最小宿泊日数")
+    is_blackout = models.BooleanField(default=False, verbose_name="ブラックアウト（予約不可）")
+    blackout_reason = models.CharField(max_length=255, blank=True, verbose_name="ブラックアウト理由")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
+
     class Meta:
-        verbose_name = "名簿提出内容"
-        verbose_name_plural = "名簿提出内容"
+        verbose_name = "繰り返し価格ルール"
+        verbose_name_plural = "繰り返し価格ルール"
+        ordering = ['property', '-priority', 'id']
+        indexes = [
+            models.Index(fields=['property', 'is_active']),
+        ]
 
     def __str__(self):
-        return f"Submission for {self.reservation}"    
\ No newline at end of file
+        return f"{self.property.name} - {self.name} ({self.get_rule_type_display()})"
+
@@ -0,0 +1,223 @@
+# backend/guest_forms/pricing_calendar.py
+"""
+価格カレンダーの組み立てと一括更新。
+表示は実効料金（EffectiveRate）を1クエリで読み込み、更新後は変更した期間の実効料金を再計算して
+Beds24 への送信キューに登録する。
+更新は入力をすべて検証してから、1トランザクションの一括 upsert で書き込む。
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reservations.cache import bump_tags, rates_tag
+from reservations.services_effective_rates import load_effective_rates, refresh_effective_rates
+from reservations.services_price_push import enqueue_price_push, enqueue_price_push_range
+from .models import PricingRule, Property
+
+
+def basic_settings(property_obj: Property) -> Dict:
+    """施設の基本価格設定（カレンダー画面用のキー名）"""
+    return {
+        'basePrice': property_obj.base_price,
+        'baseGuests': property_obj.base_guests,
+        'adultExtraPrice': property_obj.adult_extra_price,
+        'childExtraPrice': property_obj.child_extra_price,
+        'minNights': property_obj.min_nights,
+    }
+
+
+def build_pricing_calendar(property_obj: Property, start: date, end: date) -> List[Dict]:
+    """
+    start〜end（両端を含む）の全日付分のカレンダーデータを返す。
+    値は実効料金（日別ルール > 繰り返しルール > Beds24日別料金 > 基本設定）を1クエリで読み込む。
+    """
+    days = load_effective_rates([property_obj], start, end)[property_obj.id]
+
+    calendar_data = []
+    current_date = start
+    while current_date <= end:
+        rate = days[current_date]
+        calendar_data.append({
+            'date': current_date.strftime('%Y-%m-%d'),
+            'price': int(rate.price) if rate.price == rate.price.to_integral_value() else float(rate.price),
+            'isBlackout': rate.is_blackout,
+            'blackoutReason': rate.blackout_reason,
+            'minNights': rate.min_nights,
+            'available': rate.available,
+            'priceSource': rate.price_source,
+        })
+        current_date += timedelta(days=1)
+    return calendar_data
+
+
+def month_bounds(year: int, month: int):
+    """月の初日と末日を返す"""
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end = date(year, month + 1, 1) - timedelta(days=1)
+    return start, end
+
+
+class CalendarUpdateError(ValueError):
+    """カレンダー更新内容が不正な場合に送出される（errors に項目ごとのエラー）"""
+
+    def __init__(self, errors):
+        super().__init__('価格カレンダーの更新内容が不正です')
+        self.errors = errors
+
+
+# 1回の範囲操作で指定できる最大日数
+MAX_RANGE_DAYS = 731
+
+_RULE_FIELDS = ['price', 'min_nights', 'is_blackout', 'blackout_reason']
+
+
+def apply_calendar_changes(property_obj: Property, updates: List[Dict] = (), ranges: List[Dict] = ()) -> Dict:
+    """
+    価格カレンダーの一括更新。すべての入力を検証してから、1トランザクションで書き込む。
+
+    updates: 日付ごとの上書き（既存ルールを置き換える）
+        {"date": "2026-07-01", "price": 12000, "minNights": 2, "isBlackout": false, "blackoutReason": ""}
+    ranges: 期間への一括操作（指定した項目のみ変更する）
+        {"startDate": "2026-07-01", "endDate": "2026-08-31", "price": 15000}
+        {"startDate": "2026-12-30", "endDate": "2027-01-03", "isBlackout": true, "blackoutReason": "年末年始"}
+
+    Returns:
+        {'dates': 上書きした日数, 'range_days': 範囲操作の対象日数}
+    """
+    errors = []
+    rules = {}
+    for index, update in enumerate(updates):
+        if not isinstance(update, dict):
+            errors.append({'index': index, 'date': None, 'error': '更新内容はオブジェクトで指定してください'})
+            continue
+        try:
+            rule_date = _parse_date(update.get('date'))
+            values = _rule_values(update, partial=False)
+        except (TypeError, ValueError) as exc:
+            errors.append({'index': index, 'date': update.get('date'), 'error': str(exc)})
+            continue
+        rules[rule_date] = values
+
+    range_ops = []
+    for index, range_op in enumerate(ranges):
+        if not isinstance(range_op, dict):
+            errors.append({'range': index, 'error': '範囲操作はオブジェクトで指定してください'})
+            continue
+        try:
+            start = _parse_date(range_op.get('startDate'))
+            end = _parse_date(range_op.get('endDate'))
+            if end < start or (end - start).days >= MAX_RANGE_DAYS:
+                raise ValueError(f'期間は開始日以降かつ{MAX_RANGE_DAYS}日以内で指定してください')
+            values = _rule_values(range_op, partial=True)
+            if not values:
+                raise ValueError('変更する項目を指定してください')
+        except (TypeError, ValueError) as exc:
+            errors.append({'range': index, 'error': str(exc)})
+            continue
+        range_ops.append((start, end, values))
+
+    if errors:
+        raise CalendarUpdateError(errors)
+
+    range_days = 0
+    with transaction.atomic():
+        if rules:
+            PricingRule.objects.bulk_create(
+                [PricingRule(property=property_obj, date=rule_date, **values) for rule_date, values in rules.items()],
+                update_conflicts=True,
+                unique_fields=['property', 'date'],
+                update_fields=_RULE_FIELDS + ['updated_at'],
+                batch_size=500,
+            )
+        for start, end, values in range_ops:
+            _apply_range(property_obj, start, end, values)
+            range_days += (end - start).days + 1
+
+        touched = list(rules) + [day for start, end, _ in range_ops for day in (start, end)]
+        if touched:
+            refresh_effective_rates(property_obj, min(touched), max(touched))
+        enqueue_price_push(property_obj, rules)
+        for start, end, _ in range_ops:
+            enqueue_price_push_range(property_obj, start, end)
+
+    bump_tags(rates_tag(property_obj.id))
+    return {'dates': len(rules), 'range_days': range_days}
+
+
+def _apply_range(property_obj: Property, start: date, end: date, values: Dict) -> None:
+    """
+    期間内の既存ルールを1つの UPDATE で変更し、ルールのない日付を1つの INSERT で補う。
+    PostgreSQL では日付列も generate_series で生成する。
+    """
+    PricingRule.objects.filter(property=property_obj, date__range=(start, end)).update(
+        updated_at=timezone.now(), **values
+    )
+
+    new_rule = {'price': None, 'min_nights': None, 'is_blackout': False, 'blackout_reason': '', **values}
+    if connection.vendor == 'postgresql':
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {PricingRule._meta.db_table}
+                    (property_id, date, price, min_nights, is_blackout, blackout_reason, created_by, created_at, updated_at)
+                SELECT %s, d::date, %s, %s, %s, %s, '', %s, %s
+                FROM generate_series(%s::date, %s::date, interval '1 day') AS d
+                ON CONFLICT (property_id, date) DO NOTHING
+                """,
+                [
+                    property_obj.id, new_rule['price'], new_rule['min_nights'], new_rule['is_blackout'],
+                    new_rule['blackout_reason'], now, now, start, end,
+                ],
+            )
+        return
+
+    PricingRule.objects.bulk_create(
+        [
+            PricingRule(property=property_obj, date=start + timedelta(days=i), **new_rule)
+            for i in range((end - start).days + 1)
+        ],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+
+
+def _parse_date(value) -> date:
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def _optional_int(value, name: str, minimum: int):
+    if value is None or value == '':
+        return None
+    number = int(value)
+    if number < minimum:
+        raise ValueError(f'{name} は{minimum}以上で指定してください')
+    return number
+
+
+def _rule_values(data: Dict, partial: bool) -> Dict:
+    """
+    画面のキー名（price, minNights, isBlackout, blackoutReason）をモデルの値に変換する。
+    ブラックアウト日は価格を持たない。partial=True の場合は指定された項目のみ返す。
+    """
+    values = {}
+    if not partial or 'isBlackout' in data:
+        is_blackout = bool(data.get('isBlackout'))
+        values['is_blackout'] = is_blackout
+        values['blackout_reason'] = str(data.get('blackoutReason') or '') if is_blackout else ''
+        if is_blackout:
+            values['price'] = None
+    if (not partial or 'price' in data) and not values.get('is_blackout'):
+        values['price'] = _optional_int(data.get('price'), 'price', 0)
+        if partial and 'isBlackout' not in data:
+            # 価格を設定した日はブラックアウトを解除する
+            values['is_blackout'] = False
+            values['blackout_reason'] = ''
+    if not partial or 'minNights' in data:
+        values['min_nights'] = _optional_int(data.get('minNights'), 'minNights', 1)
+    return values
@@ -0,0 +1,126 @@
+# backend/guest_forms/recurring_rules.py
+"""
+繰り返し価格ルール（RecurringPricingRule）の評価。
+
+ルールは保存時に日付へ展開せず、読み込み時に必要な期間だけ展開する。
+展開結果は施設の料金タグ（reservations.cache.rates_tag）付きでキャッシュするため、
+ルールや料金データが変わるまでは同じ期間の再評価は行われない。
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from reservations.cache import make_key, rates_tag, tag_versions
+from .models import RecurringPricingRule
+
+EVALUATION_CACHE_TIMEOUT = 60 * 60
+
+
+class RuleValues(NamedTuple):
+    """1日分の評価結果（未設定の項目は None）"""
+    price: Optional[int]
+    min_nights: Optional[int]
+    is_blackout: bool
+    blackout_reason: str
+
+
+def evaluate_recurring_rules(property_ids: Iterable[int], start: date, end: date) -> Dict[int, Dict[date, RuleValues]]:
+    """
+    施設ごとに {date: RuleValues} を返す（どのルールにも当てはまらない日は含まない）。
+    キャッシュにない施設分のルールだけを1クエリで読み込む。
+    """
+    property_ids = list(property_ids)
+    params = {'start': start.isoformat(), 'end': end.isoformat()}
+    versions = tag_versions(rates_tag(pid) for pid in property_ids)
+    keys = {
+        pid: make_key('recurring-rules', {**params, 'property_id': pid}, [rates_tag(pid)], versions=versions)
+        for pid in property_ids
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    missing = [pid for pid in property_ids if keys[pid] not in cached]
+    if missing:
+        rules_by_property = {pid: [] for pid in missing}
+        for rule in RecurringPricingRule.objects.filter(
+            Q(start_date__isnull=True) | Q(start_date__lte=end),
+            Q(end_date__isnull=True) | Q(end_date__gte=start),
+            property_id__in=missing,
+            is_active=True,
+        ).order_by('-priority', 'id'):
+            rules_by_property[rule.property_id].append(rule)
+
+        computed = {
+            keys[pid]: _expand(rules, start, end)
+            for pid, rules in rules_by_property.items()
+        }
+        cache.set_many(computed, EVALUATION_CACHE_TIMEOUT)
+        cached.update(computed)
+
+    return {pid: cached[keys[pid]] for pid in property_ids}
+
+
+def _expand(rules: List[RecurringPricingRule], start: date, end: date) -> Dict[date, RuleValues]:
+    """優先度順に並んだルールを期間内の日付へ展開する。"""
+    if not rules:
+        return {}
+
+    holiday_dates = {
+        rule.id: {date.fromisoformat(d) for d in (rule.dates or [])}
+        for rule in rules
+        if rule.rule_type == RecurringPricingRule.RuleType.HOLIDAY
+    }
+
+    expanded = {}
+    current = start
+    while current <= end:
+        price = min_nights = None
+        is_blackout = False
+        blackout_reason = ''
+        matched = False
+        for rule in rules:
+            if not _matches(rule, current, holiday_dates):
+                continue
+            matched = True
+            if price is None:
+                price = rule.price
+            if min_nights is None:
+                min_nights = rule.min_nights
+            if rule.is_blackout and not is_blackout:
+                is_blackout = True
+                blackout_reason = rule.blackout_reason
+        if matched:
+            expanded[current] = RuleValues(price, min_nights, is_blackout, blackout_reason)
+        current += timedelta(days=1)
+    return expanded
+
+
+def _matches(rule: RecurringPricingRule, day: date, holiday_dates) -> bool:
+    if rule.start_date and day < rule.start_date:
+        return False
+    if rule.end_date and day > rule.end_date:
+        return False
+    if rule.weekdays and day.weekday() not in rule.weekdays:
+        return False
+    if rule.rule_type == RecurringPricingRule.RuleType.HOLIDAY:
+        return day in holiday_dates[rule.id]
+    return True
+
+
+def merge_with_pricing_rule(rule: Optional[tuple], recurring: Optional[RuleValues]) -> Optional[tuple]:
+    """
+    日別ルール（PricingRule）の値 (price, min_nights, is_blackout, blackout_reason) に繰り返しルールを重ねる。
+    日別ルールが存在する日はそのブラックアウト設定が優先され、価格・最小泊数は未設定の場合のみ補われる。
+    """
+    if recurring is None:
+        return rule
+    if rule is None:
+        return tuple(recurring)
+    price, min_nights, is_blackout, blackout_reason = rule
+    return (
+        price if price is not None else recurring.price,
+        min_nights if min_nights is not None else recurring.min_nights,
+        is_blackout,
+        blackout_reason,
+    )
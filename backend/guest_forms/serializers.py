@@ -1,7 +1,9 @@
 # backend/guest_forms/serializers.py
 
+from datetime import date
+
 from rest_framework import serializers
-from .models import FormField, FormTemplate, Property, FacilityImage, GuestSubmission, PricingRule
+from .models import FormField, FormTemplate, Property, FacilityImage, GuestSubmission, PricingRule, RecurringPricingRule
 
 class FacilityImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -63,3 +65,54 @@ class PricingRuleSerializer(serializers.ModelSerializer):
         model = PricingRule
         fields = ['id', 'property', 'date', 'price', 'min_nights', 'is_blackout', 'blackout_reason', 'created_by']
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+class RecurringPricingRuleSerializer(serializers.ModelSerializer):
+    """
+    繰り返し価格ルールをJSON化するためのシリアライザー
+    ルール種別ごとに必要な条件が揃っているかを検証する
+    """
+    class Meta:
+        model = RecurringPricingRule
+        fields = [
+            'id', 'property', 'name', 'rule_type', 'priority', 'is_active',
+            'weekdays', 'start_date', 'end_date', 'dates',
+            'price', 'min_nights', 'is_blackout', 'blackout_reason',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_weekdays(self, value):
+        if not isinstance(value, list) or any(not isinstance(d, int) or not 0 <= d <= 6 for d in value):
+            raise serializers.ValidationError('曜日は0（月曜）〜6（日曜）の整数の配列で指定してください')
+        return sorted(set(value))
+
+    def validate_dates(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError('日付リストは配列で指定してください')
+        try:
+            return sorted({date.fromisoformat(str(d)).isoformat() for d in value})
+        except ValueError:
+            raise serializers.ValidationError('日付は YYYY-MM-DD 形式で指定してください')
+
+    def validate(self, attrs):
+        def current(name, default=None):
+            if name in attrs:
+                return attrs[name]
+            return getattr(self.instance, name, default) if self.instance else default
+
+        rule_type = current('rule_type')
+        start_date, end_date = current('start_date'), current('end_date')
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': '終了日は開始日以降の日付を指定してください'})
+        if rule_type == RecurringPricingRule.RuleType.WEEKDAY and not current('weekdays'):
+            raise serializers.ValidationError({'weekdays': '曜日パターンには曜日を指定してください'})
+        if rule_type == RecurringPricingRule.RuleType.SEASON and not (start_date and end_date):
+            raise serializers.ValidationError({'start_date': 'シーズンには開始日と終了日を指定してください'})
+        if rule_type == RecurringPricingRule.RuleType.HOLIDAY and not current('dates'):
+            raise serializers.ValidationError({'dates': '祝日リストには日付を指定してください'})
+
+        if current('is_blackout', False):
+            attrs['price'] = None
+        elif current('price') is None and current('min_nights') is None:
+            raise serializers.ValidationError('価格・最小宿泊日数・ブラックアウトのいずれかを指定してください')
+        return super().validate(attrs)
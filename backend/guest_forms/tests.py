@@ -0,0 +1,245 @@
+import io
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from reservations.models import Reservation
+from reservations.services_effective_rates import rebuild_effective_rates
+from reservations.services_quote import quote_stay
+from .countries import extract_nationality, normalize_country, read_nationality
+from .models import GuestSubmission, PricingRule, Property, RecurringPricingRule
+from .recurring_rules import evaluate_recurring_rules
+
+# クエリ数を数えるテストでは、キャッシュの読み書き（既定はDBのキャッシュテーブル）を数えないよう
+# ローカルメモリのキャッシュを使う
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+class PricingCalendarTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+        self.prop = Property.objects.create(name='Villa', slug='villa', base_price=10000, min_nights=2)
+        PricingRule.objects.create(property=self.prop, date=date(2026, 3, 5), price=15000)
+        PricingRule.objects.create(property=self.prop, date=date(2026, 3, 6), is_blackout=True, blackout_reason='点検')
+        # 2026-03-01 を今日として、保存期間（今日から1年）に対象の月を含める
+        window = mock.patch(
+            'reservations.services_effective_rates.stored_window',
+            return_value=(date(2026, 3, 1), date(2027, 3, 1)),
+        )
+        window.start()
+        self.addCleanup(window.stop)
+        rebuild_effective_rates(date(2026, 3, 1), date(2026, 5, 31))
+
+    def test_month_view_query_count_is_constant(self):
+        # 施設の取得 + 実効料金の範囲読み込み
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/pricing/{self.prop.id}/2026/3/')
+
+        calendar = {day['date']: day for day in response.data['calendarData']}
+        self.assertEqual(len(calendar), 31)
+        self.assertEqual(calendar['2026-03-05']['price'], 15000)
+        self.assertEqual(calendar['2026-03-06']['blackoutReason'], '点検')
+        self.assertEqual(calendar['2026-03-07']['price'], 10000)
+        self.assertEqual(calendar['2026-03-07']['minNights'], 2)
+
+    def test_range_view_serves_several_months_in_one_read(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/pricing/{self.prop.id}/calendar/', {'start': '2026-03', 'end': '2026-05'})
+
+        self.assertEqual(response.data['startDate'], '2026-03-01')
+        self.assertEqual(response.data['endDate'], '2026-05-31')
+        self.assertEqual(len(response.data['calendarData']), 31 + 30 + 31)
+
+
+class PricingBulkUpdateTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+        self.prop = Property.objects.create(name='Villa', slug='villa')
+        PricingRule.objects.create(property=self.prop, date=date(2026, 7, 10), price=9000, min_nights=3)
+
+    def test_range_price_keeps_existing_min_nights(self):
+        response = self.client.post(f'/api/pricing/{self.prop.id}/bulk/', {
+            'ranges': [{'startDate': '2026-07-01', 'endDate': '2026-08-31', 'price': 15000}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['range_days'], 62)
+        rules = PricingRule.objects.filter(property=self.prop)
+        self.assertEqual(rules.count(), 62)
+        self.assertEqual(set(rules.values_list('price', flat=True)), {15000})
+        self.assertEqual(rules.get(date=date(2026, 7, 10)).min_nights, 3)
+
+    def test_updates_and_blackout_ranges_are_upserted(self):
+        response = self.client.post(f'/api/pricing/{self.prop.id}/bulk/', {
+            'updates': [{'date': '2026-07-10', 'price': 11000}],
+            'ranges': [{'startDate': '2026-07-11', 'endDate': '2026-07-12', 'isBlackout': True, 'blackoutReason': '点検'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        rule = PricingRule.objects.get(property=self.prop, date=date(2026, 7, 10))
+        self.assertEqual((rule.price, rule.min_nights), (11000, None))
+        self.assertEqual(
+            list(PricingRule.objects.filter(is_blackout=True).values_list('date', 'blackout_reason')),
+            [(date(2026, 7, 11), '点検'), (date(2026, 7, 12), '点検')],
+        )
+
+    def test_invalid_input_writes_nothing(self):
+        response = self.client.post(f'/api/pricing/{self.prop.id}/2026/7/', {
+            'updates': [{'date': '2026-07-01', 'price': 12000}, {'date': '2026-07-32', 'price': 12000}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['index'], 1)
+        self.assertFalse(PricingRule.objects.filter(date=date(2026, 7, 1)).exists())
+
+    def test_non_object_items_are_rejected_with_their_index(self):
+        response = self.client.post(f'/api/pricing/{self.prop.id}/2026/7/', {'updates': [{'date': '2026-07-01', 'price': 12000}, 1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['index'], 1)
+
+        response = self.client.post(f'/api/pricing/{self.prop.id}/bulk/', {'updates': ['x'], 'ranges': ['x']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([(item.get('index'), item.get('range')) for item in response.data['details']], [(0, None), (None, 0)])
+        self.assertFalse(PricingRule.objects.filter(date=date(2026, 7, 1)).exists())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RecurringPricingRuleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+        self.prop = Property.objects.create(name='Villa', slug='villa', base_price=10000, min_nights=1)
+        # 金・土・日は週末料金、年末年始は祝日料金（優先度が高い）
+        RecurringPricingRule.objects.create(
+            property=self.prop, name='週末', rule_type='weekday', weekdays=[4, 5, 6], price=15000, min_nights=2,
+        )
+        RecurringPricingRule.objects.create(
+            property=self.prop, name='年末年始', rule_type='holiday', priority=10,
+            dates=['2026-12-31', '2027-01-01'], price=25000,
+        )
+
+    def test_highest_priority_rule_wins_and_unset_fields_fall_through(self):
+        days = evaluate_recurring_rules([self.prop.id], date(2026, 12, 28), date(2027, 1, 2))[self.prop.id]
+
+        self.assertNotIn(date(2026, 12, 28), days)  # 月曜
+        self.assertEqual(days[date(2026, 12, 31)].price, 25000)
+        self.assertIsNone(days[date(2026, 12, 31)].min_nights)
+        # 2027-01-01 は金曜: 価格は祝日ルール、最小泊数は週末ルールから補われる
+        self.assertEqual(days[date(2027, 1, 1)].price, 25000)
+        self.assertEqual(days[date(2027, 1, 1)].min_nights, 2)
+        self.assertEqual(days[date(2027, 1, 2)].price, 15000)
+
+    def test_evaluation_is_cached_until_rules_change(self):
+        evaluate_recurring_rules([self.prop.id], date(2026, 7, 1), date(2026, 7, 31))
+        with self.assertNumQueries(0):
+            evaluate_recurring_rules([self.prop.id], date(2026, 7, 1), date(2026, 7, 31))
+
+        RecurringPricingRule.objects.create(
+            property=self.prop, name='夏季', rule_type='season', priority=5,
+            start_date=date(2026, 7, 15), end_date=date(2026, 8, 31), price=18000,
+        )
+        days = evaluate_recurring_rules([self.prop.id], date(2026, 7, 1), date(2026, 7, 31))[self.prop.id]
+        self.assertEqual(days[date(2026, 7, 17)].price, 18000)
+
+    def test_pricing_rule_overrides_recurring_rule(self):
+        PricingRule.objects.create(property=self.prop, date=date(2026, 7, 4), price=12000)
+
+        response = self.client.get(f'/api/pricing/{self.prop.id}/2026/7/')
+        calendar = {day['date']: day for day in response.data['calendarData']}
+        self.assertEqual(calendar['2026-07-03']['price'], 15000)
+        self.assertEqual(calendar['2026-07-04']['price'], 12000)
+        self.assertEqual(calendar['2026-07-04']['minNights'], 2)
+        self.assertEqual(calendar['2026-07-06']['price'], 10000)
+
+    def test_quote_uses_recurring_rules(self):
+        quote = quote_stay(self.prop, date(2026, 7, 2), date(2026, 7, 5), adults=2)
+
+        self.assertEqual([night['price'] for night in quote['nightly']], [10000, 15000, 15000])
+        self.assertEqual(quote['min_nights'], 1)
+
+        single_night = quote_stay(self.prop, date(2026, 7, 3), date(2026, 7, 4), adults=2)
+        self.assertFalse(single_night['bookable'])
+        self.assertEqual(single_night['errors'], [{'code': 'min_nights', 'min_nights': 2}])
+
+    def test_serializer_validates_rule_type_requirements(self):
+        response = self.client.post('/api/recurring-pricing-rules/', {
+            'property': self.prop.id, 'name': '夏季', 'rule_type': 'season', 'price': 18000,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start_date', response.data)
+
+        response = self.client.post('/api/recurring-pricing-rules/', {
+            'property': self.prop.id, 'name': '平日', 'rule_type': 'weekday', 'weekdays': [3, 0, 7], 'price': 8000,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('weekdays', response.data)
+
+
+class CountryNormalizationTests(SimpleTestCase):
+    def test_names_codes_and_aliases_map_to_alpha2(self):
+        for value in ['Japan', '日本', 'jpn', ' JP ', ['Japan']]:
+            self.assertEqual(normalize_country(value), 'JP')
+        self.assertEqual(normalize_country('u.s.a.'), 'US')
+        self.assertEqual(normalize_country('United  Kingdom'), 'GB')
+        self.assertEqual(normalize_country('Atlantis'), '')
+        self.assertEqual(normalize_country(None), '')
+
+    def test_nationality_is_read_from_known_keys(self):
+        self.assertEqual(extract_nationality({'氏名': 'A', '国籍': '台湾'}), 'TW')
+        self.assertEqual(extract_nationality({'Country': 'korea'}), 'KR')
+        self.assertEqual(extract_nationality({'address': 'Japan'}), '')
+        self.assertEqual(extract_nationality(None), '')
+
+    def test_unmatched_input_is_kept_for_grouping(self):
+        self.assertEqual(read_nationality({'国籍': '台湾'}), ('TW', ''))
+        self.assertEqual(read_nationality({'Nationality': '  Republic of  Atlantis '}), ('', 'Republic of Atlantis'))
+        self.assertEqual(read_nationality({'Name': 'A'}), ('', ''))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class NationalityAnalyticsTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+        self.prop = Property.objects.create(name='Villa', slug='villa')
+
+    def _submission(self, check_in, data, status=GuestSubmission.SubmissionStatus.COMPLETED):
+        reservation = Reservation.objects.create(property=self.prop, check_in_date=check_in, status='Confirmed')
+        return GuestSubmission.objects.create(reservation=reservation, submitted_data=data, status=status)
+
+    def test_submit_stores_code_and_ratio_is_grouped_in_the_database(self):
+        pending = self._submission(date(2025, 5, 1), None, status=GuestSubmission.SubmissionStatus.PENDING)
+        response = self.client.post(f'/api/guest-forms/{pending.token}/submit/', {'Nationality': 'usa', 'Name': 'A'})
+        self.assertEqual(response.status_code, 201)
+        pending.refresh_from_db()
+        self.assertEqual(pending.nationality, 'US')
+
+        # 国籍列の追加前に提出されたデータは backfill_nationality で埋める
+        self._submission(date(2025, 6, 1), {'country': 'United States'})
+        self._submission(date(2025, 7, 1), {'国籍': '日本'})
+        self._submission(date(2024, 7, 1), {'国籍': '日本'})
+        out = io.StringIO()
+        call_command('backfill_nationality', stdout=out)
+        self.assertIn('3 of 3', out.getvalue())
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/analytics/nationality/', {'year': 2025})
+        self.assertEqual(response.data, [
+            {'country': 'アメリカ', 'code': 'US', 'count': 2},
+            {'country': '日本', 'code': 'JP', 'count': 1},
+        ])
+
+        # 判別できない国名は入力値ごとにまとめ、国籍欄がない名簿だけを「不明」とする
+        pending = self._submission(date(2025, 8, 1), None, status=GuestSubmission.SubmissionStatus.PENDING)
+        self.client.post(f'/api/guest-forms/{pending.token}/submit/', {'国籍': ' Atlantis '})
+        self._submission(date(2025, 8, 2), {'Nationality': 'Atlantis'})
+        self._submission(date(2025, 8, 3), {'Name': 'B'})
+        call_command('backfill_nationality', stdout=io.StringIO())
+        response = self.client.get('/api/analytics/nationality/', {'year': 2025})
+        self.assertIn({'country': 'Atlantis', 'code': None, 'count': 2}, response.data)
+        self.assertIn({'country': '不明', 'code': None, 'count': 1}, response.data)
@@ -1,12 +1,13 @@
 # backend/guest_forms/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet, FacilityImageViewSet, PricingRuleViewSet, pricing_month_view, Beds24SyncAPIView
+from .views import PropertyViewSet, FacilityImageViewSet, PricingRuleViewSet, RecurringPricingRuleViewSet, pricing_month_view, pricing_range_view, pricing_bulk_view, Beds24SyncAPIView
 
 # Create a router and register our viewset with it.
 router = DefaultRouter()
 router.register(r'properties', PropertyViewSet, basename='property')
 router.register(r'pricing-rules', PricingRuleViewSet, basename='pricing-rule')
+router.register(r'recurring-pricing-rules', RecurringPricingRuleViewSet, basename='recurring-pricing-rule')
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
@@ -16,5 +17,7 @@ urlpatterns = [
     
     # 価格設定エンドポイント
     path('pricing/<int:property_id>/<int:year>/<int:month>/', pricing_month_view, name='pricing-month'),
+    path('pricing/<int:property_id>/calendar/', pricing_range_view, name='pricing-range'),
+    path('pricing/<int:property_id>/bulk/', pricing_bulk_view, name='pricing-bulk'),
     path('pricing/<int:property_id>/sync-beds24/', Beds24SyncAPIView.as_view(), name='pricing-sync-beds24'),
 ]
@@ -8,18 +8,30 @@ from rest_framework.permissions import AllowAny
 from rest_framework.permissions import AllowAny
 from datetime import date, timedelta
 
+from django.db.models import Count, Sum
+
+from api.conditional import ConditionalGetMixin
 from reservations.services import Beds24SyncError, fetch_beds24_bookings, sync_bookings_to_db
 from reservations.models import SyncStatus, Reservation
 from guest_forms.google_sheets_service import GoogleSheetsService
 
-from .models import Property, FacilityImage, GuestSubmission, FormTemplate, PricingRule
-from .serializers import PropertySerializer, FacilityImageSerializer, FormTemplateSerializer, GuestSubmissionSerializer, PricingRuleSerializer
+from .countries import read_nationality
+from .models import Property, FacilityImage, GuestSubmission, FormTemplate, PricingRule, RecurringPricingRule
+from .pricing_calendar import (
+    CalendarUpdateError, apply_calendar_changes, basic_settings, build_pricing_calendar, month_bounds
+)
+from .serializers import PropertySerializer, FacilityImageSerializer, FormTemplateSerializer, GuestSubmissionSerializer, PricingRuleSerializer, RecurringPricingRuleSerializer
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows properties to be viewed or edited.
     """
     queryset = Property.objects.all().order_by('name')
+    # アメニティの付け替えは施設の更新日時に現れないため指紋に含める
+    conditional_extra_aggregates = {
+        'amenity_count': Count('amenities'),
+        'amenity_sum': Sum('amenities__id'),
+    }
     serializer_class = PropertySerializer
     permission_classes = [AllowAny]
     permission_classes = [AllowAny]
@@ -89,6 +101,7 @@ class GuestFormSubmitView(APIView):
 
             # ファイル以外のデータを submitted_data (JSONField) に保存
             submission.submitted_data = request.data
+            submission.nationality, submission.nationality_input = read_nationality(submission.submitted_data)
             
             # ここにファイル処理のロジックを追記する
             # 例: request.FILES内のファイルをS3などにアップロードし、そのURLをsubmitted_dataに含める
@@ -155,7 +168,9 @@ class GuestFormUpdateView(APIView):
             submission = GuestSubmission.objects.get(token=token)
             serializer = GuestSubmissionSerializer(submission, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
+                submitted_data = serializer.validated_data.get('submitted_data', submission.submitted_data)
+                nationality, nationality_input = read_nationality(submitted_data)
+                serializer.save(nationality=nationality, nationality_input=nationality_input)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except GuestSubmission.DoesNotExist:
@@ -170,6 +185,9 @@ from datetime import datetime, timedelta
 from rest_framework.decorators import api_view
 from rest_framework.viewsets import ViewSet
 
+# 価格カレンダーを一度に取得できる最大月数
+MAX_CALENDAR_MONTHS = 24
+
 class PropertyPricingViewSet(viewsets.ModelViewSet):
     """
     施設の価格設定を取得・更新するAPI
@@ -213,7 +231,7 @@ class PropertyPricingViewSet(viewsets.ModelViewSet):
             return False
 
 
-class PricingRuleViewSet(viewsets.ModelViewSet):
+class PricingRuleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     日別価格ルールの CRUD API
     GET /api/pricing-rules/?property={property_id}&start_date=2026-03-01&end_date=2026-05-31
@@ -243,6 +261,31 @@ class PricingRuleViewSet(viewsets.ModelViewSet):
         return queryset.order_by('date')
 
 
+class RecurringPricingRuleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    繰り返し価格ルール（曜日パターン・シーズン・祝日リスト）の CRUD API
+    GET /api/recurring-pricing-rules/?property={property_id}&active=true
+    POST /api/recurring-pricing-rules/
+    PUT /api/recurring-pricing-rules/{id}/
+    DELETE /api/recurring-pricing-rules/{id}/
+    """
+    serializer_class = RecurringPricingRuleSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = RecurringPricingRule.objects.all()
+
+        property_id = self.request.query_params.get('property')
+        if property_id:
+            queryset = queryset.filter(property_id=property_id)
+
+        active = self.request.query_params.get('active')
+        if active is not None:
+            queryset = queryset.filter(is_active=active.lower() in ('1', 'true', 'yes'))
+
+        return queryset.order_by('property', '-priority', 'id')
+
+
 @api_view(['GET', 'POST'])
 def pricing_month_view(request, property_id, year, month):
     """
@@ -250,14 +293,7 @@ def pricing_month_view(request, property_id, year, month):
     GET /api/pricing/{property_id}/{year}/{month}/
     POST /api/pricing/{property_id}/{year}/{month}/
     """
-    from datetime import date, timedelta
-    
-    # 月の最初と最後の日を計算
-    start_date = date(int(year), int(month), 1)
-    if int(month) == 12:
-        end_date = date(int(year) + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = date(int(year), int(month) + 1, 1) - timedelta(days=1)
+    start_date, end_date = month_bounds(int(year), int(month))
 
     try:
         property_obj = Property.objects.get(id=property_id)
@@ -265,68 +301,91 @@ def pricing_month_view(request, property_id, year, month):
         return Response({'error': '施設が見つかりません'}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        # 月のデータを取得
-        rules = PricingRule.objects.filter(
-            property=property_obj,
-            date__range=(start_date, end_date)
-        ).order_by('date')
-        
-        # 基本設定も取得
-        basic_settings = {
-            'basePrice': property_obj.base_price,
-            'baseGuests': property_obj.base_guests,
-            'adultExtraPrice': property_obj.adult_extra_price,
-            'childExtraPrice': property_obj.child_extra_price,
-            'minNights': property_obj.min_nights,
-        }
-        
-        # 全日付分のデータを構築（存在しない日付は基本設定から計算）
-        calendar_data = []
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            rule = rules.filter(date=current_date).first()
-            
-            calendar_data.append({
-                'date': date_str,
-                'price': rule.price if rule and rule.price else property_obj.base_price,
-                'isBlackout': rule.is_blackout if rule else False,
-                'blackoutReason': rule.blackout_reason if rule else '',
-                'minNights': rule.min_nights if rule and rule.min_nights else property_obj.min_nights,
-            })
-            current_date += timedelta(days=1)
-        
+        # 月のルールを1クエリで読み込み、基本設定とマージして全日付分を構築
         return Response({
-            'basicSettings': basic_settings,
-            'calendarData': calendar_data,
+            'basicSettings': basic_settings(property_obj),
+            'calendarData': build_pricing_calendar(property_obj, start_date, end_date),
         })
 
     elif request.method == 'POST':
-        # 複数の日付のデータを一括更新
+        # 複数の日付のデータを一括更新（全件検証後、1トランザクションで upsert）
         data = request.data.get('updates', [])
-        
-        for update in data:
-            date_obj = datetime.strptime(update['date'], '%Y-%m-%d').date()
-            rule, _ = PricingRule.objects.get_or_create(
-                property=property_obj,
-                date=date_obj,
-            )
-            
-            if update.get('isBlackout'):
-                rule.is_blackout = True
-                rule.blackout_reason = update.get('blackoutReason', '')
-                rule.price = None
-            else:
-                rule.is_blackout = False
-                rule.blackout_reason = ''
-                rule.price = update.get('price')
-            
-            rule.min_nights = update.get('minNights')
-            rule.save()
+        if not isinstance(data, list):
+            return Response({'error': 'updates は配列で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            apply_calendar_changes(property_obj, updates=data)
+        except CalendarUpdateError as exc:
+            return Response({'error': str(exc), 'details': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'status': 'ok'}, status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+def pricing_bulk_view(request, property_id):
+    """
+    価格カレンダーの一括更新（日付ごとの上書き + 期間操作）
+    POST /api/pricing/{property_id}/bulk/
+    {
+        "updates": [{"date": "2026-07-01", "price": 12000, "minNights": 2}],
+        "ranges": [
+            {"startDate": "2026-07-01", "endDate": "2026-08-31", "price": 15000},
+            {"startDate": "2026-12-30", "endDate": "2027-01-03", "isBlackout": true, "blackoutReason": "年末年始"}
+        ]
+    }
+    """
+    try:
+        property_obj = Property.objects.get(id=property_id)
+    except Property.DoesNotExist:
+        return Response({'error': '施設が見つかりません'}, status=status.HTTP_404_NOT_FOUND)
+
+    updates = request.data.get('updates', [])
+    ranges = request.data.get('ranges', [])
+    if not isinstance(updates, list) or not isinstance(ranges, list):
+        return Response({'error': 'updates と ranges は配列で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        counts = apply_calendar_changes(property_obj, updates=updates, ranges=ranges)
+    except CalendarUpdateError as exc:
+        return Response({'error': str(exc), 'details': exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'status': 'ok', **counts}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def pricing_range_view(request, property_id):
+    """
+    複数月の価格データを一括取得
+    GET /api/pricing/{property_id}/calendar/?start=2026-03&end=2026-08
+    """
+    try:
+        start_year, start_month = (int(v) for v in request.query_params.get('start', '').split('-'))
+        end_year, end_month = (int(v) for v in request.query_params.get('end', '').split('-'))
+        start_date, _ = month_bounds(start_year, start_month)
+        _, end_date = month_bounds(end_year, end_month)
+    except ValueError:
+        return Response({'error': 'start と end を YYYY-MM 形式で指定してください'}, status=status.HTTP_400_BAD_REQUEST)
+
+    num_months = (end_year - start_year) * 12 + (end_month - start_month) + 1
+    if not 0 < num_months <= MAX_CALENDAR_MONTHS:
+        return Response(
+            {'error': f'期間は{MAX_CALENDAR_MONTHS}ヶ月以内で指定してください'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        property_obj = Property.objects.get(id=property_id)
+    except Property.DoesNotExist:
+        return Response({'error': '施設が見つかりません'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'basicSettings': basic_settings(property_obj),
+        'startDate': start_date.isoformat(),
+        'endDate': end_date.isoformat(),
+        'calendarData': build_pricing_calendar(property_obj, start_date, end_date),
+    })
+
+
 class Beds24SyncAPIView(APIView):
     """
     POST /api/pricing/{property_id}/sync-beds24/
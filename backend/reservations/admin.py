@@ -1,7 +1,12 @@
 # reservations/admin.py
+import json
+
 from django.contrib import admin
-from .models import Reservation, SyncStatus, AccommodationTax
-from .models_pricing import DailyRate
+from django.utils.html import format_html
+from .models import Reservation, MonthlyRevenueRollup, BookingPaceSnapshot, DateDimension, SyncStatus, AccommodationTax
+from .models_pricing import DailyRate, DailyRateRawArchive, EffectiveRate, PricePush, RateRange
+from .services_occupancy import refresh_reservation_nights
+from .services_revenue import refresh_revenue_rollup, rollup_keys
 
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
@@ -9,6 +14,55 @@ class ReservationAdmin(admin.ModelAdmin):
     list_filter = ('status', 'guest_roster_status', 'property')
     search_fields = ('guest_name', 'guest_email', 'beds24_book_id')
 
+    def save_model(self, request, obj, form, change):
+        previous_keys = rollup_keys([obj.pk]) if obj.pk else set()
+        super().save_model(request, obj, form, change)
+        refresh_reservation_nights([obj.id])
+        refresh_revenue_rollup(previous_keys | rollup_keys([obj.id]))
+
+    def delete_model(self, request, obj):
+        previous_keys = rollup_keys([obj.pk])
+        super().delete_model(request, obj)
+        refresh_revenue_rollup(previous_keys)
+
+    def delete_queryset(self, request, queryset):
+        previous_keys = rollup_keys(queryset)
+        super().delete_queryset(request, queryset)
+        refresh_revenue_rollup(previous_keys)
+
+@admin.register(MonthlyRevenueRollup)
+class MonthlyRevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ('property', 'month', 'fiscal_year', 'fiscal_month', 'status', 'revenue', 'booking_count', 'guest_count')
+    list_filter = ('fiscal_year', 'status', 'property')
+    ordering = ['-month', 'property']
+    # 予約から自動集計されるため編集不可（修正は rebuild_revenue_rollup コマンドで行う）
+    readonly_fields = [field.name for field in MonthlyRevenueRollup._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(BookingPaceSnapshot)
+class BookingPaceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('property', 'stay_month', 'snapshot_date', 'nights', 'revenue', 'booking_count')
+    list_filter = ('stay_month', 'property')
+    ordering = ['-snapshot_date', 'stay_month', 'property']
+    # 集計時点の記録のため編集不可
+    readonly_fields = [field.name for field in BookingPaceSnapshot._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(DateDimension)
+class DateDimensionAdmin(admin.ModelAdmin):
+    list_display = ('date', 'fiscal_year', 'fiscal_month', 'iso_week', 'weekday', 'is_holiday', 'holiday_name', 'season')
+    list_filter = ('fiscal_year', 'is_holiday', 'season')
+    date_hierarchy = 'date'
+    # build_date_dimension コマンドで作り直すため編集不可
+    readonly_fields = [field.name for field in DateDimension._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(SyncStatus)
 class SyncStatusAdmin(admin.ModelAdmin):
     list_display = ('last_sync_time',)
@@ -51,12 +105,57 @@ class DailyRateAdmin(admin.ModelAdmin):
         ('料金情報', {
             'fields': ('base_price', 'available', 'min_stay')
         }),
-        ('Beds24データ', {
-            'fields': ('beds24_data',),
-            'classes': ('collapse',)
-        }),
         ('タイムスタンプ', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(RateRange)
+class RateRangeAdmin(admin.ModelAdmin):
+    list_display = ('property', 'start_date', 'end_date', 'base_price', 'available', 'min_stay', 'updated_at')
+    list_filter = ('property', 'available')
+    search_fields = ('property__name',)
+    date_hierarchy = 'start_date'
+    ordering = ['property', 'start_date']
+
+
+@admin.register(EffectiveRate)
+class EffectiveRateAdmin(admin.ModelAdmin):
+    list_display = ('property', 'date', 'price', 'price_source', 'min_nights', 'available', 'is_blackout', 'updated_at')
+    list_filter = ('property', 'price_source', 'available')
+    search_fields = ('property__name', 'blackout_reason')
+    date_hierarchy = 'date'
+    ordering = ['property', 'date']
+    # 元データから自動計算されるため編集不可（修正は rebuild_effective_rates コマンドで行う）
+    readonly_fields = [field.name for field in EffectiveRate._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(PricePush)
+class PricePushAdmin(admin.ModelAdmin):
+    list_display = ('property', 'date', 'enqueued_at', 'attempts', 'next_attempt_at', 'last_error')
+    list_filter = ('property',)
+    search_fields = ('property__name', 'last_error')
+    date_hierarchy = 'date'
+    ordering = ['property', 'date']
+
+
+@admin.register(DailyRateRawArchive)
+class DailyRateRawArchiveAdmin(admin.ModelAdmin):
+    list_display = ('property', 'source', 'start_date', 'end_date', 'row_count', 'fetched_at')
+    list_filter = ('source', 'property')
+    search_fields = ('property__name', 'sync_run')
+    date_hierarchy = 'fetched_at'
+    exclude = ('payload',)
+    readonly_fields = (
+        'sync_run', 'property', 'source', 'start_date', 'end_date', 'row_count', 'fetched_at', 'payload_preview',
+    )
+
+    def payload_preview(self, obj):
+        return format_html('<pre>{}</pre>', json.dumps(obj.load_rows(), ensure_ascii=False, indent=2))
+    payload_preview.short_description = "生データ"
+
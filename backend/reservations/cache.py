@@ -0,0 +1,64 @@
+# reservations/cache.py
+"""
+Djangoのキャッシュフレームワーク上に、タグ単位で無効化できるキャッシュキーを提供する。
+
+各タグはバージョン番号を持ち、キャッシュキーには関連タグのバージョンが含まれる。
+データが変わったら bump_tags() でバージョンを上げるだけで、そのタグを含む
+キャッシュは参照されなくなる（古いエントリはタイムアウトで自然に消える）。
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import cache
+
+_TAG_PREFIX = 'cache-tag'
+
+
+def rates_tag(property_id) -> str:
+    """施設の料金データ（DailyRate / PricingRule / RecurringPricingRule / Property）用のタグ"""
+    return f'rates:{property_id}'
+
+
+def occupancy_tag(property_id, fiscal_year) -> str:
+    """施設・会計年度ごとの宿泊日データ（ReservationNight）用のタグ"""
+    return f'occupancy:{property_id}:{fiscal_year}'
+
+
+def analytics_tag() -> str:
+    """予約・名簿提出から集計する分析APIのレスポンス用のタグ（response_cache を参照）"""
+    return 'analytics'
+
+
+def tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """タグごとの現在のバージョンを返す（未登録のタグは1）。"""
+    tags = list(tags)
+    stored = cache.get_many([f'{_TAG_PREFIX}:{tag}' for tag in tags])
+    return {tag: stored.get(f'{_TAG_PREFIX}:{tag}', 1) for tag in tags}
+
+
+def bump_tags(*tags: str) -> None:
+    """タグのバージョンを上げ、そのタグを含むキャッシュを無効化する。"""
+    for tag in tags:
+        key = f'{_TAG_PREFIX}:{tag}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 未登録のタグは既定バージョン1の次から始める
+            cache.set(key, 2, timeout=None)
+
+
+def make_key(prefix: str, params: Dict, tags: Iterable[str], versions: Optional[Dict[str, int]] = None) -> str:
+    """
+    パラメータとタグのバージョンからキャッシュキーを作る。
+    複数キーをまとめて作る場合は tag_versions() の結果を versions に渡すと再取得しない。
+    """
+    tags = list(tags)
+    if versions is None:
+        versions = tag_versions(tags)
+    payload = json.dumps(
+        {'params': params, 'tags': {tag: versions.get(tag, 1) for tag in tags}},
+        sort_keys=True,
+        default=str,
+    )
+    return f'{prefix}:{hashlib.md5(payload.encode("utf-8")).hexdigest()}'
@@ -0,0 +1,85 @@
+# reservations/jp_holidays.py
+"""
+日本の祝日（国民の祝日・振替休日・国民の休日）の計算。
+
+2000年以降を対象とし、春分・秋分の日は 2099 年まで有効な近似式で求める。
+2019年の天皇の即位に伴う休日と、2020・2021年のオリンピックに伴う祝日の移動にも対応する。
+振替休日は現行（2007年以降）の規定で計算する。
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict
+
+# 年ごとに日付が動く祝日の特例
+_SPECIAL_HOLIDAYS = {
+    2019: {date(2019, 5, 1): '天皇の即位の日', date(2019, 10, 22): '即位礼正殿の儀の行われる日'},
+    2020: {date(2020, 7, 23): '海の日', date(2020, 7, 24): 'スポーツの日', date(2020, 8, 10): '山の日'},
+    2021: {date(2021, 7, 22): '海の日', date(2021, 7, 23): 'スポーツの日', date(2021, 8, 8): '山の日'},
+}
+
+
+def _nth_monday(year: int, month: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(7 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _equinox_day(year: int, base: float) -> int:
+    return int(base + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+def _national_holidays(year: int) -> Dict[date, str]:
+    """国民の祝日（振替休日・国民の休日を除く）"""
+    holidays = {
+        date(year, 1, 1): '元日',
+        _nth_monday(year, 1, 2): '成人の日',
+        date(year, 2, 11): '建国記念の日',
+        date(year, 3, _equinox_day(year, 20.8431)): '春分の日',
+        date(year, 4, 29): '昭和の日' if year >= 2007 else 'みどりの日',
+        date(year, 5, 3): '憲法記念日',
+        date(year, 5, 5): 'こどもの日',
+        date(year, 9, _equinox_day(year, 23.2488)): '秋分の日',
+        date(year, 11, 3): '文化の日',
+        date(year, 11, 23): '勤労感謝の日',
+    }
+    if year >= 2007:
+        holidays[date(year, 5, 4)] = 'みどりの日'
+    if year >= 2020:
+        holidays[date(year, 2, 23)] = '天皇誕生日'
+    elif year <= 2018:
+        holidays[date(year, 12, 23)] = '天皇誕生日'
+
+    if year not in (2020, 2021):
+        holidays[_nth_monday(year, 7, 3) if year >= 2003 else date(year, 7, 20)] = '海の日'
+        holidays[_nth_monday(year, 10, 2)] = 'スポーツの日' if year >= 2020 else '体育の日'
+        if year >= 2016:
+            holidays[date(year, 8, 11)] = '山の日'
+    holidays[_nth_monday(year, 9, 3) if year >= 2003 else date(year, 9, 15)] = '敬老の日'
+    holidays.update(_SPECIAL_HOLIDAYS.get(year, {}))
+    return holidays
+
+
+@lru_cache(maxsize=None)
+def holidays_of_year(year: int) -> Dict[date, str]:
+    """その年の祝日・休日を {日付: 名称} で返す。"""
+    holidays = _national_holidays(year)
+
+    # 国民の休日: 前日と翌日が国民の祝日である平日
+    for day in sorted(holidays):
+        between = day + timedelta(days=2)
+        rest_day = day + timedelta(days=1)
+        if between in holidays and rest_day not in holidays and rest_day.weekday() != 6:
+            holidays[rest_day] = '国民の休日'
+
+    # 振替休日: 日曜日の祝日の後の最初の祝日でない日
+    for day in sorted(holidays):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in holidays:
+                substitute += timedelta(days=1)
+            holidays[substitute] = '振替休日'
+    return dict(sorted(holidays.items()))
+
+
+def holiday_name(day: date) -> str:
+    """祝日・休日の名称を返す。祝日でない日は空文字。"""
+    return holidays_of_year(day.year).get(day, '')
@@ -0,0 +1,19 @@
+# reservations/management/commands/build_date_dimension.py
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.services_calendar import DEFAULT_FISCAL_YEARS, build_date_dimension
+
+
+class Command(BaseCommand):
+    help = '日付ディメンション（会計年度・会計月・週・曜日・祝日・季節）を会計年度単位で作り直す'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-year', type=int, default=DEFAULT_FISCAL_YEARS[0], help='最初の会計年度')
+        parser.add_argument('--end-year', type=int, default=DEFAULT_FISCAL_YEARS[-1], help='最後の会計年度')
+
+    def handle(self, *args, **options):
+        if options['end_year'] < options['start_year']:
+            raise CommandError('--end-year は --start-year 以降を指定してください')
+
+        rows = build_date_dimension(range(options['start_year'], options['end_year'] + 1))
+        self.stdout.write(self.style.SUCCESS(f"Done. {rows} date dimension rows built"))
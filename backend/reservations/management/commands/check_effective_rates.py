@@ -0,0 +1,46 @@
+# reservations/management/commands/check_effective_rates.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from guest_forms.models import Property
+from reservations.services_effective_rates import DEFAULT_HORIZON_DAYS, find_inconsistencies, refresh_effective_rates
+
+
+class Command(BaseCommand):
+    help = '保存済みの実効料金（EffectiveRate）を元データと突き合わせ、食い違いを報告'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property-id', type=int, help='対象施設ID（未指定なら全施設）')
+        parser.add_argument('--start', type=str, help='開始日 YYYY-MM-DD（未指定なら今日）')
+        parser.add_argument('--end', type=str, help=f'終了日 YYYY-MM-DD（未指定なら開始日から{DEFAULT_HORIZON_DAYS}日後）')
+        parser.add_argument('--fix', action='store_true', help='食い違いのあった日付を再計算して修正する')
+
+    def handle(self, *args, **options):
+        start = date.fromisoformat(options['start']) if options.get('start') else date.today()
+        end = date.fromisoformat(options['end']) if options.get('end') else start + timedelta(days=DEFAULT_HORIZON_DAYS)
+        property_ids = [options['property_id']] if options.get('property_id') else None
+
+        problems = find_inconsistencies(start, end, property_ids)
+        for problem in problems:
+            self.stdout.write(
+                f"property={problem['property_id']} {problem['date']}: "
+                + ', '.join(
+                    f"{field} {problem['stored'][field]!r} != {problem['expected'][field]!r}"
+                    for field in problem['fields']
+                )
+            )
+
+        if not problems:
+            self.stdout.write(self.style.SUCCESS(f"OK. No inconsistencies ({start} - {end})"))
+            return
+
+        if options['fix']:
+            properties = Property.objects.in_bulk({problem['property_id'] for problem in problems})
+            for pid, prop in properties.items():
+                days = [problem['date'] for problem in problems if problem['property_id'] == pid]
+                refresh_effective_rates(prop, min(days), max(days))
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(problems)} inconsistent days"))
+            return
+
+        raise CommandError(f"{len(problems)} inconsistent days found (run with --fix to repair)")
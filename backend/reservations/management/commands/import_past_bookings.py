@@ -6,6 +6,8 @@ from django.core.management.base import BaseCommand
 from guest_forms.models import Property
 from reservations.models import Reservation
 from reservations.services import Beds24SyncError, fetch_beds24_bookings
+from reservations.services_occupancy import refresh_reservation_nights
+from reservations.services_revenue import refresh_revenue_rollup, rollup_keys
 
 class Command(BaseCommand):
     help = 'One-time script to import past bookings from a specified date range.'
@@ -65,6 +67,10 @@ class Command(BaseCommand):
         created_count = 0
         updated_count = 0
         skipped_count = 0
+        imported_ids = []
+        previous_rollup_keys = rollup_keys(
+            Reservation.objects.filter(beds24_book_id__in=[booking['beds24_book_id'] for booking in bookings])
+        )
 
         for booking in bookings:
             property_obj = room_map.get(booking.get('room_id')) or property_key_map.get(booking.get('property_key'))
@@ -88,11 +94,15 @@ class Command(BaseCommand):
                 beds24_book_id=booking['beds24_book_id'],
                 defaults=defaults,
             )
+            imported_ids.append(obj.id)
             if created:
                 created_count += 1
             else:
                 updated_count += 1
         
+        refresh_reservation_nights(imported_ids)
+        refresh_revenue_rollup(previous_rollup_keys | rollup_keys(imported_ids))
+
         self.stdout.write(self.style.SUCCESS("--- Import complete! ---"))
         self.stdout.write(f"New past bookings: {created_count}")
         self.stdout.write(f"Updated past bookings: {updated_count}")
@@ -0,0 +1,27 @@
+# reservations/management/commands/push_prices_to_beds24.py
+from django.core.management.base import BaseCommand
+
+from reservations.models_pricing import PricePush
+from reservations.services_price_push import flush_price_pushes
+
+
+class Command(BaseCommand):
+    help = 'ローカルで編集した料金の送信キューを Beds24 へまとめて送信（cron で定期実行する想定）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property-id', type=int, help='対象施設ID（未指定なら全施設）')
+        parser.add_argument('--retry-failed', action='store_true', help='再送待ち・打ち切り済みの日付もすぐに送信する')
+
+    def handle(self, *args, **options):
+        property_ids = [options['property_id']] if options.get('property_id') else None
+        result = flush_price_pushes(property_ids, retry_failed=options['retry_failed'])
+
+        remaining = PricePush.objects.count()
+        message = (
+            f"Done. {result['dates']} dates pushed in {result['calls']} calls, "
+            f"{result['failed']} failed, {remaining} still queued"
+        )
+        if result['failed']:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,23 @@
+# reservations/management/commands/rebuild_effective_rates.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from reservations.services_effective_rates import DEFAULT_HORIZON_DAYS, rebuild_effective_rates
+
+
+class Command(BaseCommand):
+    help = 'DailyRate / PricingRule / 繰り返しルール / 施設設定から実効料金（EffectiveRate）を再構築'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property-id', type=int, help='対象施設ID（未指定なら全施設）')
+        parser.add_argument('--start', type=str, help='開始日 YYYY-MM-DD（未指定なら今日）')
+        parser.add_argument('--end', type=str, help=f'終了日 YYYY-MM-DD（未指定なら開始日から{DEFAULT_HORIZON_DAYS}日後）')
+
+    def handle(self, *args, **options):
+        start = date.fromisoformat(options['start']) if options.get('start') else date.today()
+        end = date.fromisoformat(options['end']) if options.get('end') else start + timedelta(days=DEFAULT_HORIZON_DAYS)
+        property_ids = [options['property_id']] if options.get('property_id') else None
+
+        written = rebuild_effective_rates(start, end, property_ids)
+        self.stdout.write(self.style.SUCCESS(f"Done. {written} effective rates rebuilt ({start} - {end})"))
@@ -0,0 +1,15 @@
+# reservations/management/commands/rebuild_occupancy_index.py
+from django.core.management.base import BaseCommand
+
+from reservations.services_occupancy import rebuild_reservation_nights
+
+
+class Command(BaseCommand):
+    help = '予約データから宿泊日インデックス（ReservationNight）を再構築'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property-id', type=int, help='対象施設ID（未指定なら全施設）')
+
+    def handle(self, *args, **options):
+        created = rebuild_reservation_nights(options.get('property_id'))
+        self.stdout.write(self.style.SUCCESS(f"Done. {created} reservation nights indexed"))
@@ -0,0 +1,41 @@
+# reservations/management/commands/rebuild_rate_ranges.py
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from guest_forms.models import Property
+from reservations.models_pricing import DailyRate, RateRange
+from reservations.services_rate_ranges import rebuild_rate_ranges
+
+
+class Command(BaseCommand):
+    help = 'DailyRateから期間料金（RateRange）を再構築'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property-id', type=int, help='対象施設ID（未指定なら全施設）')
+        parser.add_argument('--start', type=str, help='開始日 YYYY-MM-DD（未指定ならDailyRateの最初の日）')
+        parser.add_argument('--end', type=str, help='終了日 YYYY-MM-DD（未指定ならDailyRateの最後の日）')
+
+    def handle(self, *args, **options):
+        properties = Property.objects.all()
+        if options.get('property_id'):
+            properties = properties.filter(id=options['property_id'])
+
+        total_days = 0
+        total_ranges = 0
+        for prop in properties:
+            bounds = DailyRate.objects.filter(property=prop).aggregate(first=Min('date'), last=Max('date'))
+            start = date.fromisoformat(options['start']) if options.get('start') else bounds['first']
+            end = date.fromisoformat(options['end']) if options.get('end') else bounds['last']
+            if start is None or end is None:
+                continue
+
+            days = DailyRate.objects.filter(property=prop, date__range=(start, end)).count()
+            rebuild_rate_ranges(prop, start, end)
+            ranges = RateRange.objects.filter(property=prop, start_date__lte=end, end_date__gte=start).count()
+            total_days += days
+            total_ranges += ranges
+            self.stdout.write(f"{prop.name}: {days} days -> {ranges} ranges")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total_days} daily rates -> {total_ranges} ranges"))
@@ -0,0 +1,12 @@
+# reservations/management/commands/rebuild_revenue_rollup.py
+from django.core.management.base import BaseCommand
+
+from reservations.services_revenue import rebuild_revenue_rollup
+
+
+class Command(BaseCommand):
+    help = '全予約から月別売上集計（MonthlyRevenueRollup）を再構築'
+
+    def handle(self, *args, **options):
+        rows = rebuild_revenue_rollup()
+        self.stdout.write(self.style.SUCCESS(f"Done. {rows} monthly revenue rows rebuilt"))
@@ -0,0 +1,24 @@
+# reservations/management/commands/snapshot_booking_pace.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.services_pace import take_pace_snapshot
+
+
+class Command(BaseCommand):
+    help = '施設×宿泊月ごとの予約済み泊数・売上のスナップショット（BookingPaceSnapshot）を作成（1日1回実行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='集計日（YYYY-MM-DD、既定は今日）')
+
+    def handle(self, *args, **options):
+        snapshot_date = None
+        if options['date']:
+            try:
+                snapshot_date = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date は YYYY-MM-DD で指定してください')
+
+        rows = take_pace_snapshot(snapshot_date)
+        self.stdout.write(self.style.SUCCESS(f"Done. {rows} booking pace rows saved"))
@@ -35,7 +35,8 @@ class Command(BaseCommand):
                 else:
                     self.stdout.write(
                         self.style.SUCCESS(
-                            f"✓ {property_name}: Created {result['created']}, Updated {result['updated']}"
+                            f"✓ {property_name}: Created {result['created']}, Updated {result['updated']}, "
+                            f"Unchanged {result['unchanged']}"
                         )
                     )
             
@@ -1,3 +1,5 @@
+import uuid
+
 from django.core.management.base import BaseCommand
 from datetime import date, timedelta
 from guest_forms.models import Property
@@ -41,6 +43,9 @@ class Command(BaseCommand):
             return
 
         total_saved = 0
+        total_unchanged = 0
+        # 生データアーカイブを同じ実行IDでまとめる
+        sync_run = uuid.uuid4()
         for prop in qs:
             try:
                 api_type = 'CSV' if options.get('use_csv') else 'JSON'
@@ -50,13 +55,16 @@ class Command(BaseCommand):
                     setattr(prop, 'room_id', options['room_id'])
                 
                 if options.get('use_csv'):
-                    result = sync_daily_rates_from_beds24_csv(prop, start, end)
+                    result = sync_daily_rates_from_beds24_csv(prop, start, end, sync_run=sync_run)
                 else:
-                    result = sync_daily_rates_from_beds24(prop, start, end)
+                    result = sync_daily_rates_from_beds24(prop, start, end, sync_run=sync_run)
                 
-                total_saved += result['count']
-                self.stdout.write(self.style.SUCCESS(f"  saved: {result['count']}"))
+                total_saved += result['created'] + result['updated']
+                total_unchanged += result['unchanged']
+                self.stdout.write(self.style.SUCCESS(
+                    f"  created: {result['created']}, updated: {result['updated']}, unchanged: {result['unchanged']}"
+                ))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  failed: {e}"))
 
-        self.stdout.write(self.style.SUCCESS(f"Done. total saved: {total_saved}"))
+        self.stdout.write(self.style.SUCCESS(f"Done. total saved: {total_saved}, unchanged: {total_unchanged}"))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:45
+
+import django.db.models.deletion
+import gzip
+import json
+import uuid
+from django.db import migrations, models
+
+
+def move_beds24_data_to_archive(apps, schema_editor):
+    """既存の DailyRate.beds24_data を施設ごとに1件のアーカイブへ移す"""
+    DailyRate = apps.get_model('reservations', 'DailyRate')
+    DailyRateRawArchive = apps.get_model('reservations', 'DailyRateRawArchive')
+
+    sync_run = uuid.uuid4()
+    rows_by_property = {}
+    qs = DailyRate.objects.exclude(beds24_data__isnull=True).values_list('property_id', 'date', 'beds24_data')
+    for property_id, rate_date, raw in qs.iterator():
+        rows_by_property.setdefault(property_id, {})[rate_date.isoformat()] = raw
+
+    for property_id, rows in rows_by_property.items():
+        DailyRateRawArchive.objects.create(
+            sync_run=sync_run,
+            property_id=property_id,
+            source='legacy',
+            start_date=min(rows),
+            end_date=max(rows),
+            row_count=len(rows),
+            payload=gzip.compress(json.dumps(rows, ensure_ascii=False, default=str).encode('utf-8')),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0011_property_google_sheets_id'),
+        ('reservations', '0003_dailyrate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRateRawArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sync_run', models.UUIDField(db_index=True, default=uuid.uuid4, verbose_name='同期実行ID')),
+                ('source', models.CharField(choices=[('json', 'getDailyPriceSetup (JSON)'), ('csv', 'getroomdailycsv (CSV)'), ('rates_csv', 'getratescsv (CSV)'), ('legacy', 'DailyRate.beds24_data からの移行')], max_length=20, verbose_name='取得元')),
+                ('start_date', models.DateField(verbose_name='対象開始日')),
+                ('end_date', models.DateField(verbose_name='対象終了日')),
+                ('row_count', models.IntegerField(default=0, verbose_name='行数')),
+                ('payload', models.BinaryField(verbose_name='生データ（gzip圧縮JSON）')),
+                ('fetched_at', models.DateTimeField(auto_now_add=True, verbose_name='取得日時')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rate_archives', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': '日別料金生データ',
+                'verbose_name_plural': '日別料金生データ',
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['property', 'start_date', 'end_date'], name='reservation_propert_772970_idx')],
+            },
+        ),
+        migrations.RunPython(move_beds24_data_to_archive, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='dailyrate',
+            name='beds24_data',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0011_property_google_sheets_id'),
+        ('reservations', '0004_dailyrate_raw_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='開始日')),
+                ('end_date', models.DateField(verbose_name='終了日')),
+                ('base_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='基本料金')),
+                ('min_stay', models.IntegerField(default=1, verbose_name='最小宿泊数')),
+                ('available', models.BooleanField(default=True, verbose_name='予約可能')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_ranges', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': '期間料金',
+                'verbose_name_plural': '期間料金',
+                'ordering': ['property', 'start_date'],
+                'indexes': [models.Index(fields=['property', 'start_date'], name='reservation_propert_2fd0c9_idx'), models.Index(fields=['property', 'end_date'], name='reservation_propert_6837c8_idx')],
+            },
+        ),
+    ]
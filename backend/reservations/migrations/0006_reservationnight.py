@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:48
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def populate_reservation_nights(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    ReservationNight = apps.get_model('reservations', 'ReservationNight')
+
+    nights = []
+    rows = Reservation.objects.exclude(status__in=['Cancelled', 'Declined']).values_list(
+        'id', 'property_id', 'check_in_date', 'check_out_date', 'status'
+    )
+    for res_id, property_id, check_in, last_night, status in rows.iterator():
+        if last_night is None or last_night < check_in:
+            last_night = check_in
+        for i in range((last_night - check_in).days + 1):
+            nights.append(ReservationNight(
+                reservation_id=res_id, property_id=property_id, date=check_in + timedelta(days=i), status=status,
+            ))
+    ReservationNight.objects.bulk_create(nights, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0011_property_google_sheets_id'),
+        ('reservations', '0005_raterange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='宿泊日')),
+                ('status', models.CharField(blank=True, max_length=50, null=True, verbose_name='予約ステータス')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservation_nights', to='guest_forms.property', verbose_name='施設')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='reservations.reservation', verbose_name='予約')),
+            ],
+            options={
+                'verbose_name': '宿泊日',
+                'verbose_name_plural': '宿泊日',
+                'indexes': [models.Index(fields=['property', 'date'], name='reservation_propert_182a8b_idx'), models.Index(fields=['date'], name='reservation_date_5e2535_idx')],
+                'unique_together': {('reservation', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_reservation_nights, migrations.RunPython.noop),
+    ]
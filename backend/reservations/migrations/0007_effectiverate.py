@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0013_recurringpricingrule'),
+        ('reservations', '0006_reservationnight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectiveRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='料金（¥/泊）')),
+                ('min_nights', models.IntegerField(help_text='この日にチェックインする場合の最小宿泊数', verbose_name='最小宿泊日数')),
+                ('available', models.BooleanField(default=True, help_text='ブラックアウトでなく、Beds24でも予約可能', verbose_name='予約可能')),
+                ('is_blackout', models.BooleanField(default=False, verbose_name='ブラックアウト')),
+                ('blackout_reason', models.CharField(blank=True, max_length=255, verbose_name='ブラックアウト理由')),
+                ('price_source', models.CharField(choices=[('rule', '日別ルール'), ('recurring', '繰り返しルール'), ('daily', 'Beds24日別料金'), ('base', '施設の基本料金')], max_length=20, verbose_name='料金の取得元')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_rates', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': '実効料金',
+                'verbose_name_plural': '実効料金',
+                'ordering': ['property', 'date'],
+                'indexes': [models.Index(fields=['date', 'available'], name='reservation_date_55e788_idx')],
+                'unique_together': {('property', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0013_recurringpricingrule'),
+        ('reservations', '0007_effectiverate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricePush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('enqueued_at', models.DateTimeField(help_text='最後に変更された日時', verbose_name='登録日時')),
+                ('attempts', models.IntegerField(default=0, verbose_name='送信試行回数')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='次回送信日時')),
+                ('last_error', models.TextField(blank=True, verbose_name='最後のエラー')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_pushes', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': 'Beds24料金送信キュー',
+                'verbose_name_plural': 'Beds24料金送信キュー',
+                'ordering': ['property', 'date'],
+                'indexes': [models.Index(fields=['next_attempt_at'], name='reservation_next_at_eae248_idx')],
+                'unique_together': {('property', 'date')},
+            },
+        ),
+    ]
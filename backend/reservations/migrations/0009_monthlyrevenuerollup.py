@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:59
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+def populate_revenue_rollup(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    MonthlyRevenueRollup = apps.get_model('reservations', 'MonthlyRevenueRollup')
+
+    aggregated = (
+        Reservation.objects
+        .annotate(month=TruncMonth('check_in_date'), status_key=Coalesce('status', Value('')))
+        .values('property_id', 'month', 'status_key')
+        .annotate(
+            revenue=Coalesce(Sum('total_price'), Decimal('0')),
+            booking_count=Count('id'),
+            guest_count=Coalesce(Sum('num_guests'), 0),
+        )
+        .order_by()
+    )
+    MonthlyRevenueRollup.objects.bulk_create([
+        MonthlyRevenueRollup(
+            property_id=row['property_id'],
+            month=row['month'],
+            fiscal_year=row['month'].year if row['month'].month >= 3 else row['month'].year - 1,
+            fiscal_month=(row['month'].month - 3) % 12 + 1,
+            status=row['status_key'],
+            revenue=row['revenue'],
+            booking_count=row['booking_count'],
+            guest_count=row['guest_count'],
+        )
+        for row in aggregated
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0013_recurringpricingrule'),
+        ('reservations', '0008_pricepush'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='チェックイン月の初日', verbose_name='月')),
+                ('fiscal_year', models.IntegerField(verbose_name='会計年度')),
+                ('fiscal_month', models.IntegerField(help_text='3月=1 〜 2月=12', verbose_name='会計月')),
+                ('status', models.CharField(blank=True, max_length=50, verbose_name='予約ステータス')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='売上')),
+                ('booking_count', models.IntegerField(default=0, verbose_name='予約件数')),
+                ('guest_count', models.IntegerField(default=0, verbose_name='宿泊者数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': '月別売上集計',
+                'verbose_name_plural': '月別売上集計',
+                'ordering': ['month', 'property'],
+                'indexes': [models.Index(fields=['fiscal_year', 'fiscal_month'], name='reservation_fiscal__2ffba0_idx')],
+                'unique_together': {('property', 'month', 'status')},
+            },
+        ),
+        migrations.RunPython(populate_revenue_rollup, migrations.RunPython.noop),
+    ]
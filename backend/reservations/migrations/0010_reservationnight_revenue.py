@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:02
+
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import migrations, models
+
+
+def allocate_night_revenue(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    ReservationNight = apps.get_model('reservations', 'ReservationNight')
+
+    totals = dict(Reservation.objects.filter(nights__isnull=False).distinct().values_list('id', 'total_price'))
+    nights_by_reservation = {}
+    for night in ReservationNight.objects.order_by('reservation_id', 'date').iterator(chunk_size=2000):
+        nights_by_reservation.setdefault(night.reservation_id, []).append(night)
+
+    updated = []
+    for reservation_id, nights in nights_by_reservation.items():
+        total = Decimal(totals.get(reservation_id) or 0)
+        per_night = (total / len(nights)).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+        for night in nights:
+            night.revenue = per_night
+        nights[-1].revenue = total - per_night * (len(nights) - 1)
+        updated.extend(nights)
+    ReservationNight.objects.bulk_update(updated, ['revenue'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0009_monthlyrevenuerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservationnight',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='予約の合計料金を宿泊日数で按分した額（端数は最終泊に加算）', max_digits=10, verbose_name='売上（按分）'),
+        ),
+        migrations.RunPython(allocate_night_revenue, migrations.RunPython.noop),
+    ]
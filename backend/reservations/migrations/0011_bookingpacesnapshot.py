@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0014_guestsubmission_nationality'),
+        ('reservations', '0010_reservationnight_revenue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingPaceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(verbose_name='集計日')),
+                ('stay_month', models.DateField(help_text='宿泊月の初日', verbose_name='宿泊月')),
+                ('nights', models.IntegerField(default=0, verbose_name='予約済み泊数')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='予約済み売上')),
+                ('booking_count', models.IntegerField(default=0, verbose_name='予約件数')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pace_snapshots', to='guest_forms.property', verbose_name='施設')),
+            ],
+            options={
+                'verbose_name': '予約ペース',
+                'verbose_name_plural': '予約ペース',
+                'ordering': ['stay_month', 'snapshot_date', 'property'],
+                'indexes': [models.Index(fields=['stay_month', 'snapshot_date'], name='reservation_stay_mo_5bf82d_idx')],
+                'unique_together': {('property', 'snapshot_date', 'stay_month')},
+            },
+        ),
+    ]
@@ -0,0 +1,153 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:22
+
+from datetime import date, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# 以下はこのマイグレーションを作成した時点の祝日・ディメンションの計算を固定したもの。
+# reservations.jp_holidays / services_calendar を後から変更しても、このマイグレーションが
+# 作る行は変わらない（作り直しは build_date_dimension コマンドで行う）。
+FISCAL_YEARS = range(2015, 2036)
+
+SPECIAL_HOLIDAYS = {
+    2019: {date(2019, 5, 1): '天皇の即位の日', date(2019, 10, 22): '即位礼正殿の儀の行われる日'},
+    2020: {date(2020, 7, 23): '海の日', date(2020, 7, 24): 'スポーツの日', date(2020, 8, 10): '山の日'},
+    2021: {date(2021, 7, 22): '海の日', date(2021, 7, 23): 'スポーツの日', date(2021, 8, 8): '山の日'},
+}
+
+SEASONS = {
+    3: 'spring', 4: 'spring', 5: 'spring', 6: 'summer', 7: 'summer', 8: 'summer',
+    9: 'autumn', 10: 'autumn', 11: 'autumn', 12: 'winter', 1: 'winter', 2: 'winter',
+}
+
+
+def nth_monday(year, month, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(7 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def equinox_day(year, base):
+    return int(base + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+def holidays_of_year(year):
+    holidays = {
+        date(year, 1, 1): '元日',
+        nth_monday(year, 1, 2): '成人の日',
+        date(year, 2, 11): '建国記念の日',
+        date(year, 3, equinox_day(year, 20.8431)): '春分の日',
+        date(year, 4, 29): '昭和の日',
+        date(year, 5, 3): '憲法記念日',
+        date(year, 5, 4): 'みどりの日',
+        date(year, 5, 5): 'こどもの日',
+        nth_monday(year, 9, 3): '敬老の日',
+        date(year, 9, equinox_day(year, 23.2488)): '秋分の日',
+        date(year, 11, 3): '文化の日',
+        date(year, 11, 23): '勤労感謝の日',
+    }
+    if year >= 2020:
+        holidays[date(year, 2, 23)] = '天皇誕生日'
+    elif year <= 2018:
+        holidays[date(year, 12, 23)] = '天皇誕生日'
+    if year not in (2020, 2021):
+        holidays[nth_monday(year, 7, 3)] = '海の日'
+        holidays[nth_monday(year, 10, 2)] = 'スポーツの日' if year >= 2020 else '体育の日'
+        if year >= 2016:
+            holidays[date(year, 8, 11)] = '山の日'
+    holidays.update(SPECIAL_HOLIDAYS.get(year, {}))
+
+    for day in sorted(holidays):
+        rest_day = day + timedelta(days=1)
+        if day + timedelta(days=2) in holidays and rest_day not in holidays and rest_day.weekday() != 6:
+            holidays[rest_day] = '国民の休日'
+    for day in sorted(holidays):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in holidays:
+                substitute += timedelta(days=1)
+            holidays[substitute] = '振替休日'
+    return holidays
+
+
+def build_default_dimension(apps, schema_editor):
+    DateDimension = apps.get_model('reservations', 'DateDimension')
+    holidays = {}
+    for year in range(FISCAL_YEARS[0], FISCAL_YEARS[-1] + 2):
+        holidays.update(holidays_of_year(year))
+
+    rows = []
+    day = date(FISCAL_YEARS[0], 3, 1)
+    end = date(FISCAL_YEARS[-1] + 1, 3, 1)
+    while day < end:
+        month_start = day.replace(day=1)
+        iso_year, iso_week, _ = day.isocalendar()
+        name = holidays.get(day, '')
+        rows.append(DateDimension(
+            date=day,
+            month_start=month_start,
+            month_end=(month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1),
+            fiscal_year=day.year if day.month >= 3 else day.year - 1,
+            fiscal_month=(day.month - 3) % 12 + 1,
+            iso_year=iso_year,
+            iso_week=iso_week,
+            week_start=day - timedelta(days=day.weekday()),
+            weekday=day.weekday(),
+            is_weekend=day.weekday() >= 5,
+            is_holiday=bool(name),
+            holiday_name=name,
+            season=SEASONS[day.month],
+        ))
+        day += timedelta(days=1)
+    DateDimension.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0011_bookingpacesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DateDimension',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False, verbose_name='日付')),
+                ('month_start', models.DateField(db_index=True, verbose_name='月初日')),
+                ('month_end', models.DateField(verbose_name='月末日')),
+                ('fiscal_year', models.IntegerField(verbose_name='会計年度')),
+                ('fiscal_month', models.IntegerField(help_text='3月=1 〜 2月=12', verbose_name='会計月')),
+                ('iso_year', models.IntegerField(verbose_name='ISO年')),
+                ('iso_week', models.IntegerField(verbose_name='ISO週番号')),
+                ('week_start', models.DateField(help_text='月曜日', verbose_name='週の初日')),
+                ('weekday', models.IntegerField(help_text='月曜=0 〜 日曜=6', verbose_name='曜日')),
+                ('is_weekend', models.BooleanField(default=False, verbose_name='土日')),
+                ('is_holiday', models.BooleanField(default=False, verbose_name='祝日')),
+                ('holiday_name', models.CharField(blank=True, max_length=50, verbose_name='祝日名')),
+                ('season', models.CharField(choices=[('spring', '春'), ('summer', '夏'), ('autumn', '秋'), ('winter', '冬')], max_length=10, verbose_name='季節')),
+            ],
+            options={
+                'verbose_name': '日付ディメンション',
+                'verbose_name_plural': '日付ディメンション',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['fiscal_year', 'fiscal_month'], name='reservation_fiscal__c06f6d_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='monthlyrevenuerollup',
+            name='month_dimension',
+            field=models.ForeignObject(editable=False, from_fields=['month'], null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='revenue_rollups', serialize=False, to='reservations.datedimension', to_fields=['date']),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='check_in_dimension',
+            field=models.ForeignObject(editable=False, from_fields=['check_in_date'], null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='check_in_reservations', serialize=False, to='reservations.datedimension', to_fields=['date']),
+        ),
+        migrations.AddField(
+            model_name='reservationnight',
+            name='date_dimension',
+            field=models.ForeignObject(editable=False, from_fields=['date'], null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='reservation_nights', serialize=False, to='reservations.datedimension', to_fields=['date']),
+        ),
+        migrations.RunPython(build_default_dimension, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guest_forms', '0014_guestsubmission_nationality'),
+        ('reservations', '0012_datedimension'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'check_in_date', 'id'], name='reservation_status_9eaa49_idx'),
+        ),
+    ]
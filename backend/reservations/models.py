@@ -32,15 +32,118 @@ class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
 
+    # 日付ディメンションとの結合用（列は追加しない）
+    check_in_dimension = models.ForeignObject(
+        'DateDimension', on_delete=models.DO_NOTHING, from_fields=['check_in_date'], to_fields=['date'],
+        related_name='check_in_reservations', null=True, editable=False, serialize=False,
+    )
+
     class Meta:
         verbose_name = "予約"
         verbose_name_plural = "予約"
         ordering = ['-check_in_date']
+        indexes = [
+            # 名簿提出状況一覧のキーセットページ分割用
+            models.Index(fields=['status', 'check_in_date', 'id']),
+        ]
 
 
     def __str__(self):
         return f"{self.property.name} - {self.check_in_date} (Beds24 ID: {self.beds24_book_id})"
 
+class ReservationNight(models.Model):
+    """
+    予約の宿泊日ごとの占有インデックス。
+    施設×日付で空室検索できるよう、予約の各宿泊日を1行として保持する。
+    宿泊日ごとの按分売上も持ち、月をまたぐ滞在の売上を宿泊日の月に計上できる。
+    services_occupancy により予約同期・キャンセル時に更新される。
+    """
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='nights', verbose_name="予約")
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='reservation_nights', verbose_name="施設")
+    date = models.DateField(verbose_name="宿泊日")
+    status = models.CharField(max_length=50, null=True, blank=True, verbose_name="予約ステータス")
+    revenue = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name="売上（按分）",
+        help_text="予約の合計料金を宿泊日数で按分した額（端数は最終泊に加算）"
+    )
+    # 日付ディメンションとの結合用（列は追加しない）
+    date_dimension = models.ForeignObject(
+        'DateDimension', on_delete=models.DO_NOTHING, from_fields=['date'], to_fields=['date'],
+        related_name='reservation_nights', null=True, editable=False, serialize=False,
+    )
+
+    class Meta:
+        verbose_name = "宿泊日"
+        verbose_name_plural = "宿泊日"
+        unique_together = [['reservation', 'date']]
+        indexes = [
+            models.Index(fields=['property', 'date']),
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} - {self.date} (reservation {self.reservation_id})"
+
+class MonthlyRevenueRollup(models.Model):
+    """
+    施設×月（チェックイン月）×予約ステータスごとの売上集計。
+    売上レポートは予約を毎回集計せずこのテーブルを読む。
+    予約の同期・取り込み時に services_revenue で影響のある (施設, 月) だけ再集計する。
+    会計年度は3月〜翌年2月で、fiscal_month は 3月=1 〜 2月=12。
+    """
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='revenue_rollups', verbose_name="施設")
+    month = models.DateField(verbose_name="月", help_text="チェックイン月の初日")
+    fiscal_year = models.IntegerField(verbose_name="会計年度")
+    fiscal_month = models.IntegerField(verbose_name="会計月", help_text="3月=1 〜 2月=12")
+    status = models.CharField(max_length=50, blank=True, verbose_name="予約ステータス")
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="売上")
+    booking_count = models.IntegerField(default=0, verbose_name="予約件数")
+    guest_count = models.IntegerField(default=0, verbose_name="宿泊者数")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
+    # 日付ディメンションとの結合用（列は追加しない）
+    month_dimension = models.ForeignObject(
+        'DateDimension', on_delete=models.DO_NOTHING, from_fields=['month'], to_fields=['date'],
+        related_name='revenue_rollups', null=True, editable=False, serialize=False,
+    )
+
+    class Meta:
+        verbose_name = "月別売上集計"
+        verbose_name_plural = "月別売上集計"
+        unique_together = [['property', 'month', 'status']]
+        ordering = ['month', 'property']
+        indexes = [
+            models.Index(fields=['fiscal_year', 'fiscal_month']),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} - {self.month:%Y-%m} {self.status}: ¥{self.revenue}"
+
+class BookingPaceSnapshot(models.Model):
+    """
+    予約ペース（オンザブック）のスナップショット。
+    毎日の集計時点で、施設×宿泊月ごとに予約済みの泊数・売上（宿泊日ごとの按分売上）を記録する。
+    予約は同期で上書きされるため、「前年の同じ時点と比べてどれだけ先行しているか」はこのテーブルで比較する。
+    services_pace.take_pace_snapshot() で1日1回作成する（同じ日に再実行すると置き換える）。
+    """
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='pace_snapshots', verbose_name="施設")
+    snapshot_date = models.DateField(verbose_name="集計日")
+    stay_month = models.DateField(verbose_name="宿泊月", help_text="宿泊月の初日")
+    nights = models.IntegerField(default=0, verbose_name="予約済み泊数")
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="予約済み売上")
+    booking_count = models.IntegerField(default=0, verbose_name="予約件数")
+
+    class Meta:
+        verbose_name = "予約ペース"
+        verbose_name_plural = "予約ペース"
+        unique_together = [['property', 'snapshot_date', 'stay_month']]
+        ordering = ['stay_month', 'snapshot_date', 'property']
+        indexes = [
+            models.Index(fields=['stay_month', 'snapshot_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} - {self.stay_month:%Y-%m} as of {self.snapshot_date}: {self.nights} nights"
+
 class SyncStatus(models.Model):
     """
     Beds24との最終同期時刻を記録する。
@@ -151,6 +254,7 @@ class AccommodationTax(models.Model):
 
 
 # Import DailyRate model
-from .models_pricing import DailyRate
+from .models_pricing import DailyRate, DailyRateRawArchive, EffectiveRate, PricePush, RateRange
+from .models_calendar import DateDimension
 
-__all__ = ['Reservation', 'SyncStatus', 'AccommodationTax', 'DailyRate']
\ No newline at end of file
+__all__ = ['Reservation', 'ReservationNight', 'MonthlyRevenueRollup', 'BookingPaceSnapshot', 'SyncStatus', 'AccommodationTax', 'DailyRate', 'DailyRateRawArchive', 'EffectiveRate', 'PricePush', 'RateRange', 'DateDimension']
\ No newline at end of file
@@ -0,0 +1,41 @@
+# reservations/models_calendar.py
+from django.db import models
+
+
+class DateDimension(models.Model):
+    """
+    分析用の日付ディメンション（1日1行）。
+    会計年度（3月〜翌年2月）・会計月・週・曜日・祝日・季節をあらかじめ持ち、
+    売上などの集計はこのテーブルを起点に結合することで、データのない月も SQL から0で返す。
+    マイグレーション（既定の範囲）と build_date_dimension コマンドで作成する。
+    """
+    class Season(models.TextChoices):
+        SPRING = 'spring', '春'
+        SUMMER = 'summer', '夏'
+        AUTUMN = 'autumn', '秋'
+        WINTER = 'winter', '冬'
+
+    date = models.DateField(primary_key=True, verbose_name="日付")
+    month_start = models.DateField(db_index=True, verbose_name="月初日")
+    month_end = models.DateField(verbose_name="月末日")
+    fiscal_year = models.IntegerField(verbose_name="会計年度")
+    fiscal_month = models.IntegerField(verbose_name="会計月", help_text="3月=1 〜 2月=12")
+    iso_year = models.IntegerField(verbose_name="ISO年")
+    iso_week = models.IntegerField(verbose_name="ISO週番号")
+    week_start = models.DateField(verbose_name="週の初日", help_text="月曜日")
+    weekday = models.IntegerField(verbose_name="曜日", help_text="月曜=0 〜 日曜=6")
+    is_weekend = models.BooleanField(default=False, verbose_name="土日")
+    is_holiday = models.BooleanField(default=False, verbose_name="祝日")
+    holiday_name = models.CharField(max_length=50, blank=True, verbose_name="祝日名")
+    season = models.CharField(max_length=10, choices=Season.choices, verbose_name="季節")
+
+    class Meta:
+        verbose_name = "日付ディメンション"
+        verbose_name_plural = "日付ディメンション"
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['fiscal_year', 'fiscal_month']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} (FY{self.fiscal_year}-{self.fiscal_month:02d})"
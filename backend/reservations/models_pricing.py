@@ -1,4 +1,8 @@
 # reservations/models_pricing.py
+import gzip
+import json
+import uuid
+
 from django.db import models
 from guest_forms.models import Property
 
@@ -38,14 +42,6 @@ class DailyRate(models.Model):
         help_text="この日からの最小宿泊数"
     )
     
-    # Beds24生データ（デバッグ用）
-    beds24_data = models.JSONField(
-        null=True,
-        blank=True,
-        verbose_name="Beds24生データ",
-        help_text="Beds24 APIから取得した元データ"
-    )
-    
     # タイムスタンプ
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="作成日時")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
@@ -62,3 +58,161 @@ class DailyRate(models.Model):
 
     def __str__(self):
         return f"{self.property.name} - {self.date}: ¥{self.base_price or 0}"
+
+
+class RateRange(models.Model):
+    """
+    日別料金をランレングス圧縮した期間単位の料金。
+    同じ料金・最小宿泊数・空室状況が続く日付を1行にまとめる（start_date〜end_dateは両端を含む）。
+    DailyRateの変更時に services_rate_ranges で該当期間を再構築する（signals / 一括取り込み）。
+    """
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='rate_ranges',
+        verbose_name="施設"
+    )
+    start_date = models.DateField(verbose_name="開始日")
+    end_date = models.DateField(verbose_name="終了日")
+    base_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="基本料金"
+    )
+    min_stay = models.IntegerField(default=1, verbose_name="最小宿泊数")
+    available = models.BooleanField(default=True, verbose_name="予約可能")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
+
+    class Meta:
+        verbose_name = "期間料金"
+        verbose_name_plural = "期間料金"
+        ordering = ['property', 'start_date']
+        indexes = [
+            models.Index(fields=['property', 'start_date']),
+            models.Index(fields=['property', 'end_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.property.name} {self.start_date}〜{self.end_date}: ¥{self.base_price or 0}"
+
+class EffectiveRate(models.Model):
+    """
+    施設・日付ごとに確定した実効料金。
+    PricingRule → RecurringPricingRule → DailyRate → Property の優先順で解決した結果を保持し、
+    今日から1年分（services_effective_rates.stored_window()）だけを保存し、
+    各データの変更時に services_effective_rates で該当日付だけ更新する。
+    カレンダー・見積もり・空室検索はこのテーブルの範囲読み込みで料金を得る（期間外は読み込み時に計算）。
+    """
+    class Source(models.TextChoices):
+        RULE = 'rule', '日別ルール'
+        RECURRING = 'recurring', '繰り返しルール'
+        DAILY = 'daily', 'Beds24日別料金'
+        BASE = 'base', '施設の基本料金'
+
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='effective_rates',
+        verbose_name="施設"
+    )
+    date = models.DateField(verbose_name="日付")
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="料金（¥/泊）")
+    min_nights = models.IntegerField(verbose_name="最小宿泊日数", help_text="この日にチェックインする場合の最小宿泊数")
+    available = models.BooleanField(default=True, verbose_name="予約可能", help_text="ブラックアウトでなく、Beds24でも予約可能")
+    is_blackout = models.BooleanField(default=False, verbose_name="ブラックアウト")
+    blackout_reason = models.CharField(max_length=255, blank=True, verbose_name="ブラックアウト理由")
+    price_source = models.CharField(max_length=20, choices=Source.choices, verbose_name="料金の取得元")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新日時")
+
+    class Meta:
+        verbose_name = "実効料金"
+        verbose_name_plural = "実効料金"
+        unique_together = [['property', 'date']]
+        ordering = ['property', 'date']
+        indexes = [
+            models.Index(fields=['date', 'available']),
+        ]
+
+    def __str__(self):
+        return f"{self.property.name} - {self.date}: ¥{self.price}"
+
+
+class PricePush(models.Model):
+    """
+    Beds24へ送信待ちの料金変更（送信キュー）。
+    施設・日付ごとに1行だけ持ち、同じ日付の変更は enqueued_at を更新して1件にまとめる（後勝ち）。
+    送信時点の実効料金（EffectiveRate）を読み込んで送るため、キューには日付だけを記録する。
+    """
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='price_pushes',
+        verbose_name="施設"
+    )
+    date = models.DateField(verbose_name="日付")
+    enqueued_at = models.DateTimeField(verbose_name="登録日時", help_text="最後に変更された日時")
+    attempts = models.IntegerField(default=0, verbose_name="送信試行回数")
+    next_attempt_at = models.DateTimeField(verbose_name="次回送信日時")
+    last_error = models.TextField(blank=True, verbose_name="最後のエラー")
+
+    class Meta:
+        verbose_name = "Beds24料金送信キュー"
+        verbose_name_plural = "Beds24料金送信キュー"
+        unique_together = [['property', 'date']]
+        ordering = ['property', 'date']
+        indexes = [
+            models.Index(fields=['next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.property.name} - {self.date} (試行{self.attempts}回)"
+
+
+class DailyRateRawArchive(models.Model):
+    """
+    Beds24から取得した日別料金の生データを同期実行単位でまとめて保存するモデル。
+    DailyRateを細く保つため、生データはgzip圧縮したJSONとしてここに退避する。
+    payloadは {"YYYY-MM-DD": 元データ} 形式。
+    """
+    class Source(models.TextChoices):
+        JSON = 'json', 'getDailyPriceSetup (JSON)'
+        CSV = 'csv', 'getroomdailycsv (CSV)'
+        RATES_CSV = 'rates_csv', 'getratescsv (CSV)'
+        LEGACY = 'legacy', 'DailyRate.beds24_data からの移行'
+
+    sync_run = models.UUIDField(default=uuid.uuid4, db_index=True, verbose_name="同期実行ID")
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='daily_rate_archives',
+        verbose_name="施設"
+    )
+    source = models.CharField(max_length=20, choices=Source.choices, verbose_name="取得元")
+    start_date = models.DateField(verbose_name="対象開始日")
+    end_date = models.DateField(verbose_name="対象終了日")
+    row_count = models.IntegerField(default=0, verbose_name="行数")
+    payload = models.BinaryField(verbose_name="生データ（gzip圧縮JSON）")
+    fetched_at = models.DateTimeField(auto_now_add=True, verbose_name="取得日時")
+
+    class Meta:
+        verbose_name = "日別料金生データ"
+        verbose_name_plural = "日別料金生データ"
+        ordering = ['-fetched_at']
+        indexes = [
+            models.Index(fields=['property', 'start_date', 'end_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.property.name} {self.start_date}〜{self.end_date} ({self.get_source_display()})"
+
+    @staticmethod
+    def compress(rows_by_date):
+        return gzip.compress(
+            json.dumps(rows_by_date, ensure_ascii=False, default=str).encode('utf-8')
+        )
+
+    def load_rows(self):
+        """解凍した {"YYYY-MM-DD": 元データ} を返す"""
+        return json.loads(gzip.decompress(bytes(self.payload)).decode('utf-8'))
@@ -0,0 +1,108 @@
+# reservations/response_cache.py
+"""
+分析API（売上・国籍比率・名簿提出統計）のレスポンスキャッシュ。
+
+同じパラメータでの再集計を避けるため、GET のレスポンスデータをクエリパラメータと
+日付（年度の既定値が日付で変わるため）をキーにキャッシュする。予約の同期完了・
+予約や名簿提出の保存時に analytics_tag を更新して、まとめて無効化する（signals を参照）。
+ヒット・ミスの回数は view ごとに数え、analytics_cache_stats() で参照できる。
+"""
+from functools import wraps
+from typing import Callable, Dict
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import analytics_tag, bump_tags, make_key
+
+# レスポンスの保持時間（秒）。キャッシュは全プロセスで共有し（settings.CACHES）、
+# 同期・保存時にタグで無効化されるため、古いレスポンスが残る心配はない
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+_STATS_PREFIX = 'analytics-cache-stats'
+_STATS_NAMES_KEY = f'{_STATS_PREFIX}:names'
+
+
+def cache_analytics_response(name: str):
+    """
+    APIView の get() に付けるデコレータ。200 のレスポンスデータだけをキャッシュする。
+    name は統計とキャッシュキーの接頭辞に使う。
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            params = {key: request.query_params.getlist(key) for key in sorted(request.query_params)}
+            key = _response_key(name, {'params': params, 'kwargs': kwargs})
+            data = cache.get(key)
+            if data is not None:
+                _count(name, 'hits')
+                return Response(data, status=status.HTTP_200_OK)
+
+            _count(name, 'misses')
+            response = method(view, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, timeout=RESPONSE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_analytics_data(name: str, params: Dict, build: Callable[[], object]):
+    """
+    解決済みのパラメータをキーに build() の結果をキャッシュする（デコレータと同じタグ・統計を使う）。
+    クエリパラメータの表記ゆれに関わらず同じ結果を共有したい場合や、同期後の事前計算に使う。
+    """
+    key = _response_key(name, params)
+    data = cache.get(key)
+    if data is not None:
+        _count(name, 'hits')
+        return data
+
+    _count(name, 'misses')
+    data = build()
+    cache.set(key, data, timeout=RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_analytics_cache() -> None:
+    """分析APIのキャッシュをすべて無効化する。"""
+    bump_tags(analytics_tag())
+
+
+def _response_key(name: str, params: Dict) -> str:
+    return make_key(f'analytics-response:{name}', {**params, 'today': timezone.localdate()}, [analytics_tag()])
+
+
+def _count(name: str, outcome: str) -> None:
+    key = f'{_STATS_PREFIX}:{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        names = cache.get(_STATS_NAMES_KEY, set())
+        if name not in names:
+            cache.set(_STATS_NAMES_KEY, names | {name}, timeout=None)
+
+
+def analytics_cache_stats() -> Dict[str, Dict]:
+    """view ごとのヒット・ミス回数とヒット率を返す。"""
+    names = sorted(cache.get(_STATS_NAMES_KEY, set()))
+    counts = cache.get_many([f'{_STATS_PREFIX}:{name}:{outcome}' for name in names for outcome in ('hits', 'misses')])
+    stats = {}
+    for name in names:
+        hits = counts.get(f'{_STATS_PREFIX}:{name}:hits', 0)
+        misses = counts.get(f'{_STATS_PREFIX}:{name}:misses', 0)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_analytics_cache_stats() -> None:
+    names = cache.get(_STATS_NAMES_KEY, set())
+    cache.delete_many([f'{_STATS_PREFIX}:{name}:{outcome}' for name in names for outcome in ('hits', 'misses')])
+    cache.delete(_STATS_NAMES_KEY)
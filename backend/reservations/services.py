@@ -1,6 +1,7 @@
 import csv
 import html
 import io
+import logging
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Set
@@ -12,6 +13,10 @@ from django.utils import timezone
 from guest_forms.models import Property
 from guest_forms.google_sheets_service import google_sheets_service
 from .models import Reservation, SyncStatus
+from .response_cache import invalidate_analytics_cache
+from .services_dashboard import warm_dashboard_snapshot
+from .services_occupancy import refresh_reservation_nights
+from .services_revenue import refresh_revenue_rollup, rollup_keys
 
 
 class Beds24SyncError(Exception):
@@ -163,6 +168,11 @@ def sync_bookings_to_db(
     updated_count = 0
     missing_property_count = 0
     api_booking_ids = set()
+    touched_reservation_ids = set()
+    # 施設・チェックイン日が変わる予約は、変更前の月の売上集計も作り直す
+    previous_rollup_keys = rollup_keys(
+        Reservation.objects.filter(beds24_book_id__in=[booking['beds24_book_id'] for booking in bookings])
+    )
 
     for booking in bookings:
         api_booking_ids.add(booking['beds24_book_id'])
@@ -192,6 +202,7 @@ def sync_bookings_to_db(
             beds24_book_id=booking['beds24_book_id'],
             defaults=defaults,
         )
+        touched_reservation_ids.add(obj.id)
         if created:
             created_count += 1
             # 新規予約を Google Sheets に追加
@@ -212,7 +223,14 @@ def sync_bookings_to_db(
     cancelled_ids = db_booking_ids - api_booking_ids
 
     if cancelled_ids:
-        cancelled_count = db_reservations.filter(beds24_book_id__in=cancelled_ids).update(status='Cancelled')
+        cancelled_qs = db_reservations.filter(beds24_book_id__in=cancelled_ids)
+        touched_reservation_ids.update(cancelled_qs.values_list('id', flat=True))
+        cancelled_count = cancelled_qs.update(status='Cancelled')
+
+    # 宿泊日インデックスを更新（キャンセル分は削除される）
+    refresh_reservation_nights(touched_reservation_ids)
+    # 影響のあった (施設, 月) の売上集計を更新
+    refresh_revenue_rollup(previous_rollup_keys | rollup_keys(touched_reservation_ids))
 
     # Update last sync time
     sync_time = timezone.now()
@@ -220,6 +238,14 @@ def sync_bookings_to_db(
         pk=1,
         defaults={'last_sync_time': sync_time},
     )
+    # キャンセル分は QuerySet.update でシグナルが発火しないため、同期完了時にまとめて無効化する
+    invalidate_analytics_cache()
+    # ダッシュボードの初回表示が待たされないよう、既定の条件のスナップショットを共有キャッシュに
+    # 事前計算しておく。同期の結果はコミット済みのため、失敗しても同期は失敗させない
+    try:
+        warm_dashboard_snapshot()
+    except Exception:
+        logging.getLogger(__name__).exception("Failed to precompute the dashboard snapshot")
 
     return {
         'created': created_count,
@@ -0,0 +1,103 @@
+# reservations/services_analytics.py
+"""
+ダッシュボードの各分析（国籍比率・名簿提出統計・月別予約一覧）の集計。
+
+個別のAPIとダッシュボードのスナップショット（services_dashboard）で同じ集計を使う。
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+from django.db.models import Count, Q
+
+from guest_forms.countries import country_label
+from guest_forms.models import GuestSubmission
+from .models import Reservation
+from .services_calendar import fiscal_year_bounds
+
+# 名簿提出統計で数える名簿ステータス（pending / submitted / verified）
+ROSTER_STATUSES = Reservation.RosterStatus.values
+
+
+def nationality_ratio(fiscal_year: int, property_name: Optional[str] = None) -> List[Dict]:
+    """
+    会計年度にチェックインした予約の、提出済み名簿の国籍別件数を返す（1回のグループ集計）。
+    国コードを判別できなかった名簿は入力値ごとに数える（code は None）。
+
+    Returns:
+        [{'country': '日本', 'code': 'JP', 'count': 12}, ...]（件数の多い順）
+    """
+    start_date, end_date = fiscal_year_bounds(fiscal_year)
+    submissions = GuestSubmission.objects.filter(
+        reservation__check_in_date__range=(start_date, end_date),
+        status=GuestSubmission.SubmissionStatus.COMPLETED
+    )
+    if property_name:
+        submissions = submissions.filter(reservation__property__name=property_name)
+
+    nationality_counts = submissions.values('nationality', 'nationality_input').annotate(
+        count=Count('id'),
+    ).order_by('-count', 'nationality', 'nationality_input')
+    return [
+        {
+            "country": country_label(row['nationality'], row['nationality_input']),
+            "code": row['nationality'] or None,
+            "count": row['count'],
+        }
+        for row in nationality_counts
+    ]
+
+
+def roster_submission_stats(
+    property_name: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Dict[str, Dict]:
+    """
+    確定済み（Accepted）の予約について、施設ごとの名簿提出状況の件数と提出率を返す。
+    施設数によらず、名簿ステータスごとの条件付き集計を施設でグループ化した1クエリで数える。
+    予約のない施設は含めない。
+
+    start, end: チェックイン日で絞り込む（optional、両端を含む）
+
+    Returns:
+        {施設スラグ: {'property_id', 'property_name', 'total', 'pending', 'submitted', 'verified', 'completion_rate'}}
+    """
+    reservations = Reservation.objects.filter(status='Accepted')
+    if property_name:
+        reservations = reservations.filter(property__name=property_name)
+    if start:
+        reservations = reservations.filter(check_in_date__gte=start)
+    if end:
+        reservations = reservations.filter(check_in_date__lte=end)
+
+    rows = reservations.values('property_id', 'property__name', 'property__slug').annotate(
+        total=Count('id'),
+        **{
+            roster_status: Count('id', filter=Q(guest_roster_status=roster_status))
+            for roster_status in ROSTER_STATUSES
+        },
+    ).order_by('property_id')
+
+    return {
+        row['property__slug']: {
+            'property_id': row['property_id'],
+            'property_name': row['property__name'],
+            'total': row['total'],
+            **{roster_status: row[roster_status] for roster_status in ROSTER_STATUSES},
+            'completion_rate': round((row['verified'] + row['submitted']) / row['total'] * 100, 2),
+        }
+        for row in rows
+    }
+
+
+def monthly_reservations(year: int, month: int, property_name: Optional[str] = None):
+    """指定した年/月にチェックインする、キャンセル以外の予約（チェックイン日順）を返す。"""
+    queryset = Reservation.objects.filter(
+        check_in_date__year=year,
+        check_in_date__month=month
+    ).exclude(status='Cancelled').select_related('property', 'guestsubmission').order_by('check_in_date')
+
+    if property_name:
+        queryset = queryset.filter(property__name=property_name)
+    return queryset
+
@@ -0,0 +1,114 @@
+# reservations/services_calendar.py
+"""
+日付ディメンション（DateDimension）の作成と、ディメンションを起点にした月次集計。
+
+売上などの月次集計は、ディメンションの日付（月初日）に集計元を LEFT JOIN して
+月ごとにまとめるため、データのない月も SQL の結果に0として含まれる。
+ディメンションは既定で DEFAULT_FISCAL_YEARS の範囲をマイグレーションで作成する。
+範囲外の期間の集計は DateDimensionError になるため、build_date_dimension コマンドで拡張する。
+"""
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Tuple
+
+from .jp_holidays import holiday_name
+from .models_calendar import DateDimension
+
+# マイグレーション・build_date_dimension コマンドで作成する既定の会計年度
+DEFAULT_FISCAL_YEARS = range(2015, 2036)
+
+# 日付として扱える会計年度の範囲（前年度と翌年2月末も参照するため date の範囲より1年ずつ狭める）
+MIN_FISCAL_YEAR = 2
+MAX_FISCAL_YEAR = 9998
+
+_SEASONS = {
+    3: DateDimension.Season.SPRING, 4: DateDimension.Season.SPRING, 5: DateDimension.Season.SPRING,
+    6: DateDimension.Season.SUMMER, 7: DateDimension.Season.SUMMER, 8: DateDimension.Season.SUMMER,
+    9: DateDimension.Season.AUTUMN, 10: DateDimension.Season.AUTUMN, 11: DateDimension.Season.AUTUMN,
+    12: DateDimension.Season.WINTER, 1: DateDimension.Season.WINTER, 2: DateDimension.Season.WINTER,
+}
+
+
+class DateDimensionError(ValueError):
+    """集計期間が日付ディメンションの作成済みの範囲外の場合に送出される"""
+
+
+def fiscal_year_of(day: date) -> int:
+    """会計年度（3月〜翌年2月）を返す。"""
+    return day.year if day.month >= 3 else day.year - 1
+
+
+def fiscal_month_of(day: date) -> int:
+    """会計月（3月=1 〜 2月=12）を返す。"""
+    return (day.month - 3) % 12 + 1
+
+
+def check_fiscal_year(fiscal_year: int) -> int:
+    """会計年度が日付として扱える範囲か検証して返す。範囲外の場合は ValueError を送出する。"""
+    if not MIN_FISCAL_YEAR <= fiscal_year <= MAX_FISCAL_YEAR:
+        raise ValueError(f"会計年度は{MIN_FISCAL_YEAR}〜{MAX_FISCAL_YEAR}で指定してください")
+    return fiscal_year
+
+
+def fiscal_year_bounds(fiscal_year: int) -> Tuple[date, date]:
+    """会計年度の初日と末日を返す。"""
+    return date(fiscal_year, 3, 1), date(fiscal_year + 1, 3, 1) - timedelta(days=1)
+
+
+def date_dimension_rows(start: date, end: date) -> Iterator[dict]:
+    """start〜end の日付ディメンションの値を1日ずつ返す。"""
+    day = start
+    while day <= end:
+        month_start = day.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        iso_year, iso_week, _ = day.isocalendar()
+        name = holiday_name(day)
+        yield {
+            'date': day,
+            'month_start': month_start,
+            'month_end': next_month - timedelta(days=1),
+            'fiscal_year': fiscal_year_of(day),
+            'fiscal_month': fiscal_month_of(day),
+            'iso_year': iso_year,
+            'iso_week': iso_week,
+            'week_start': day - timedelta(days=day.weekday()),
+            'weekday': day.weekday(),
+            'is_weekend': day.weekday() >= 5,
+            'is_holiday': bool(name),
+            'holiday_name': name,
+            'season': _SEASONS[day.month],
+        }
+        day += timedelta(days=1)
+
+
+def build_date_dimension(fiscal_years: Iterable[int], model=DateDimension) -> int:
+    """
+    会計年度の日付ディメンションを作り直す（既存の行は置き換える）。作成した行数を返す。
+    model はマイグレーションから履歴モデルを渡すために使う。
+    """
+    fiscal_years = sorted(set(fiscal_years))
+    start, _ = fiscal_year_bounds(fiscal_years[0])
+    _, end = fiscal_year_bounds(fiscal_years[-1])
+    rows = [model(**values) for values in date_dimension_rows(start, end) if values['fiscal_year'] in fiscal_years]
+    model.objects.filter(fiscal_year__in=fiscal_years).delete()
+    model.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def month_count(start: date, end: date) -> int:
+    """start〜end に含まれる月の数"""
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def with_dimension(run_query, expected_months: int) -> List[dict]:
+    """
+    ディメンションを起点にした集計を実行する。結果の月が expected_months に足りない
+    （ディメンションが未作成の期間を含む）場合は DateDimensionError を送出する。
+    読み込み時にディメンションを作ることはしない（拡張は build_date_dimension コマンドで行う）。
+    run_query は月ごとの行（'month_start' を含む）のリストを返す関数。
+    """
+    rows = run_query()
+    if len({row['month_start'] for row in rows}) < expected_months:
+        raise DateDimensionError(
+            "日付ディメンションが作成されていない期間です。build_date_dimension コマンドで作成してください"
+        )
+    return rows
@@ -0,0 +1,120 @@
+# reservations/services_dashboard.py
+"""
+ダッシュボードのスナップショット。
+
+ダッシュボードの表示に必要な集計（売上・前年同月比・国籍比率・名簿提出統計・
+月別予約一覧・最終同期時刻）を1回のリクエストでまとめて返す。会計年度などの
+パラメータは一度だけ解決し、売上と前年同月比は同じ集計（日付ディメンションを起点にした
+対象年度と前年度の施設別の月別売上）から作る。
+
+互いに独立した集計は、PostgreSQL ではスレッドごとの接続で並行して実行する。
+SQLite やトランザクション中は、他の接続から未コミットのデータが見えないため順に実行する。
+結果は分析APIのレスポンスキャッシュに保存し、同期完了時に既定の条件で事前計算しておく。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import connection, connections
+from django.utils import timezone
+
+from .models import SyncStatus
+from .response_cache import cached_analytics_data
+from .serializers import ReservationSerializer
+from .services_analytics import monthly_reservations, nationality_ratio, roster_submission_stats
+from .services_revenue import (
+    ALLOCATION_CHECK_IN, FISCAL_MONTH_LABELS, fiscal_year_bounds, fiscal_year_of, monthly_revenue,
+    revenue_by_management_type,
+)
+
+# 並行して実行する集計の最大数（＝同時に使うDB接続数）
+SNAPSHOT_MAX_WORKERS = 4
+
+
+def dashboard_snapshot(
+    fiscal_year: Optional[int] = None,
+    property_name: Optional[str] = None,
+    allocation: str = ALLOCATION_CHECK_IN,
+    month: Optional[date] = None,
+) -> Dict:
+    """
+    スナップショットをキャッシュから返す（なければ集計してキャッシュする）。
+
+    fiscal_year: 会計年度（既定は今年度）
+    month: 予約一覧の年月（既定は今月）
+    """
+    today = timezone.localdate()
+    params = {
+        'fiscal_year': fiscal_year or fiscal_year_of(today),
+        'property_name': property_name or None,
+        'allocation': allocation,
+        'month': (month or today).replace(day=1),
+    }
+    return cached_analytics_data('dashboard', params, lambda: build_dashboard_snapshot(**params))
+
+
+def warm_dashboard_snapshot() -> Dict:
+    """既定の条件（今年度・全施設・今月）のスナップショットを事前計算する（同期完了時に呼ぶ）。"""
+    return dashboard_snapshot()
+
+
+def build_dashboard_snapshot(fiscal_year: int, property_name: Optional[str], allocation: str, month: date) -> Dict:
+    """スナップショットを集計する（キャッシュは使わない）。"""
+    results = _run_concurrently({
+        'revenue_rows': lambda: monthly_revenue(
+            fiscal_year_bounds(fiscal_year - 1)[0], fiscal_year_bounds(fiscal_year)[1], allocation, property_name,
+            by_property=True,
+        ),
+        'nationality': lambda: nationality_ratio(fiscal_year, property_name),
+        'roster_stats': lambda: roster_submission_stats(property_name),
+        'monthly_reservations': lambda: ReservationSerializer(
+            monthly_reservations(month.year, month.month, property_name), many=True,
+        ).data,
+        'last_sync_time': lambda: SyncStatus.objects.filter(pk=1).values_list('last_sync_time', flat=True).first(),
+    })
+    revenue, yoy = _revenue_sections(results['revenue_rows'], fiscal_year)
+    return {
+        'year': fiscal_year,
+        'property_name': property_name,
+        'allocation': allocation,
+        'month': month.strftime('%Y-%m'),
+        'revenue': revenue,
+        'yoy': yoy,
+        'nationality': results['nationality'],
+        'roster_stats': results['roster_stats'],
+        'monthly_reservations': [dict(row) for row in results['monthly_reservations']],
+        'last_sync_time': results['last_sync_time'],
+        'generated_at': timezone.now(),
+    }
+
+
+def _run_concurrently(tasks: Dict[str, Callable]) -> Dict:
+    """集計を実行し {名前: 結果} を返す。PostgreSQL かつトランザクション外なら並行して実行する。"""
+    if connection.vendor != 'postgresql' or connection.in_atomic_block:
+        return {name: task() for name, task in tasks.items()}
+
+    with ThreadPoolExecutor(max_workers=min(SNAPSHOT_MAX_WORKERS, len(tasks))) as executor:
+        futures = {name: executor.submit(_in_own_connection, task) for name, task in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _in_own_connection(task: Callable):
+    """スレッド内で集計し、そのスレッドが開いた接続を閉じる。"""
+    try:
+        return task()
+    finally:
+        connections.close_all()
+
+
+def _revenue_sections(rows: List[Dict], fiscal_year: int) -> Tuple[List[Dict], List[Dict]]:
+    """
+    施設別の月別売上（対象年度と前年度）から、
+    売上（/api/revenue/ の積み上げグラフ形式）と前年同月比（/api/revenue/yoy/ の形式）を作る。
+    """
+    revenue = revenue_by_management_type(row for row in rows if row['fiscal_year'] == fiscal_year)
+    previous = revenue_by_management_type(row for row in rows if row['fiscal_year'] == fiscal_year - 1)
+    yoy = [
+        {'month': month_label, 'current_year': current['total'], 'previous_year': last['total']}
+        for month_label, current, last in zip(FISCAL_MONTH_LABELS, revenue, previous)
+    ]
+    return revenue, yoy
@@ -0,0 +1,212 @@
+# reservations/services_effective_rates.py
+"""
+実効料金カレンダー（EffectiveRate）の解決・維持・検証。
+
+1泊ごとの料金・最小宿泊数・予約可否は以下の優先順で解決する:
+1. PricingRule（ローカルの日別上書き）
+2. RecurringPricingRule（曜日・シーズン・祝日の繰り返しルール、優先度順）
+3. DailyRate（Beds24の日別料金）
+4. Property（施設の基本料金・最小宿泊日数）
+
+保存するのは今日から DEFAULT_HORIZON_DAYS 日後までの固定の期間（stored_window()）だけで、
+各データの変更時にはその期間内の該当日付だけを再計算して upsert する（signals / 各一括更新サービスから呼ぶ）。
+読み込み側は load_effective_rates() で期間内の保存済みの行を1回の範囲読み込みで取得し、
+期間外や未作成の日付はメモリ上で解決する。読み込み時には書き込まない。
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from guest_forms.models import PricingRule, Property
+from guest_forms.recurring_rules import evaluate_recurring_rules, merge_with_pricing_rule
+from .models_pricing import DailyRate, EffectiveRate
+
+# 実効料金を保存しておく期間（今日から）
+DEFAULT_HORIZON_DAYS = 365
+
+_FIELDS = ['price', 'min_nights', 'available', 'is_blackout', 'blackout_reason', 'price_source']
+
+
+class EffectiveValues(NamedTuple):
+    """1日分の実効料金"""
+    price: Decimal
+    min_nights: int
+    available: bool
+    is_blackout: bool
+    blackout_reason: str
+    price_source: str
+
+
+def compute_effective_rates(properties: List[Property], start: date, end: date) -> Dict[int, Dict[date, EffectiveValues]]:
+    """
+    元データから start〜end（両端を含む）の全日付分の実効料金を計算する（保存はしない）。
+    DailyRate / PricingRule / RecurringPricingRule をそれぞれ1クエリで読み込む。
+    """
+    property_ids = [prop.id for prop in properties]
+    daily = {pid: {} for pid in property_ids}
+    rules = {pid: {} for pid in property_ids}
+    for pid, rate_date, base_price, min_stay, available in DailyRate.objects.filter(
+        property_id__in=property_ids, date__range=(start, end),
+    ).values_list('property_id', 'date', 'base_price', 'min_stay', 'available'):
+        daily[pid][rate_date] = (base_price, min_stay, available)
+    for pid, rule_date, price, min_nights, is_blackout, blackout_reason in PricingRule.objects.filter(
+        property_id__in=property_ids, date__range=(start, end),
+    ).values_list('property_id', 'date', 'price', 'min_nights', 'is_blackout', 'blackout_reason'):
+        rules[pid][rule_date] = (price, min_nights, is_blackout, blackout_reason)
+    recurring = evaluate_recurring_rules(property_ids, start, end)
+
+    result = {}
+    for prop in properties:
+        days = {}
+        current = start
+        while current <= end:
+            days[current] = _resolve(
+                prop, rules[prop.id].get(current), recurring[prop.id].get(current), daily[prop.id].get(current)
+            )
+            current += timedelta(days=1)
+        result[prop.id] = days
+    return result
+
+
+def _resolve(prop: Property, pricing_rule: Optional[tuple], recurring, rate: Optional[tuple]) -> EffectiveValues:
+    rule = merge_with_pricing_rule(pricing_rule, recurring)
+    rule_price, rule_min_nights, is_blackout, blackout_reason = rule or (None, None, False, '')
+
+    if rule_price is not None:
+        price = Decimal(rule_price)
+        from_pricing_rule = pricing_rule is not None and pricing_rule[0] == rule_price
+        source = EffectiveRate.Source.RULE if from_pricing_rule else EffectiveRate.Source.RECURRING
+    elif rate and rate[0] is not None:
+        price = rate[0]
+        source = EffectiveRate.Source.DAILY
+    else:
+        price = Decimal(prop.base_price)
+        source = EffectiveRate.Source.BASE
+
+    if rule_min_nights:
+        min_nights = rule_min_nights
+    elif rate:
+        min_nights = rate[1]
+    else:
+        min_nights = prop.min_nights
+
+    available = not is_blackout and not (rate and not rate[2])
+    return EffectiveValues(price, min_nights, available, is_blackout, blackout_reason or '', source)
+
+
+def stored_window(today: Optional[date] = None) -> Tuple[date, date]:
+    """実効料金を保存しておく期間（今日〜DEFAULT_HORIZON_DAYS 日後、両端を含む）"""
+    today = today or timezone.localdate()
+    return today, today + timedelta(days=DEFAULT_HORIZON_DAYS)
+
+
+def _clip(start: date, end: date) -> Optional[Tuple[date, date]]:
+    """start〜end のうち保存期間に含まれる部分（含まれなければ None）"""
+    window_start, window_end = stored_window()
+    start, end = max(start, window_start), min(end, window_end)
+    return (start, end) if start <= end else None
+
+
+def refresh_effective_rates(property_obj: Property, start: date, end: date) -> int:
+    """指定期間のうち保存期間に含まれる日付の実効料金を再計算して upsert する。書き込んだ行数を返す。"""
+    clipped = _clip(start, end)
+    if clipped is None:
+        return 0
+    days = compute_effective_rates([property_obj], *clipped)[property_obj.id]
+    _store(property_obj.id, days)
+    return len(days)
+
+
+def refresh_effective_rates_for_property(property_obj: Property) -> int:
+    """
+    施設の保存期間分の実効料金をすべて再計算する（基本料金や繰り返しルールの変更時）。
+    保存期間より前の行は削除する。
+    """
+    window_start, window_end = stored_window()
+    with transaction.atomic():
+        EffectiveRate.objects.filter(property=property_obj, date__lt=window_start).delete()
+        return refresh_effective_rates(property_obj, window_start, window_end)
+
+
+def _store(property_id: int, days: Dict[date, EffectiveValues]) -> None:
+    if not days:
+        return
+    EffectiveRate.objects.bulk_create(
+        [EffectiveRate(property_id=property_id, date=day, **values._asdict()) for day, values in days.items()],
+        update_conflicts=True,
+        unique_fields=['property', 'date'],
+        update_fields=_FIELDS + ['updated_at'],
+        batch_size=500,
+    )
+
+
+def load_effective_rates(properties: List[Property], start: date, end: date) -> Dict[int, Dict[date, EffectiveValues]]:
+    """
+    start〜end の実効料金を施設ごとに {date: EffectiveValues} で返す（書き込みはしない）。
+    保存期間内の保存済みの行を1クエリで読み込み、欠けている日付がある施設分だけ元データから計算する。
+    """
+    num_days = (end - start).days + 1
+    loaded = {prop.id: {} for prop in properties}
+    clipped = _clip(start, end)
+    if clipped is not None:
+        for row in EffectiveRate.objects.filter(
+            property_id__in=list(loaded), date__range=clipped,
+        ).values_list('property_id', 'date', *_FIELDS):
+            loaded[row[0]][row[1]] = EffectiveValues(*row[2:])
+
+    incomplete = [prop for prop in properties if len(loaded[prop.id]) < num_days]
+    if incomplete:
+        loaded.update(compute_effective_rates(incomplete, start, end))
+    return loaded
+
+
+def rebuild_effective_rates(start: date, end: date, property_ids: Optional[Iterable[int]] = None) -> int:
+    """指定期間のうち保存期間に含まれる実効料金を元データから作り直す。書き込んだ行数を返す。"""
+    clipped = _clip(start, end)
+    if clipped is None:
+        return 0
+    properties = Property.objects.all()
+    if property_ids is not None:
+        properties = properties.filter(id__in=list(property_ids))
+    written = 0
+    for prop in properties.order_by('id'):
+        with transaction.atomic():
+            EffectiveRate.objects.filter(property=prop, date__range=clipped).delete()
+            written += refresh_effective_rates(prop, *clipped)
+    return written
+
+
+def find_inconsistencies(start: date, end: date, property_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+    """
+    保存済みの実効料金と元データからの計算結果を比較し、食い違いを返す。
+    保存されていない日付は読み込み時に計算されるため不一致には含めない。
+    """
+    properties = Property.objects.all()
+    if property_ids is not None:
+        properties = properties.filter(id__in=list(property_ids))
+    properties = list(properties.order_by('id'))
+
+    stored = {prop.id: {} for prop in properties}
+    for row in EffectiveRate.objects.filter(
+        property_id__in=list(stored), date__range=(start, end),
+    ).values_list('property_id', 'date', *_FIELDS):
+        stored[row[0]][row[1]] = EffectiveValues(*row[2:])
+
+    problems = []
+    for pid, days in compute_effective_rates(properties, start, end).items():
+        for day, expected in days.items():
+            actual = stored[pid].get(day)
+            if actual is None or actual == expected:
+                continue
+            fields = [name for name in _FIELDS if getattr(actual, name) != getattr(expected, name)]
+            problems.append({
+                'property_id': pid,
+                'date': day,
+                'fields': fields,
+                'stored': actual._asdict(),
+                'expected': expected._asdict(),
+            })
+    return problems
@@ -0,0 +1,120 @@
+# reservations/services_export.py
+"""
+予約の一括エクスポート。
+
+予約（と任意で名簿提出・宿泊税の項目）を values_list() の1クエリで読み込み、
+QuerySet.iterator(chunk_size=...) で少しずつ取り出す。PostgreSQL ではサーバーサイド
+カーソルになるため、件数に関わらず一度に保持するのは chunk_size 行だけとなる。
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db.models import Q
+
+from .models import Reservation
+
+# 1回のフェッチで取り出す行数
+EXPORT_CHUNK_SIZE = 2000
+
+# (出力列名, 参照先)
+RESERVATION_COLUMNS = [
+    ('id', 'id'),
+    ('beds24_book_id', 'beds24_book_id'),
+    ('property', 'property__name'),
+    ('status', 'status'),
+    ('check_in_date', 'check_in_date'),
+    ('check_out_date', 'check_out_date'),
+    ('num_guests', 'num_guests'),
+    ('total_price', 'total_price'),
+    ('guest_name', 'guest_name'),
+    ('guest_email', 'guest_email'),
+    ('guest_roster_status', 'guest_roster_status'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+# include で追加できる項目（名簿提出・宿泊税がない予約は空）
+OPTIONAL_COLUMNS = {
+    'submission': [
+        ('submission_status', 'guestsubmission__status'),
+        ('nationality', 'guestsubmission__nationality'),
+        ('submission_updated_at', 'guestsubmission__updated_at'),
+    ],
+    'tax': [
+        ('tax_type', 'accommodation_tax__tax_type'),
+        ('tax_num_nights', 'accommodation_tax__num_nights'),
+        ('tax_amount', 'accommodation_tax__tax_amount'),
+        ('tax_payment_status', 'accommodation_tax__payment_status'),
+        ('tax_payment_date', 'accommodation_tax__payment_date'),
+    ],
+}
+
+
+class ExportError(Exception):
+    """エクスポート条件が不正な場合に送出される"""
+
+
+def export_columns(include: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """出力する (列名, 参照先) のリストを返す。"""
+    columns = list(RESERVATION_COLUMNS)
+    for name in include:
+        if name not in OPTIONAL_COLUMNS:
+            raise ExportError(f"include に指定できるのは {', '.join(OPTIONAL_COLUMNS)} です")
+        columns.extend(OPTIONAL_COLUMNS[name])
+    return columns
+
+
+def export_filter(params: Dict[str, str]) -> Q:
+    """
+    クエリパラメータから絞り込み条件を作る。
+
+    - property_id / property_name: 施設
+    - status: 予約ステータス（カンマ区切り）
+    - check_in_from / check_in_to: チェックイン日の範囲（YYYY-MM-DD）
+    - updated_since: 更新日時がこれ以降（ISO 8601）
+    - roster_status: 名簿提出状況
+    """
+    condition = Q()
+    try:
+        if params.get('property_id'):
+            condition &= Q(property_id=int(params['property_id']))
+        if params.get('check_in_from'):
+            condition &= Q(check_in_date__gte=date.fromisoformat(params['check_in_from']))
+        if params.get('check_in_to'):
+            condition &= Q(check_in_date__lte=date.fromisoformat(params['check_in_to']))
+        if params.get('updated_since'):
+            condition &= Q(updated_at__gte=datetime.fromisoformat(params['updated_since']))
+    except ValueError:
+        raise ExportError('property_id は整数、日付は YYYY-MM-DD（updated_since は ISO 8601）で指定してください')
+    if params.get('property_name'):
+        condition &= Q(property__name=params['property_name'])
+    if params.get('status'):
+        condition &= Q(status__in=[value.strip() for value in params['status'].split(',') if value.strip()])
+    if params.get('roster_status'):
+        condition &= Q(guest_roster_status=params['roster_status'])
+    return condition
+
+
+def export_rows(
+    condition: Optional[Q] = None,
+    columns: Optional[List[Tuple[str, str]]] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[tuple]:
+    """絞り込んだ予約を ID 順に、列の値のタプルとして1行ずつ返す。"""
+    columns = columns or RESERVATION_COLUMNS
+    queryset = Reservation.objects.filter(condition or Q()).order_by('id')
+    return queryset.values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=chunk_size)
+
+
+def export_csv_rows(rows: Iterable[tuple], columns: List[Tuple[str, str]]) -> Iterator[list]:
+    """ヘッダー行に続けて export_rows() の行を返す（CSV用）。"""
+    yield [name for name, _ in columns]
+    for row in rows:
+        yield ['' if value is None else value for value in row]
+
+
+def export_records(rows: Iterable[tuple], columns: List[Tuple[str, str]]) -> Iterator[Dict]:
+    """export_rows() の行を {列名: 値} として返す（NDJSON用）。"""
+    names = [name for name, _ in columns]
+    for row in rows:
+        yield dict(zip(names, row))
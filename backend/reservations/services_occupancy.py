@@ -0,0 +1,174 @@
+# reservations/services_occupancy.py
+"""
+予約の宿泊日インデックス（ReservationNight）と宿泊日ごとの按分売上の維持、全施設の空室検索。
+
+Beds24の 'Last Night' を check_out_date に保存しているため、
+予約の宿泊日は check_in_date 〜 check_out_date（両端を含む）となる。
+"""
+from datetime import date, timedelta
+from decimal import ROUND_DOWN, Decimal
+from typing import Iterable, List, Optional, Set
+
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q
+
+from guest_forms.models import Property
+from .cache import bump_tags, occupancy_tag
+from .models import Reservation, ReservationNight
+from .services_effective_rates import load_effective_rates
+from .services_calendar import fiscal_year_of
+
+# 在庫を占有しない予約ステータス
+NON_BLOCKING_STATUSES = {'Cancelled', 'Declined'}
+
+CENT = Decimal('0.01')
+
+
+def stay_nights(check_in: date, last_night: Optional[date]) -> List[date]:
+    """宿泊日のリストを返す（last_night が未設定・不正な場合は1泊とみなす）。"""
+    if last_night is None or last_night < check_in:
+        return [check_in]
+    return [check_in + timedelta(days=i) for i in range((last_night - check_in).days + 1)]
+
+
+def allocate_revenue(total_price, num_nights: int) -> List[Decimal]:
+    """
+    合計料金を宿泊日数で按分する。1泊あたりは1銭未満を切り捨て、端数は最終泊に加算する。
+    """
+    total_price = Decimal(total_price or 0)
+    per_night = (total_price / num_nights).quantize(CENT, rounding=ROUND_DOWN)
+    return [per_night] * (num_nights - 1) + [total_price - per_night * (num_nights - 1)]
+
+
+def refresh_reservation_nights(reservation_ids: Iterable[int]) -> int:
+    """
+    指定予約の宿泊日インデックスと按分売上を作り直す。
+    キャンセル等の在庫を占有しない予約は宿泊日が削除される。
+    PostgreSQL では generate_series による1つの INSERT ... SELECT で展開する。
+
+    Returns:
+        作成した宿泊日の行数
+    """
+    reservation_ids = list(reservation_ids)
+    if not reservation_ids:
+        return 0
+
+    stale_tags = _occupancy_tags(reservation_ids)
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            ReservationNight.objects.filter(reservation_id__in=reservation_ids).delete()
+            created = _insert_nights_with_series(reservation_ids)
+        bump_tags(*stale_tags, *_occupancy_tags(reservation_ids))
+        return created
+
+    rows = Reservation.objects.filter(id__in=reservation_ids).exclude(
+        status__in=NON_BLOCKING_STATUSES,
+    ).values_list('id', 'property_id', 'check_in_date', 'check_out_date', 'status', 'total_price')
+
+    nights = []
+    for res_id, property_id, check_in, last_night, res_status, total_price in rows:
+        dates = stay_nights(check_in, last_night)
+        nights.extend(
+            ReservationNight(reservation_id=res_id, property_id=property_id, date=night, status=res_status, revenue=revenue)
+            for night, revenue in zip(dates, allocate_revenue(total_price, len(dates)))
+        )
+
+    with transaction.atomic():
+        ReservationNight.objects.filter(reservation_id__in=reservation_ids).delete()
+        ReservationNight.objects.bulk_create(nights, batch_size=1000)
+    # 変更前後の宿泊日が属する (施設, 会計年度) の稼働率キャッシュを無効化する
+    bump_tags(*stale_tags, *_occupancy_tags(reservation_ids))
+    return len(nights)
+
+
+def _occupancy_tags(reservation_ids: List[int]) -> Set[str]:
+    """予約の宿泊日が属する (施設, 会計年度) のキャッシュタグを返す。"""
+    spans = ReservationNight.objects.filter(reservation_id__in=reservation_ids).values('property_id').annotate(
+        first=Min('date'), last=Max('date'),
+    ).order_by()
+    return {
+        occupancy_tag(span['property_id'], fiscal_year)
+        for span in spans
+        for fiscal_year in range(fiscal_year_of(span['first']), fiscal_year_of(span['last']) + 1)
+    }
+
+
+def _insert_nights_with_series(reservation_ids: List[int]) -> int:
+    """stay_nights() / allocate_revenue() と同じ展開・按分を SQL で行う。"""
+    night_table = ReservationNight._meta.db_table
+    reservation_table = Reservation._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH stays AS (
+                SELECT id, property_id, status, total_price, check_in_date,
+                       CASE WHEN check_out_date IS NULL OR check_out_date < check_in_date
+                            THEN check_in_date ELSE check_out_date END AS last_night
+                FROM {reservation_table}
+                WHERE id = ANY(%s) AND (status IS NULL OR NOT (status = ANY(%s)))
+            ), allocated AS (
+                SELECT *, (last_night - check_in_date + 1) AS num_nights,
+                       FLOOR(total_price * 100 / (last_night - check_in_date + 1)) / 100 AS per_night
+                FROM stays
+            )
+            INSERT INTO {night_table} (reservation_id, property_id, date, status, revenue)
+            SELECT id, property_id, d::date, status,
+                   CASE WHEN d::date = last_night THEN total_price - per_night * (num_nights - 1) ELSE per_night END
+            FROM allocated, generate_series(check_in_date, last_night, interval '1 day') AS d
+            """,
+            [reservation_ids, list(NON_BLOCKING_STATUSES)],
+        )
+        return cursor.rowcount
+
+
+def rebuild_reservation_nights(property_id: Optional[int] = None) -> int:
+    """宿泊日インデックスを全件（または施設単位で）作り直す。"""
+    reservations = Reservation.objects.all()
+    if property_id is not None:
+        reservations = reservations.filter(property_id=property_id)
+
+    with transaction.atomic():
+        stale = ReservationNight.objects.all()
+        if property_id is not None:
+            stale = stale.filter(property_id=property_id)
+        stale.delete()
+
+        created = 0
+        batch = []
+        for res_id in reservations.values_list('id', flat=True).iterator(chunk_size=2000):
+            batch.append(res_id)
+            if len(batch) >= 2000:
+                created += refresh_reservation_nights(batch)
+                batch = []
+        created += refresh_reservation_nights(batch)
+    return created
+
+
+def search_available_properties(check_in: date, check_out: date, guests: int):
+    """
+    check_in 〜 check_out（チェックアウト日、宿泊しない）で空いている施設を返す。
+
+    条件:
+    - 定員（capacity）が guests 以上（capacity=0 は未設定として除外しない）
+    - 期間中に占有中の宿泊日がない
+    - 期間中に予約不可（ブラックアウト・Beds24で売止め）の日がない
+    - チェックイン日の最小宿泊数を満たす
+
+    定員と宿泊日の条件で候補を1クエリで絞り込み、料金条件は候補の施設分だけ
+    実効料金（load_effective_rates）を読み込んで判定する。
+    """
+    last_night = check_out - timedelta(days=1)
+    num_nights = (check_out - check_in).days
+
+    booked = ReservationNight.objects.filter(date__range=(check_in, last_night)).values('property_id')
+    candidates = list(
+        Property.objects
+        .filter(Q(capacity__gte=guests) | Q(capacity=0))
+        .exclude(id__in=booked)
+    )
+    effective = load_effective_rates(candidates, check_in, last_night) if candidates else {}
+    matching = [
+        pid for pid, days in effective.items()
+        if all(values.available for values in days.values()) and days[check_in].min_nights <= num_nights
+    ]
+    return Property.objects.filter(id__in=matching).order_by('name')
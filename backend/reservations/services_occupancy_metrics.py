@@ -0,0 +1,195 @@
+# reservations/services_occupancy_metrics.py
+"""
+施設ごとの稼働率・ADR・RevPAR を月別または週別に集計する。
+
+- 販売可能泊数: 実効料金（EffectiveRate）のうちブラックアウトでない日数
+- 販売泊数・売上: 宿泊日インデックス（ReservationNight）の泊数と按分売上（売上対象のステータスのみ）
+- 稼働率 = 販売泊数 / 販売可能泊数、ADR = 売上 / 販売泊数、RevPAR = 売上 / 販売可能泊数
+
+集計は (施設, 会計年度, 集計単位) ごとにキャッシュする。キャッシュは料金データの変更
+（rates_tag）と、その会計年度の宿泊日の変更（occupancy_tag）で無効化される。
+会計年度をまたぐ週は、両年度の集計を足し合わせてから指標を計算する。
+"""
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from guest_forms.models import Property
+from .cache import make_key, occupancy_tag, rates_tag, tag_versions
+from .models import ReservationNight
+from .services_effective_rates import load_effective_rates
+from .services_calendar import fiscal_year_bounds, fiscal_year_of
+from .services_revenue import REVENUE_STATUSES
+
+GRAIN_MONTH = 'month'
+GRAIN_WEEK = 'week'
+_TRUNC = {GRAIN_MONTH: TruncMonth, GRAIN_WEEK: TruncWeek}
+GRAINS = tuple(_TRUNC)
+# 日付から期間の初日を求める（販売可能泊数を実効料金から数えるとき用、_TRUNC と同じ区切り）
+_PERIOD_START = {
+    GRAIN_MONTH: lambda day: day.replace(day=1),
+    GRAIN_WEEK: lambda day: day - timedelta(days=day.weekday()),
+}
+
+# 1回の集計で扱える最大の会計年度数
+MAX_FISCAL_YEARS = 5
+
+# 集計結果のキャッシュ保持時間（秒）。宿泊日データの更新時に occupancy_tag で無効化する
+CACHE_TIMEOUT = 60 * 60 * 24
+
+RATIO = Decimal('0.0001')
+CENT = Decimal('0.01')
+
+# {期間の初日: [販売可能泊数, 販売泊数, 売上]}
+PeriodCounts = Dict[date, list]
+
+
+def period_bounds(day: date, grain: str) -> Tuple[date, date]:
+    """day を含む月（または月曜始まりの週）の初日と末日を返す。"""
+    if grain == GRAIN_WEEK:
+        first = day - timedelta(days=day.weekday())
+        return first, first + timedelta(days=6)
+    first = day.replace(day=1)
+    next_month = (first + timedelta(days=31)).replace(day=1)
+    return first, next_month - timedelta(days=1)
+
+
+def occupancy_metrics(start: date, end: date, grain: str = GRAIN_MONTH, properties: Optional[Iterable[Property]] = None) -> Dict:
+    """
+    start〜end を含む月（週）ごとの稼働率・ADR・RevPAR を施設別と全施設合計で返す。
+    期間は集計単位の境界まで広げる（例: 月別で 3/15〜4/10 を指定すると 3/1〜4/30）。
+
+    Returns:
+        {'grain', 'start', 'end', 'periods': [期間の初日, ...],
+         'properties': [{'property_id', 'name', 'management_type', 'periods': [指標, ...], 'total': 指標}, ...],
+         'overall': {'periods': [指標, ...], 'total': 指標}}
+    """
+    first, _ = period_bounds(start, grain)
+    _, last = period_bounds(end, grain)
+    if properties is None:
+        properties = Property.objects.all()
+    properties = sorted(properties, key=lambda prop: (prop.name, prop.id))
+
+    counts = _load_counts(properties, range(fiscal_year_of(first), fiscal_year_of(last) + 1), grain)
+    periods = []
+    current = first
+    while current <= last:
+        periods.append(current)
+        current = period_bounds(current, grain)[1] + timedelta(days=1)
+
+    overall = {period: [0, 0, Decimal(0)] for period in periods}
+    result = []
+    for prop in properties:
+        by_period = counts[prop.id]
+        rows = []
+        for period in periods:
+            values = by_period.get(period, (0, 0, Decimal(0)))
+            for i, value in enumerate(values):
+                overall[period][i] += value
+            rows.append({'period': period, **_metrics(*values)})
+        result.append({
+            'property_id': prop.id,
+            'name': prop.name,
+            'management_type': prop.management_type,
+            'periods': rows,
+            'total': _metrics(*_sum(by_period.get(period, (0, 0, Decimal(0))) for period in periods)),
+        })
+
+    return {
+        'grain': grain,
+        'start': first,
+        'end': last,
+        'periods': periods,
+        'properties': result,
+        'overall': {
+            'periods': [{'period': period, **_metrics(*overall[period])} for period in periods],
+            'total': _metrics(*_sum(overall.values())),
+        },
+    }
+
+
+def _load_counts(properties: List[Property], fiscal_years: Iterable[int], grain: str) -> Dict[int, PeriodCounts]:
+    """施設ごとの期間別集計を、キャッシュにない (施設, 会計年度) だけ計算して返す。"""
+    fiscal_years = list(fiscal_years)
+    tags = [rates_tag(prop.id) for prop in properties] + [
+        occupancy_tag(prop.id, fiscal_year) for prop in properties for fiscal_year in fiscal_years
+    ]
+    versions = tag_versions(tags)
+    keys = {
+        (prop.id, fiscal_year): make_key(
+            'occupancy-metrics',
+            {'property_id': prop.id, 'fiscal_year': fiscal_year, 'grain': grain},
+            [rates_tag(prop.id), occupancy_tag(prop.id, fiscal_year)],
+            versions=versions,
+        )
+        for prop in properties
+        for fiscal_year in fiscal_years
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    found = {key: cached[cache_key] for key, cache_key in keys.items() if cache_key in cached}
+    for fiscal_year in fiscal_years:
+        missing = [prop for prop in properties if (prop.id, fiscal_year) not in found]
+        if not missing:
+            continue
+        computed = _count_fiscal_year(missing, fiscal_year, grain)
+        cache.set_many({keys[(prop.id, fiscal_year)]: computed[prop.id] for prop in missing}, timeout=CACHE_TIMEOUT)
+        found.update({(prop.id, fiscal_year): computed[prop.id] for prop in missing})
+
+    # 会計年度をまたぐ週は両年度の値を足し合わせる
+    merged = {prop.id: {} for prop in properties}
+    for (pid, _), by_period in found.items():
+        for period, values in by_period.items():
+            merged[pid][period] = _sum([merged[pid][period], values]) if period in merged[pid] else list(values)
+    return merged
+
+
+def _count_fiscal_year(properties: List[Property], fiscal_year: int, grain: str) -> Dict[int, PeriodCounts]:
+    """
+    1会計年度分の販売可能泊数・販売泊数・売上を求める。
+    販売可能泊数は実効料金から数え、販売泊数・売上は施設×期間のグループ集計で求める。
+    """
+    start, end = fiscal_year_bounds(fiscal_year)
+    trunc = _TRUNC[grain]
+
+    property_ids = [prop.id for prop in properties]
+    counts = {pid: {} for pid in property_ids}
+    for pid, days in load_effective_rates(properties, start, end).items():
+        for day, values in days.items():
+            if not values.is_blackout:
+                counts[pid].setdefault(_PERIOD_START[grain](day), [0, 0, Decimal(0)])[0] += 1
+
+    sold = ReservationNight.objects.filter(
+        property_id__in=property_ids, date__range=(start, end), status__in=REVENUE_STATUSES,
+    ).annotate(period=trunc('date')).values('property_id', 'period').annotate(
+        nights=Count('id'), revenue=Sum('revenue'),
+    ).order_by()
+    for row in sold:
+        values = counts[row['property_id']].setdefault(row['period'], [0, 0, Decimal(0)])
+        values[1] = row['nights']
+        values[2] = Decimal(row['revenue'] or 0).quantize(CENT)
+    return counts
+
+
+def _sum(rows) -> list:
+    total = [0, 0, Decimal(0)]
+    for row in rows:
+        for i, value in enumerate(row):
+            total[i] += value
+    return total
+
+
+def _metrics(available: int, sold: int, revenue: Decimal) -> Dict:
+    """泊数と売上から指標を計算する（分母が0の指標は None）。"""
+    return {
+        'available_nights': available,
+        'sold_nights': sold,
+        'revenue': revenue,
+        'occupancy': (Decimal(sold) / available).quantize(RATIO, rounding=ROUND_HALF_UP) if available else None,
+        'adr': (revenue / sold).quantize(CENT, rounding=ROUND_HALF_UP) if sold else None,
+        'revpar': (revenue / available).quantize(CENT, rounding=ROUND_HALF_UP) if available else None,
+    }
@@ -0,0 +1,115 @@
+# reservations/services_pace.py
+"""
+予約ペース（オンザブック）のスナップショットとペースカーブ。
+
+take_pace_snapshot() は宿泊日インデックス（ReservationNight）を施設×宿泊月で
+1回だけグループ集計し、その日の BookingPaceSnapshot として保存する。
+pace_curves() は同じ宿泊月を年ごとに並べ、宿泊月の初日までの日数（リードタイム）ごとの
+予約済み泊数・売上を返す。
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import BookingPaceSnapshot, ReservationNight
+from .services_revenue import REVENUE_STATUSES
+
+# ペースカーブで比較できる最大年数
+MAX_PACE_YEARS = 5
+
+
+def take_pace_snapshot(snapshot_date: Optional[date] = None) -> int:
+    """
+    snapshot_date 時点の予約済み泊数・売上を、今月以降の宿泊月ごとに記録する。
+    同じ日のスナップショットは置き換える。作成した行数を返す。
+    """
+    snapshot_date = snapshot_date or timezone.localdate()
+    rows = (
+        ReservationNight.objects
+        .filter(date__gte=snapshot_date.replace(day=1), status__in=REVENUE_STATUSES)
+        .annotate(stay_month=TruncMonth('date'))
+        .values('property_id', 'stay_month')
+        .annotate(nights=Count('id'), revenue=Sum('revenue'), booking_count=Count('reservation_id', distinct=True))
+        .order_by()
+    )
+    snapshots = [
+        BookingPaceSnapshot(
+            property_id=row['property_id'],
+            snapshot_date=snapshot_date,
+            stay_month=row['stay_month'],
+            nights=row['nights'],
+            revenue=row['revenue'] or 0,
+            booking_count=row['booking_count'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        BookingPaceSnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+        BookingPaceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def pace_curves(
+    stay_month: date,
+    years: int = 2,
+    property_name: Optional[str] = None,
+    management_type: Optional[str] = None,
+) -> Dict:
+    """
+    stay_month と、その前年以前（years 年分）の同じ宿泊月のペースカーブを1回のグループ集計で返す。
+
+    Returns:
+        {
+            'lead_time': 対象年の最新スナップショットのリードタイム（日）,
+            'series': [{'year': 2026, 'stay_month': date, 'points': [{'days_before', 'snapshot_date', 'nights', 'revenue', 'bookings'}, ...]}],
+            'comparison': [{'year': 2025, 'snapshot_date': ..., 'nights': ..., ...} または None],
+        }
+    series / comparison は新しい年から順。comparison は各年で同じリードタイム以前の直近の値。
+    """
+    stay_month = stay_month.replace(day=1)
+    months = [stay_month.replace(year=stay_month.year - offset) for offset in range(years)]
+
+    queryset = BookingPaceSnapshot.objects.filter(stay_month__in=months)
+    if property_name:
+        queryset = queryset.filter(property__name=property_name)
+    if management_type:
+        queryset = queryset.filter(property__management_type=management_type)
+    rows = (
+        queryset.values('stay_month', 'snapshot_date')
+        .annotate(nights=Sum('nights'), revenue=Sum('revenue'), bookings=Sum('booking_count'))
+        .order_by('stay_month', 'snapshot_date')
+    )
+
+    points_by_month: Dict[date, List[Dict]] = {month: [] for month in months}
+    for row in rows:
+        points_by_month[row['stay_month']].append({
+            'days_before': (row['stay_month'] - row['snapshot_date']).days,
+            'snapshot_date': row['snapshot_date'],
+            'nights': row['nights'],
+            'revenue': row['revenue'],
+            'bookings': row['bookings'],
+        })
+
+    current = points_by_month[stay_month]
+    lead_time = current[-1]['days_before'] if current else None
+    return {
+        'lead_time': lead_time,
+        'series': [
+            {'year': month.year, 'stay_month': month, 'points': points_by_month[month]}
+            for month in months
+        ],
+        'comparison': [
+            _point_at_lead_time(points_by_month[month], lead_time) if lead_time is not None else None
+            for month in months
+        ],
+    }
+
+
+def _point_at_lead_time(points: List[Dict], lead_time: int) -> Optional[Dict]:
+    """リードタイムが lead_time 以上（＝同じ時点かそれより前）で最も新しいスナップショット。"""
+    candidates = [point for point in points if point['days_before'] >= lead_time]
+    return candidates[-1] if candidates else None
@@ -0,0 +1,169 @@
+# reservations/services_price_push.py
+"""
+ローカルの料金変更を Beds24 へ送信するキュー（PricePush）の登録と送信。
+
+- 登録: 施設・日付ごとに1行へまとめる（同じ日付の再編集は後勝ちで上書き）
+- 送信: 施設ごとに送信待ちの日付をまとめ、Beds24 JSON API `setRoomDates` を
+  MAX_DATES_PER_CALL 日ずつ呼び出す。送る値は送信時点の実効料金（EffectiveRate）で、
+  ブラックアウト・予約不可の日付は Beds24 側でも販売を止める。過去の日付は送らずに捨てる
+- 失敗: 試行回数に応じて次回送信日時を指数的に遅らせ、MAX_ATTEMPTS 回で打ち切る
+
+API のベースURLは settings.BEDS24_JSON_API_URL で差し替えられる（テストではローカルの擬似サーバーを使う）。
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from guest_forms.models import Property
+from .models_pricing import PricePush
+from .services_effective_rates import load_effective_rates
+
+logger = logging.getLogger(__name__)
+
+# 1回の setRoomDates で送る最大日数
+MAX_DATES_PER_CALL = 100
+# これを超えて失敗した日付は自動では再送しない（--retry-failed で再送）
+MAX_ATTEMPTS = 8
+# 再送間隔: BACKOFF_BASE * 2^(試行回数-1)、上限 BACKOFF_MAX
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=6)
+
+# setRoomDates の override（o）: 予約可能な日は解除、ブラックアウト・予約不可の日は販売停止
+OVERRIDE_NONE = '0'
+OVERRIDE_BLACKOUT = '1'
+
+
+class Beds24PushError(Exception):
+    """Beds24への料金送信に失敗した場合に送出される"""
+
+
+def enqueue_price_push(property_obj: Property, dates: Iterable[date]) -> int:
+    """
+    料金が変わった日付を送信キューに登録する。Beds24の部屋IDがない施設は対象外。
+    既に登録済みの日付は登録日時と再送状態を更新して1件にまとめる。過去の日付は送らない。
+    """
+    if not property_obj.room_id:
+        return 0
+    today = timezone.localdate()
+    dates = sorted({push_date for push_date in dates if push_date >= today})
+    if not dates:
+        return 0
+
+    now = timezone.now()
+    PricePush.objects.bulk_create(
+        [
+            PricePush(property=property_obj, date=push_date, enqueued_at=now, attempts=0, next_attempt_at=now, last_error='')
+            for push_date in dates
+        ],
+        update_conflicts=True,
+        unique_fields=['property', 'date'],
+        update_fields=['enqueued_at', 'attempts', 'next_attempt_at', 'last_error'],
+        batch_size=500,
+    )
+    return len(dates)
+
+
+def enqueue_price_push_range(property_obj: Property, start: date, end: date) -> int:
+    """期間内の全日付を送信キューに登録する。"""
+    return enqueue_price_push(property_obj, (start + timedelta(days=i) for i in range((end - start).days + 1)))
+
+
+def flush_price_pushes(property_ids: Optional[Iterable[int]] = None, retry_failed: bool = False) -> Dict[str, int]:
+    """
+    送信時刻になったキューを施設ごとにまとめて Beds24 へ送る。
+    retry_failed=True の場合は再送待ち・打ち切り済みの日付もすぐに送る。
+
+    Returns:
+        {'dates': 送信に成功した日数, 'calls': API呼び出し回数, 'failed': 送信に失敗した日数}
+    """
+    started_at = timezone.now()
+    # 登録後に過ぎてしまった日付は送っても意味がないため捨てる
+    stale = PricePush.objects.filter(date__lt=timezone.localdate())
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        stale = stale.filter(property_id__in=property_ids)
+    stale.delete()
+
+    due = PricePush.objects.select_related('property')
+    if not retry_failed:
+        due = due.filter(next_attempt_at__lte=started_at, attempts__lt=MAX_ATTEMPTS)
+    if property_ids is not None:
+        due = due.filter(property_id__in=property_ids)
+
+    by_property: Dict[int, List[PricePush]] = {}
+    for push in due.order_by('property_id', 'date'):
+        by_property.setdefault(push.property_id, []).append(push)
+
+    result = {'dates': 0, 'calls': 0, 'failed': 0}
+    for pushes in by_property.values():
+        prop = pushes[0].property
+        effective = load_effective_rates([prop], pushes[0].date, pushes[-1].date)[prop.id]
+        for offset in range(0, len(pushes), MAX_DATES_PER_CALL):
+            chunk = pushes[offset:offset + MAX_DATES_PER_CALL]
+            result['calls'] += 1
+            try:
+                set_room_dates(prop, {push.date: effective[push.date] for push in chunk})
+            except Beds24PushError as exc:
+                logger.warning("Beds24 price push failed for %s (%d dates): %s", prop.name, len(chunk), exc)
+                _schedule_retry(chunk, str(exc))
+                result['failed'] += len(chunk)
+                continue
+            # 送信中に再編集された日付は残し、次回の送信で最新の値を送る
+            PricePush.objects.filter(id__in=[push.id for push in chunk], enqueued_at__lte=started_at).delete()
+            result['dates'] += len(chunk)
+    return result
+
+
+def _schedule_retry(pushes: List[PricePush], error: str) -> None:
+    now = timezone.now()
+    for push in pushes:
+        push.attempts += 1
+        push.next_attempt_at = now + min(BACKOFF_BASE * (2 ** (push.attempts - 1)), BACKOFF_MAX)
+        push.last_error = error[:1000]
+    PricePush.objects.bulk_update(pushes, ['attempts', 'next_attempt_at', 'last_error'])
+
+
+def set_room_dates(property_obj: Property, rates: Dict[date, object]) -> Dict:
+    """
+    Beds24 JSON API `setRoomDates` で日別の料金（p1）・最小宿泊数（m）と、
+    販売停止（o: ブラックアウト・予約不可の日は OVERRIDE_BLACKOUT、それ以外は解除）を設定する。
+    rates は {date: EffectiveValues}。
+
+    必要な設定:
+    - settings.BEDS24_API_KEY
+    - Property.beds24_property_key / Property.room_id
+    """
+    api_key = getattr(settings, 'BEDS24_API_KEY', None)
+    if not api_key or not property_obj.beds24_property_key or not property_obj.room_id:
+        raise Beds24PushError('Beds24 API認証情報が不足しています (APIKEY / propKey / roomId)')
+
+    payload = {
+        'authentication': {
+            'apiKey': api_key,
+            'propKey': property_obj.beds24_property_key,
+        },
+        'roomId': str(property_obj.room_id),
+        'dates': {
+            rate_date.strftime('%Y%m%d'): {
+                'p1': f"{rate.price:.2f}".rstrip('0').rstrip('.'),
+                'm': str(rate.min_nights),
+                'o': OVERRIDE_NONE if rate.available else OVERRIDE_BLACKOUT,
+            }
+            for rate_date, rate in sorted(rates.items())
+        },
+    }
+    url = f"{settings.BEDS24_JSON_API_URL.rstrip('/')}/setRoomDates"
+    try:
+        resp = requests.post(url, json=payload, timeout=30)
+        resp.raise_for_status()
+        data = resp.json()
+    except (requests.exceptions.RequestException, ValueError) as exc:
+        raise Beds24PushError(str(exc)) from exc
+    # Beds24はエラー時に{"error":"..."}を返す場合がある
+    if isinstance(data, dict) and data.get('error'):
+        raise Beds24PushError(f"Beds24 API error: {data.get('error')}")
+    return data
@@ -2,21 +2,23 @@
 """
 Beds24から日別料金データを取得し、データベースに同期するサービス。
 """
-import requests
 import csv
+import os
+import uuid
+import requests
 from datetime import date, timedelta
-import csv
 from io import StringIO
 from decimal import Decimal, InvalidOperation
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
 from guest_forms.models import Property
-from .models_pricing import DailyRate
-from django.conf import settings
-import requests
-from datetime import date, timedelta
+from .cache import bump_tags, rates_tag
+from .models_pricing import DailyRate, DailyRateRawArchive
+from .services_rate_ranges import rebuild_rate_ranges
+from .services_effective_rates import refresh_effective_rates
 
 
 def fetch_beds24_daily_price_setup(prop_key: str, start: date, end: date, room_id: int | None = None):
@@ -65,7 +67,7 @@ def fetch_beds24_daily_price_setup(prop_key: str, start: date, end: date, room_i
     return data
 
 
-def sync_daily_rates_from_beds24(property_obj, start: date, end: date):
+def sync_daily_rates_from_beds24(property_obj, start: date, end: date, sync_run=None):
     """
     Beds24の日別料金設定を`DailyRate`に反映。
     `getDailyPriceSetup`のレスポンスを日付ごとにマッピングして保存。
@@ -94,7 +96,8 @@ def sync_daily_rates_from_beds24(property_obj, start: date, end: date):
     except AttributeError:
         items = []
 
-    saved = 0
+    rows = []
+    raw_by_date = {}
     for it in items:
         d = it.get('date')
         price = it.get('price') or it.get('basePrice')
@@ -104,22 +107,26 @@ def sync_daily_rates_from_beds24(property_obj, start: date, end: date):
             available = True
 
         try:
-            obj, _created = DailyRate.objects.update_or_create(
-                property=property_obj,
-                date=d,
-                defaults={
-                    'base_price': price,
-                    'min_stay': int(min_stay) if min_stay else 1,
-                    'available': bool(available),
-                    'beds24_data': it,
-                }
-            )
-            saved += 1
-        except Exception:
+            rate_date = _coerce_date(d)
+            rows.append({
+                'date': rate_date,
+                'base_price': price,
+                'min_stay': int(min_stay) if min_stay else 1,
+                'available': bool(available),
+            })
+        except (TypeError, ValueError):
             # 個別の不整合はスキップ（ログは不要: 管理コマンド側で概要表示）
             continue
+        raw_by_date[rate_date.isoformat()] = it
 
-    return {'count': saved, 'from': start.isoformat(), 'to': end.isoformat()}
+    counts = apply_daily_rates(property_obj, rows)
+    archive_raw_rates(property_obj, DailyRateRawArchive.Source.JSON, raw_by_date, start, end, sync_run=sync_run)
+    return {
+        'count': counts['created'] + counts['updated'] + counts['unchanged'],
+        **counts,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+    }
 
 
 def fetch_beds24_room_daily_csv(prop_key: str, start: date, end: date, room_id: int | None = None):
@@ -162,7 +169,7 @@ def fetch_beds24_room_daily_csv(prop_key: str, start: date, end: date, room_id:
     return csv_text
 
 
-def sync_daily_rates_from_beds24_csv(property_obj, start: date, end: date):
+def sync_daily_rates_from_beds24_csv(property_obj, start: date, end: date, sync_run=None):
     """
     Beds24のCSV形式日別料金データを`DailyRate`に反映。
     
@@ -185,7 +192,8 @@ def sync_daily_rates_from_beds24_csv(property_obj, start: date, end: date):
 
     # CSVをパース
     reader = csv.DictReader(StringIO(csv_text))
-    saved = 0
+    rows = []
+    raw_by_date = {}
     
     for row in reader:
         # 柔軟なカラム名対応（大文字小文字、スペース、アンダースコアなど）
@@ -234,22 +242,27 @@ def sync_daily_rates_from_beds24_csv(property_obj, start: date, end: date):
             available = True
         
         try:
-            obj, _created = DailyRate.objects.update_or_create(
-                property=property_obj,
-                date=d,
-                defaults={
-                    'base_price': price,
-                    'min_stay': min_stay,
-                    'available': available,
-                    'beds24_data': dict(row),  # 元データを保存
-                }
-            )
-            saved += 1
-        except Exception:
+            rate_date = _coerce_date(d)
+            rows.append({
+                'date': rate_date,
+                'base_price': price,
+                'min_stay': min_stay,
+                'available': available,
+            })
+        except (TypeError, ValueError):
             # 個別の不整合はスキップ
             continue
+        raw_by_date[rate_date.isoformat()] = dict(row)  # 元データを保存
 
-    return {'count': saved, 'from': start.isoformat(), 'to': end.isoformat(), 'format': 'csv'}
+    counts = apply_daily_rates(property_obj, rows)
+    archive_raw_rates(property_obj, DailyRateRawArchive.Source.CSV, raw_by_date, start, end, sync_run=sync_run)
+    return {
+        'count': counts['created'] + counts['updated'] + counts['unchanged'],
+        **counts,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'format': 'csv',
+    }
 
 
 class Beds24PricingError(Exception):
@@ -372,44 +385,181 @@ def _parse_rates_csv(csv_text: str, start_date: date, end_date: date) -> List[Di
 def sync_rates_to_db(
     property_obj: Property,
     rates: List[Dict],
+    sync_run=None,
 ) -> Dict[str, int]:
     """
     取得した料金データをデータベースに同期。
+    生データ（raw_data）は DailyRateRawArchive にまとめて保存する。
     
     Args:
         property_obj: 施設オブジェクト
         rates: fetch_beds24_rates()で取得した料金リスト
+        sync_run: 同期実行ID（同じ実行の全施設で共有する場合に指定）
         
     Returns:
-        {'created': int, 'updated': int} - 作成・更新件数
+        {'created': int, 'updated': int, 'unchanged': int} - 作成・更新・変更なし件数
     """
-    created_count = 0
-    updated_count = 0
-    
-    for rate_data in rates:
-        defaults = {
+    rows = [
+        {
+            'date': rate_data['date'],
             'base_price': rate_data.get('price'),
             'available': rate_data.get('available', True),
             'min_stay': rate_data.get('min_stay', 1),
-            'beds24_data': rate_data.get('raw_data'),
         }
-        
-        obj, created = DailyRate.objects.update_or_create(
-            property=property_obj,
-            date=rate_data['date'],
-            defaults=defaults
+        for rate_data in rates
+    ]
+    counts = apply_daily_rates(property_obj, rows)
+
+    if rates:
+        raw_by_date = {r['date'].isoformat(): r.get('raw_data') for r in rates}
+        archive_raw_rates(
+            property_obj,
+            DailyRateRawArchive.Source.RATES_CSV,
+            raw_by_date,
+            min(r['date'] for r in rates),
+            max(r['date'] for r in rates),
+            sync_run=sync_run,
         )
+    return counts
+
+
+def apply_daily_rates(property_obj: Property, rows: Iterable[Dict]) -> Dict[str, int]:
+    """
+    日別料金を差分のみ書き込む。
+
+    対象期間の既存 `(date, base_price, min_stay, available)` を1クエリで読み込み、
+    取得データと比較して新規行は bulk_create、値が変わった行のみ bulk_update する。
+    同じ値の行には書き込まないため、updated_at も変わらない。
+    書き込みがあった場合は同じ期間の RateRange と実効料金を再構築し、料金キャッシュを無効化する。
+
+    Args:
+        property_obj: 施設オブジェクト
+        rows: {'date', 'base_price', 'min_stay', 'available'} の辞書
         
-        if created:
-            created_count += 1
-        else:
-            updated_count += 1
-    
-    return {
-        'created': created_count,
-        'updated': updated_count,
+    Returns:
+        {'created': int, 'updated': int, 'unchanged': int}
+    """
+    incoming: Dict[date, Dict] = {}
+    for row in rows:
+        # 同じ日付が複数回返ってきた場合は後勝ち
+        incoming[row['date']] = {
+            'base_price': _normalize_price(row.get('base_price')),
+            'min_stay': int(row.get('min_stay') or 1),
+            'available': bool(row.get('available', True)),
+        }
+
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+    if not incoming:
+        return counts
+
+    existing = {
+        rate_date: (pk, (base_price, min_stay, available))
+        for rate_date, pk, base_price, min_stay, available in DailyRate.objects.filter(
+            property=property_obj,
+            date__range=(min(incoming), max(incoming)),
+        ).values_list('date', 'pk', 'base_price', 'min_stay', 'available')
     }
 
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for rate_date, values in incoming.items():
+        current = existing.get(rate_date)
+        if current is None:
+            to_create.append(DailyRate(property=property_obj, date=rate_date, **values))
+            continue
+
+        pk, current_values = current
+        if current_values == (values['base_price'], values['min_stay'], values['available']):
+            counts['unchanged'] += 1
+            continue
+
+        to_update.append(DailyRate(pk=pk, property=property_obj, date=rate_date, updated_at=now, **values))
+
+    if to_create or to_update:
+        with transaction.atomic():
+            if to_create:
+                DailyRate.objects.bulk_create(to_create, batch_size=500)
+            if to_update:
+                DailyRate.objects.bulk_update(
+                    to_update,
+                    ['base_price', 'min_stay', 'available', 'updated_at'],
+                    batch_size=500,
+                )
+            rebuild_rate_ranges(property_obj, min(incoming), max(incoming))
+            refresh_effective_rates(property_obj, min(incoming), max(incoming))
+        bump_tags(rates_tag(property_obj.id))
+
+    counts['created'] = len(to_create)
+    counts['updated'] = len(to_update)
+    return counts
+
+
+def archive_raw_rates(
+    property_obj: Property,
+    source: str,
+    raw_by_date: Dict[str, Dict],
+    start: date,
+    end: date,
+    sync_run=None,
+) -> Optional[DailyRateRawArchive]:
+    """
+    Beds24の生データを1同期実行・1施設あたり1行の圧縮アーカイブとして保存する。
+
+    Args:
+        raw_by_date: {"YYYY-MM-DD": 元データ}
+        sync_run: 同期実行ID（未指定なら新規採番）
+    """
+    if not raw_by_date:
+        return None
+
+    archive = DailyRateRawArchive(
+        property=property_obj,
+        source=source,
+        start_date=start,
+        end_date=end,
+        row_count=len(raw_by_date),
+        payload=DailyRateRawArchive.compress(raw_by_date),
+    )
+    if sync_run is not None:
+        archive.sync_run = sync_run
+    archive.save()
+    return archive
+
+
+def find_raw_rate(property_obj: Property, rate_date: date) -> Optional[Dict]:
+    """
+    デバッグ用: 指定日の最新の生データを返す（見つからなければ None）。
+    """
+    archives = DailyRateRawArchive.objects.filter(
+        property=property_obj,
+        start_date__lte=rate_date,
+        end_date__gte=rate_date,
+    ).order_by('-fetched_at')
+
+    key = rate_date.isoformat()
+    for archive in archives.iterator():
+        rows = archive.load_rows()
+        if key in rows:
+            return rows[key]
+    return None
+
+
+def _coerce_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip())
+
+
+def _normalize_price(value) -> Optional[Decimal]:
+    """DBの DecimalField(decimal_places=2) と比較できる形に揃える。"""
+    if value is None or value == '':
+        return None
+    try:
+        return Decimal(str(value).replace(',', '')).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None
+
 
 def fetch_and_sync_all_properties_rates(
     start_date: date,
@@ -426,13 +576,14 @@ def fetch_and_sync_all_properties_rates(
         施設ごとの同期結果 {'property_name': {'created': int, 'updated': int, 'error': str}}
     """
     results = {}
+    sync_run = uuid.uuid4()
     
     properties = Property.objects.exclude(room_id__isnull=True)
     
     for prop in properties:
         try:
             rates = fetch_beds24_rates(prop.room_id, start_date, end_date)
-            sync_result = sync_rates_to_db(prop, rates)
+            sync_result = sync_rates_to_db(prop, rates, sync_run=sync_run)
             results[prop.name] = sync_result
         except Beds24PricingError as e:
             results[prop.name] = {'error': str(e)}
@@ -0,0 +1,150 @@
+# reservations/services_quote.py
+"""
+宿泊料金の見積もりサービス。
+
+1泊ごとの料金は以下の優先順で決まる:
+1. PricingRule.price（ローカルの日別上書き）
+2. RecurringPricingRule.price（曜日・シーズン・祝日の繰り返しルール、優先度順）
+3. DailyRate.base_price（Beds24の日別料金）
+4. Property.base_price（施設の基本料金）
+解決済みの値は実効料金テーブル（services_effective_rates）から読み込む。
+
+人数加算は Property.base_guests を超えた人数に対して、大人から先に基本人数へ割り当て、
+超過分に adult_extra_price / child_extra_price を1泊ごとに加算する。
+見積もりは施設の料金タグ（cache.rates_tag）付きでキャッシュし、料金データ変更時に無効化する。
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+
+from guest_forms.models import Property
+from .cache import make_key, rates_tag, tag_versions
+from .services_effective_rates import load_effective_rates
+
+QUOTE_CACHE_TIMEOUT = 60 * 60
+MAX_QUOTE_NIGHTS = 90
+
+
+class QuoteError(ValueError):
+    """見積もり条件が不正な場合に送出される"""
+
+
+def quote_stay(property_obj: Property, check_in: date, check_out: date, adults: int, children: int = 0) -> Dict:
+    """1施設の見積もりを返す。"""
+    return quote_properties([property_obj], check_in, check_out, adults, children)[0]
+
+
+def quote_properties(
+    properties: List[Property],
+    check_in: date,
+    check_out: date,
+    adults: int,
+    children: int = 0,
+) -> List[Dict]:
+    """
+    複数施設の見積もりをまとめて計算する（検索ページ用）。
+    キャッシュにない施設分だけ、実効料金（EffectiveRate）を1クエリで読み込む。
+    """
+    _validate_request(check_in, check_out, adults, children)
+
+    params = {
+        'check_in': check_in.isoformat(),
+        'check_out': check_out.isoformat(),
+        'adults': adults,
+        'children': children,
+    }
+    versions = tag_versions(rates_tag(prop.id) for prop in properties)
+    keys = {
+        prop.id: make_key('quote', {**params, 'property_id': prop.id}, [rates_tag(prop.id)], versions=versions)
+        for prop in properties
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    missing = [prop for prop in properties if keys[prop.id] not in cached]
+    if missing:
+        computed = _compute_quotes(missing, check_in, check_out, adults, children)
+        cache.set_many({keys[prop_id]: quote for prop_id, quote in computed.items()}, QUOTE_CACHE_TIMEOUT)
+        cached.update({keys[prop_id]: quote for prop_id, quote in computed.items()})
+
+    return [cached[keys[prop.id]] for prop in properties]
+
+
+def _validate_request(check_in: date, check_out: date, adults: int, children: int) -> None:
+    if check_out <= check_in:
+        raise QuoteError("check_out は check_in より後の日付を指定してください")
+    if (check_out - check_in).days > MAX_QUOTE_NIGHTS:
+        raise QuoteError(f"宿泊数は{MAX_QUOTE_NIGHTS}泊以内で指定してください")
+    if adults < 1 or children < 0:
+        raise QuoteError("adults は1以上、children は0以上を指定してください")
+
+
+def _compute_quotes(
+    properties: List[Property],
+    check_in: date,
+    check_out: date,
+    adults: int,
+    children: int,
+) -> Dict[int, Dict]:
+    num_nights = (check_out - check_in).days
+    last_night = check_out - timedelta(days=1)
+    nights = [check_in + timedelta(days=i) for i in range(num_nights)]
+    effective = load_effective_rates(properties, check_in, last_night)
+
+    return {
+        prop.id: _build_quote(prop, nights, [effective[prop.id][night] for night in nights], adults, children)
+        for prop in properties
+    }
+
+
+def _build_quote(prop, nights, rates, adults, children) -> Dict:
+    base_prices = [rate.price for rate in rates]
+    blackout = [not rate.available for rate in rates]
+
+    extra_adults = max(0, adults - prop.base_guests)
+    extra_children = max(0, children - max(0, prop.base_guests - adults))
+    extra_per_night = Decimal(extra_adults * prop.adult_extra_price + extra_children * prop.child_extra_price)
+    night_totals = [price + extra_per_night for price in base_prices]
+
+    min_nights = rates[0].min_nights
+
+    errors = []
+    blackout_dates = [night.isoformat() for night, blocked in zip(nights, blackout) if blocked]
+    if blackout_dates:
+        errors.append({'code': 'blackout', 'dates': blackout_dates})
+    if len(nights) < min_nights:
+        errors.append({'code': 'min_nights', 'min_nights': min_nights})
+    if prop.capacity and adults + children > prop.capacity:
+        errors.append({'code': 'capacity', 'capacity': prop.capacity})
+
+    return {
+        'property_id': prop.id,
+        'property_name': prop.name,
+        'check_in': nights[0].isoformat(),
+        'check_out': (nights[-1] + timedelta(days=1)).isoformat(),
+        'nights': len(nights),
+        'adults': adults,
+        'children': children,
+        'extra_adults': extra_adults,
+        'extra_children': extra_children,
+        'nightly': [
+            {
+                'date': night.isoformat(),
+                'base_price': _as_number(base),
+                'extra_price': _as_number(extra_per_night),
+                'price': _as_number(total),
+            }
+            for night, base, total in zip(nights, base_prices, night_totals)
+        ],
+        'total': _as_number(sum(night_totals, Decimal(0))),
+        'min_nights': min_nights,
+        'bookable': not errors,
+        'errors': errors,
+    }
+
+
+def _as_number(value: Optional[Decimal]):
+    if value is None:
+        return None
+    return int(value) if value == value.to_integral_value() else float(value)
@@ -0,0 +1,109 @@
+# reservations/services_rate_ranges.py
+"""
+日別料金（DailyRate）をランレングス圧縮した期間料金（RateRange）を維持・参照するサービス。
+
+料金は数週間単位で同じ値が続くため、(施設, 開始日, 終了日, 料金, 最小宿泊数, 空室) の
+期間行にまとめると行数が大幅に減り、1年分のカレンダーも数十行の読み込みで済む。
+DailyRate の変更時に該当期間を再構築する（一括取り込みは services_pricing、
+個別の保存・削除は signals から rebuild_rate_ranges() を呼ぶ）。再構築時は重なる期間を分割し、
+同じ値で隣接する期間は結合する。
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from guest_forms.models import Property
+from .models_pricing import DailyRate, RateRange
+
+ONE_DAY = timedelta(days=1)
+
+# (base_price, min_stay, available)
+RateValues = Tuple[Optional[Decimal], int, bool]
+# (start_date, end_date, values)
+Run = Tuple[date, date, RateValues]
+
+
+def compress_daily_rates(rows: Iterable[Tuple[date, Optional[Decimal], int, bool]]) -> List[Run]:
+    """
+    日付順の (date, base_price, min_stay, available) を、値が同じ連続日ごとの期間にまとめる。
+    日付が飛んでいる箇所では期間を区切る。
+    """
+    runs: List[Run] = []
+    for rate_date, base_price, min_stay, available in rows:
+        values = (base_price, min_stay, available)
+        if runs:
+            start, end, current = runs[-1]
+            if current == values and end + ONE_DAY == rate_date:
+                runs[-1] = (start, rate_date, current)
+                continue
+        runs.append((rate_date, rate_date, values))
+    return runs
+
+
+def rebuild_rate_ranges(property_obj: Property, start: date, end: date) -> int:
+    """
+    指定期間の DailyRate から RateRange を再構築する。期間外にはみ出す既存行は分割して残す。
+
+    Returns:
+        期間内に作成された期間行の数
+    """
+    rows = DailyRate.objects.filter(
+        property=property_obj,
+        date__range=(start, end),
+    ).order_by('date').values_list('date', 'base_price', 'min_stay', 'available')
+    runs = compress_daily_rates(rows)
+    _splice(property_obj, start, end, runs)
+    return len(runs)
+
+
+def rate_ranges_between(property_obj: Property, start: date, end: date) -> List[RateRange]:
+    """指定期間に重なる期間料金を開始日順に返す。"""
+    return list(RateRange.objects.filter(
+        property=property_obj,
+        start_date__lte=end,
+        end_date__gte=start,
+    ).order_by('start_date'))
+
+
+def _splice(property_obj: Property, start: date, end: date, runs: List[Run]) -> None:
+    """[start, end] の期間行を runs で置き換え、境界で分割・結合する。"""
+    with transaction.atomic():
+        # 隣接する期間も結合対象にするため1日広げて取得
+        touching = list(RateRange.objects.select_for_update().filter(
+            property=property_obj,
+            start_date__lte=end + ONE_DAY,
+            end_date__gte=start - ONE_DAY,
+        ))
+
+        segments: List[Run] = list(runs)
+        for rate_range in touching:
+            values = (rate_range.base_price, rate_range.min_stay, rate_range.available)
+            if rate_range.start_date < start:
+                segments.append((rate_range.start_date, min(rate_range.end_date, start - ONE_DAY), values))
+            if rate_range.end_date > end:
+                segments.append((max(rate_range.start_date, end + ONE_DAY), rate_range.end_date, values))
+
+        merged: List[Run] = []
+        for seg_start, seg_end, values in sorted(segments, key=lambda seg: seg[0]):
+            if merged:
+                prev_start, prev_end, prev_values = merged[-1]
+                if prev_values == values and prev_end + ONE_DAY == seg_start:
+                    merged[-1] = (prev_start, seg_end, values)
+                    continue
+            merged.append((seg_start, seg_end, values))
+
+        if touching:
+            RateRange.objects.filter(pk__in=[r.pk for r in touching]).delete()
+        RateRange.objects.bulk_create([
+            RateRange(
+                property=property_obj,
+                start_date=seg_start,
+                end_date=seg_end,
+                base_price=values[0],
+                min_stay=values[1],
+                available=values[2],
+            )
+            for seg_start, seg_end, values in merged
+        ])
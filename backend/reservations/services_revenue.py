@@ -0,0 +1,283 @@
+# reservations/services_revenue.py
+"""
+月別売上集計（MonthlyRevenueRollup）の維持と、売上レポートの集計。
+
+集計キーは (施設, チェックイン月, 予約ステータス)。予約が変わったら、変更前後の
+(施設, 月) だけを予約テーブルから再集計して差し替える。全件の作り直しは
+rebuild_revenue_rollup コマンドで行う。
+売上レポートは日付ディメンションを起点に集計し、売上のない月も SQL から0で返す。
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, FilteredRelation, Q, QuerySet, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, NullIf, TruncMonth
+
+from .models import MonthlyRevenueRollup, Reservation, ReservationNight
+from .models_calendar import DateDimension
+from .response_cache import invalidate_analytics_cache
+from .services_calendar import fiscal_month_of, fiscal_year_bounds, fiscal_year_of, month_count, with_dimension
+
+# 売上として集計する予約ステータス
+REVENUE_STATUSES = ['Confirmed', 'New']
+
+# 売上の計上方法（monthly_revenue を参照）
+ALLOCATION_CHECK_IN = 'check_in'
+ALLOCATION_NIGHT = 'night'
+ALLOCATIONS = (ALLOCATION_CHECK_IN, ALLOCATION_NIGHT)
+
+# 1回の再集計クエリで扱う (施設, 月) の最大数
+_KEY_BATCH_SIZE = 200
+
+RollupKey = Tuple[int, date]
+
+# compare_fiscal_years の group_by と monthly_revenue(by_property=True) の行のキーの対応
+COMPARISON_GROUPS = {
+    None: None,
+    'property': 'property_name',
+    'management_type': 'management_type',
+}
+
+# 日付ディメンションに結合する集計元: (モデル, ディメンションからの関連名, 金額の列)
+_DIMENSION_SOURCES = {
+    'rollup': (MonthlyRevenueRollup, 'revenue_rollups', 'revenue'),
+    'night': (ReservationNight, 'reservation_nights', 'revenue'),
+    'reservation': (Reservation, 'check_in_reservations', 'total_price'),
+}
+
+# CSV出力で先に並べる管理形態
+MANAGEMENT_TYPE_ORDER = ['自社', '受託']
+
+# 会計月（3月=1 〜 2月=12）の表示ラベル
+FISCAL_MONTH_LABELS = [f"{(i + 2) % 12 + 1}月" for i in range(12)]
+
+
+def monthly_revenue(
+    start: date,
+    end: date,
+    allocation: str = ALLOCATION_CHECK_IN,
+    property_name: Optional[str] = None,
+    management_type: Optional[str] = None,
+    by_property: bool = False,
+    fiscal_years: Optional[Iterable[int]] = None,
+) -> List[Dict]:
+    """
+    start〜end の月別売上を、日付ディメンション（DateDimension）を起点に1回のグループ集計で返す。
+    集計元はディメンションに LEFT JOIN するため、売上のない月も total=0 の行として含まれる。
+
+    allocation:
+    - 'check_in': 予約の合計料金をチェックイン月に計上（月単位の期間は月別売上集計、それ以外は予約を読む）
+    - 'night': 宿泊日ごとの按分売上を宿泊日の月に計上（ReservationNight を読む）
+    by_property: 施設ごとに分ける（行に property_id / property_name / management_type が入る。
+        売上のない月の行は property_id が None）。行は管理形態（自社 → 受託 → その他の名前順）・施設名・月の順
+    fiscal_years: 期間内の会計年度をさらに絞り込む（飛び飛びの年度を比較する場合）
+    期間に日付ディメンションが作成されていない月があれば DateDimensionError を送出する。
+
+    Returns:
+        [{'month_start': date, 'fiscal_year': 2025, 'fiscal_month': 1, 'total': Decimal, ...}, ...]
+    """
+    if allocation == ALLOCATION_NIGHT:
+        source = 'night'
+    elif start.day == 1 and (end + timedelta(days=1)).day == 1:
+        source = 'rollup'
+    else:
+        source = 'reservation'
+    model, relation, amount = _DIMENSION_SOURCES[source]
+
+    condition = Q(**{f'{relation}__status__in': REVENUE_STATUSES})
+    if property_name or management_type:
+        # FilteredRelation の条件では施設を結合できないため、集計元の ID で絞り込む
+        facts = model.objects.all()
+        if property_name:
+            facts = facts.filter(property__name=property_name)
+        if management_type:
+            facts = facts.filter(property__management_type=management_type)
+        condition &= Q(**{f'{relation}__pk__in': Subquery(facts.order_by().values('pk'))})
+
+    days = DateDimension.objects.filter(date__range=(start, end))
+    if fiscal_years is not None:
+        fiscal_years = sorted(set(fiscal_years))
+        days = days.filter(fiscal_year__in=fiscal_years)
+        expected_months = 12 * len(fiscal_years)
+    else:
+        expected_months = month_count(start, end)
+    if source == 'rollup':
+        # 月別売上集計は月初日の行にだけ結合する
+        days = days.filter(date=F('month_start'))
+
+    fields = {}
+    ordering = ['month_start']
+    if by_property:
+        fields = {
+            'property_id': F('fact__property_id'),
+            'property_name': F('fact__property__name'),
+            'management_type': Coalesce(NullIf('fact__property__management_type', Value('')), Value('不明')),
+            'type_order': Case(
+                *[When(fact__property__management_type=name, then=Value(order)) for order, name in enumerate(MANAGEMENT_TYPE_ORDER)],
+                default=Value(len(MANAGEMENT_TYPE_ORDER)),
+            ),
+        }
+        ordering = ['type_order', 'management_type', 'property_name', 'month_start']
+
+    def run_query():
+        return list(
+            days.annotate(fact=FilteredRelation(relation, condition=condition))
+            .values('month_start', 'fiscal_year', 'fiscal_month', **fields)
+            .annotate(total=Coalesce(Sum(f'fact__{amount}'), Value(Decimal(0)), output_field=DecimalField()))
+            .order_by(*ordering)
+        )
+
+    return with_dimension(run_query, expected_months)
+
+
+def compare_fiscal_years(
+    fiscal_years: Iterable[int],
+    property_name: Optional[str] = None,
+    management_type: Optional[str] = None,
+    group_by: Optional[str] = None,
+    allocation: str = ALLOCATION_CHECK_IN,
+) -> List[Dict]:
+    """
+    複数の会計年度の月別売上を1回のグループ集計で返す（月の並びは日付ディメンションから）。
+
+    group_by: None（合計のみ）/ 'property'（施設別）/ 'management_type'（管理形態別）
+    allocation: monthly_revenue() を参照
+
+    Returns:
+        [{'year': 2025, 'key': None または施設名・管理形態, 'monthly': [3月..2月の12要素], 'total': 年間合計}, ...]
+    """
+    fiscal_years = sorted(set(fiscal_years))
+    start, _ = fiscal_year_bounds(fiscal_years[0])
+    _, end = fiscal_year_bounds(fiscal_years[-1])
+    group_field = COMPARISON_GROUPS[group_by]
+    rows = monthly_revenue(
+        start, end, allocation, property_name, management_type,
+        by_property=group_field is not None, fiscal_years=fiscal_years,
+    )
+
+    if group_field is None:
+        # 月はディメンションから会計年度・会計月の順にそろって返る
+        return [
+            {
+                'year': year,
+                'key': None,
+                'monthly': [row['total'] for row in year_rows],
+                'total': sum((row['total'] for row in year_rows), Decimal(0)),
+            }
+            for year, year_rows in ((year, [row for row in rows if row['fiscal_year'] == year]) for year in fiscal_years)
+        ]
+
+    series = {}
+    for row in rows:
+        if row['property_id'] is None:
+            continue
+        key = row[group_field]
+        entry = series.setdefault((row['fiscal_year'], key), {
+            'year': row['fiscal_year'], 'key': key, 'monthly': [Decimal(0)] * 12, 'total': Decimal(0),
+        })
+        entry['monthly'][row['fiscal_month'] - 1] += row['total']
+        entry['total'] += row['total']
+    return sorted(series.values(), key=lambda entry: (entry['year'], entry['key'] or ''))
+
+
+def revenue_by_management_type(rows: Iterable[Dict]) -> List[Dict]:
+    """
+    monthly_revenue(by_property=True) の行を、月ごとの管理形態別売上（積み上げグラフ用）にまとめる。
+    期間内に売上のある管理形態は、すべての月に（売上がなければ0で）含める。
+
+    Returns:
+        [{'date': '2025-03', '自社': 300000, '受託': 0, 'total': 300000}, ...]
+    """
+    rows = list(rows)
+    management_types = {row['management_type'] for row in rows if row['property_id'] is not None}
+    months = {}
+    for row in sorted(rows, key=lambda row: row['month_start']):
+        month = months.setdefault(row['month_start'], {
+            'date': row['month_start'].strftime('%Y-%m'), **{name: Decimal(0) for name in management_types}, 'total': Decimal(0),
+        })
+        if row['property_id'] is not None:
+            month[row['management_type']] += row['total']
+            month['total'] += row['total']
+    return list(months.values())
+
+
+def rollup_keys(reservations) -> Set[RollupKey]:
+    """
+    予約が属する (施設, チェックイン月) の集合を返す。
+    予約IDのリストまたはクエリセットを受け取る（更新前後の両方で呼び、両方を再集計する）。
+    """
+    if not isinstance(reservations, QuerySet):
+        reservations = list(reservations)
+        if not reservations:
+            return set()
+        reservations = Reservation.objects.filter(id__in=reservations)
+    return {
+        (property_id, check_in.replace(day=1))
+        for property_id, check_in in reservations.values_list('property_id', 'check_in_date')
+    }
+
+
+def refresh_revenue_rollup(keys: Iterable[RollupKey]) -> int:
+    """指定した (施設, 月) の集計を予約テーブルから作り直す。作成した集計行数を返す。"""
+    keys = sorted(set(keys))
+    created = 0
+    for offset in range(0, len(keys), _KEY_BATCH_SIZE):
+        batch = keys[offset:offset + _KEY_BATCH_SIZE]
+        reservation_filter = Q()
+        rollup_filter = Q()
+        for property_id, month in batch:
+            reservation_filter |= Q(property_id=property_id, check_in_date__range=(month, _month_end(month)))
+            rollup_filter |= Q(property_id=property_id, month=month)
+
+        rows = _build_rows(Reservation.objects.filter(reservation_filter))
+        with transaction.atomic():
+            MonthlyRevenueRollup.objects.filter(rollup_filter).delete()
+            MonthlyRevenueRollup.objects.bulk_create(rows, batch_size=1000)
+        created += len(rows)
+    return created
+
+
+def rebuild_revenue_rollup() -> int:
+    """全予約から集計を作り直す。作成した集計行数を返す。"""
+    rows = _build_rows(Reservation.objects.all())
+    with transaction.atomic():
+        MonthlyRevenueRollup.objects.all().delete()
+        MonthlyRevenueRollup.objects.bulk_create(rows, batch_size=1000)
+    invalidate_analytics_cache()
+    return len(rows)
+
+
+def _build_rows(reservations):
+    """予約のクエリセットを (施設, 月, ステータス) で1クエリに集計し、集計行を作る。"""
+    aggregated = (
+        reservations
+        .annotate(month=TruncMonth('check_in_date'), status_key=Coalesce('status', Value('')))
+        .values('property_id', 'month', 'status_key')
+        .annotate(
+            revenue=Coalesce(Sum('total_price'), Decimal('0')),
+            booking_count=Count('id'),
+            guest_count=Coalesce(Sum('num_guests'), 0),
+        )
+        .order_by()
+    )
+    return [
+        MonthlyRevenueRollup(
+            property_id=row['property_id'],
+            month=row['month'],
+            fiscal_year=fiscal_year_of(row['month']),
+            fiscal_month=fiscal_month_of(row['month']),
+            status=row['status_key'],
+            revenue=row['revenue'],
+            booking_count=row['booking_count'],
+            guest_count=row['guest_count'],
+        )
+        for row in aggregated
+    ]
+
+
+def _month_end(month: date) -> date:
+    if month.month == 12:
+        return date(month.year, 12, 31)
+    return date(month.year, month.month + 1, 1) - timedelta(days=1)
@@ -0,0 +1,168 @@
+# reservations/services_roster.py
+"""
+名簿提出状況の一覧（roster-status / pending-rosters）のページ分割と行の整形。
+
+一覧はチェックイン日・予約IDの順に並べ、前のページの最後の行の (チェックイン日, ID) より
+後ろだけを読むキーセット方式でページを分割する。OFFSET を使わないため、予約の履歴が
+増えても1ページの取得にかかる時間は変わらない。行はモデルを作らず values_list() の
+タプルから組み立てる。総件数は ?count=true のときだけ（並び替えなしの COUNT で）数える。
+"""
+import base64
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+from guest_forms.models import GuestSubmission
+
+# 1ページの既定の件数と上限
+ROSTER_PAGE_SIZE = 50
+MAX_ROSTER_PAGE_SIZE = 200
+
+# 一覧の行に読み込む列
+ROSTER_COLUMNS = [
+    'id',
+    'beds24_book_id',
+    'property_id',
+    'property__name',
+    'property__slug',
+    'guest_name',
+    'guest_email',
+    'check_in_date',
+    'check_out_date',
+    'num_guests',
+    'total_price',
+    'guest_roster_status',
+    'created_at',
+    'guestsubmission__id',
+    'guestsubmission__token',
+    'guestsubmission__status',
+    'guestsubmission__updated_at',
+]
+
+
+class RosterPageError(Exception):
+    """ページ指定（cursor / limit）が不正な場合に送出される"""
+
+
+def encode_cursor(check_in_date: date, reservation_id: int) -> str:
+    """ページの最後の行の (チェックイン日, 予約ID) を次ページのカーソル文字列にする。"""
+    raw = f"{check_in_date.isoformat()}:{reservation_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """encode_cursor() の逆変換。"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        check_in_date, reservation_id = raw.split(':')
+        return date.fromisoformat(check_in_date), int(reservation_id)
+    except ValueError:
+        raise RosterPageError("cursor が不正です")
+
+
+def page_limit(value: Optional[str]) -> int:
+    """?limit= の値（既定は ROSTER_PAGE_SIZE、1〜MAX_ROSTER_PAGE_SIZE）"""
+    if not value:
+        return ROSTER_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise RosterPageError("limit は整数で指定してください")
+    if not 0 < limit <= MAX_ROSTER_PAGE_SIZE:
+        raise RosterPageError(f"limit は1〜{MAX_ROSTER_PAGE_SIZE}で指定してください")
+    return limit
+
+
+def roster_page(
+    queryset: QuerySet,
+    cursor: Optional[str] = None,
+    limit: int = ROSTER_PAGE_SIZE,
+    descending: bool = False,
+    with_count: bool = False,
+) -> Dict:
+    """
+    予約の queryset から1ページ分の行を読む（count を含めても最大2クエリ）。
+
+    descending: チェックイン日の新しい順（既定は古い順）
+    with_count: 絞り込み条件に合う総件数も返す
+
+    Returns:
+        {'count': 総件数（with_count のときのみ）, 'next_cursor': 次ページのカーソル または None, 'rows': [ROSTER_COLUMNS のタプル, ...]}
+    """
+    page = {}
+    if with_count:
+        page['count'] = queryset.order_by().count()
+
+    if cursor:
+        check_in_date, reservation_id = decode_cursor(cursor)
+        if descending:
+            after = Q(check_in_date__lt=check_in_date) | Q(check_in_date=check_in_date, id__lt=reservation_id)
+        else:
+            after = Q(check_in_date__gt=check_in_date) | Q(check_in_date=check_in_date, id__gt=reservation_id)
+        queryset = queryset.filter(after)
+
+    ordering = ['-check_in_date', '-id'] if descending else ['check_in_date', 'id']
+    # 1行多く読み、次のページがあるかを判定する
+    rows = list(queryset.order_by(*ordering).values_list(*ROSTER_COLUMNS)[:limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    last = dict(zip(ROSTER_COLUMNS, rows[-1])) if rows else None
+    page['next_cursor'] = encode_cursor(last['check_in_date'], last['id']) if has_next else None
+    page['rows'] = rows
+    return page
+
+
+def roster_status_rows(rows: List[Tuple]) -> List[Dict]:
+    """名簿提出状況一覧（roster-status）の行を作る。"""
+    results = []
+    for values in rows:
+        row = dict(zip(ROSTER_COLUMNS, values))
+        results.append({
+            'id': row['id'],
+            'beds24_book_id': row['beds24_book_id'],
+            'property': {
+                'id': row['property_id'],
+                'name': row['property__name'],
+                'slug': row['property__slug'],
+            },
+            'guest_name': row['guest_name'],
+            'guest_email': row['guest_email'],
+            'check_in_date': row['check_in_date'].isoformat(),
+            'check_out_date': row['check_out_date'].isoformat() if row['check_out_date'] else None,
+            'num_guests': row['num_guests'],
+            'total_price': float(row['total_price']),
+            'roster_status': row['guest_roster_status'],
+            'submission': {
+                'id': row['guestsubmission__id'],
+                'token': str(row['guestsubmission__token']),
+                'status': row['guestsubmission__status'],
+                'submitted_at': row['guestsubmission__updated_at'].isoformat() if row['guestsubmission__status'] == GuestSubmission.SubmissionStatus.COMPLETED else None,
+            } if row['guestsubmission__id'] else None,
+            'created_at': row['created_at'].isoformat(),
+        })
+    return results
+
+
+def pending_roster_rows(rows: List[Tuple], today: date) -> List[Dict]:
+    """提出待ちの予約一覧（pending-rosters）の行を作る。"""
+    results = []
+    for values in rows:
+        row = dict(zip(ROSTER_COLUMNS, values))
+        token = row['guestsubmission__token']
+        results.append({
+            'id': row['id'],
+            'beds24_book_id': row['beds24_book_id'],
+            'property': {
+                'id': row['property_id'],
+                'name': row['property__name'],
+            },
+            'guest_name': row['guest_name'],
+            'guest_email': row['guest_email'],
+            'check_in_date': row['check_in_date'].isoformat(),
+            'num_guests': row['num_guests'],
+            'days_until_checkin': (row['check_in_date'] - today).days,
+            'submission_form_url': f"https://your-domain.com/submit-roster/{token}/" if row['guestsubmission__id'] else None,
+        })
+    return results
@@ -0,0 +1,86 @@
+# reservations/signals.py
+"""
+料金データの変更時に関連キャッシュを無効化し、実効料金（EffectiveRate）と期間料金（RateRange）を更新するシグナルハンドラ。
+ローカルでの料金編集（PricingRule / RecurringPricingRule）は Beds24 への送信キューにも登録する。
+予約・名簿提出の変更時には分析APIのレスポンスキャッシュを無効化する。
+bulk_create / bulk_update / QuerySet.update はシグナルを発火しないため、
+それらを使うサービス側では明示的に bump_tags() / refresh_effective_rates() / rebuild_rate_ranges() / enqueue_price_push() を呼ぶこと。
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from guest_forms.models import GuestSubmission, PricingRule, Property, RecurringPricingRule
+from .cache import bump_tags, rates_tag
+from .models import Reservation
+from .models_pricing import DailyRate, EffectiveRate
+from .response_cache import invalidate_analytics_cache
+from .services_effective_rates import refresh_effective_rates, refresh_effective_rates_for_property
+from .services_price_push import enqueue_price_push
+from .services_rate_ranges import rebuild_rate_ranges
+
+
+@receiver(pre_save, sender=DailyRate)
+def remember_previous_rate_date(sender, instance, **kwargs):
+    # 施設・日付を付け替える更新では、元の日付の期間料金と実効料金も作り直す
+    instance._previous_rate_key = (
+        DailyRate.objects.filter(pk=instance.pk).values_list('property_id', 'date').first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=DailyRate)
+@receiver([post_save, post_delete], sender=PricingRule)
+def invalidate_rates_for_rate_change(sender, instance, **kwargs):
+    bump_tags(rates_tag(instance.property_id))
+    if isinstance(kwargs.get('origin'), Property):
+        # 施設ごと削除される場合は期間料金・実効料金も CASCADE で消える
+        return
+    property_obj = Property.objects.filter(id=instance.property_id).first()
+    if property_obj is not None:
+        refresh_effective_rates(property_obj, instance.date, instance.date)
+        if sender is DailyRate:
+            rebuild_rate_ranges(property_obj, instance.date, instance.date)
+        else:
+            # ローカルでの編集のみ Beds24 へ送り返す（DailyRate は Beds24 由来）
+            enqueue_price_push(property_obj, [instance.date])
+
+    previous = getattr(instance, '_previous_rate_key', None)
+    if previous is not None and previous != (instance.property_id, instance.date):
+        bump_tags(rates_tag(previous[0]))
+        previous_property = Property.objects.filter(id=previous[0]).first()
+        if previous_property is not None:
+            refresh_effective_rates(previous_property, previous[1], previous[1])
+            rebuild_rate_ranges(previous_property, previous[1], previous[1])
+
+
+@receiver([post_save, post_delete], sender=RecurringPricingRule)
+def invalidate_rates_for_recurring_rule_change(sender, instance, **kwargs):
+    # 繰り返しルールの展開キャッシュを先に無効化してから再計算する
+    bump_tags(rates_tag(instance.property_id))
+    if isinstance(kwargs.get('origin'), Property):
+        return
+    property_obj = Property.objects.filter(id=instance.property_id).first()
+    if property_obj is not None:
+        refresh_effective_rates_for_property(property_obj)
+        enqueue_price_push(
+            property_obj,
+            EffectiveRate.objects.filter(property=property_obj, date__gte=timezone.localdate()).values_list('date', flat=True),
+        )
+
+
+@receiver(post_save, sender=Property)
+def invalidate_rates_for_property_change(sender, instance, created=False, **kwargs):
+    bump_tags(rates_tag(instance.id))
+    if not created:
+        refresh_effective_rates_for_property(instance)
+
+
+@receiver(post_delete, sender=Property)
+def invalidate_rates_for_property_delete(sender, instance, **kwargs):
+    bump_tags(rates_tag(instance.id))
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+@receiver([post_save, post_delete], sender=GuestSubmission)
+def invalidate_analytics_for_booking_change(sender, instance, **kwargs):
+    invalidate_analytics_cache()
@@ -0,0 +1,49 @@
+# reservations/streaming.py
+"""
+行を順に書き出すファイルダウンロード（StreamingHttpResponse）の共通処理。
+レスポンス全体をメモリに組み立てず、行ごとにエンコードして送る。
+"""
+import codecs
+import csv
+from typing import Dict, Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+class _Echo:
+    """csv.writer の書き込み先。書き込まれた文字列をそのまま返す。"""
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows: Iterable[list]) -> Iterator[bytes]:
+    """
+    行を CSV の bytes として1行ずつ返す。
+    Excel で文字化けしないよう、BOM はファイル先頭に1回だけ付ける。
+    """
+    writer = csv.writer(_Echo())
+    yield codecs.BOM_UTF8
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+def iter_ndjson(records: Iterable[Dict]) -> Iterator[bytes]:
+    """レコードを1行1JSON（NDJSON）の bytes として1行ずつ返す。"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for record in records:
+        yield (encoder.encode(record) + '\n').encode('utf-8')
+
+
+def stream_csv(rows: Iterable[list], filename: str) -> StreamingHttpResponse:
+    """行のイテラブルを CSV としてストリーミングで返す。"""
+    response = StreamingHttpResponse(iter_csv(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_ndjson(records: Iterable[Dict], filename: str) -> StreamingHttpResponse:
+    """レコードのイテラブルを NDJSON としてストリーミングで返す。"""
+    response = StreamingHttpResponse(iter_ndjson(records), content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,6 +1,41 @@
-from django.test import SimpleTestCase
+import csv
+import io
+import json
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+from unittest import mock
 
-from reservations.services import parse_beds24_csv
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from guest_forms.models import GuestSubmission, PricingRule, Property
+from reservations.models_pricing import DailyRate, DailyRateRawArchive, EffectiveRate, PricePush, RateRange
+from reservations.jp_holidays import holidays_of_year
+from reservations.models import AccommodationTax, BookingPaceSnapshot, DateDimension, MonthlyRevenueRollup, Reservation, ReservationNight, SyncStatus
+from reservations.services import parse_beds24_csv, sync_bookings_to_db
+from reservations.services_calendar import build_date_dimension
+from reservations.services_dashboard import _run_concurrently
+from reservations.services_effective_rates import find_inconsistencies, load_effective_rates, rebuild_effective_rates
+from reservations.services_occupancy import refresh_reservation_nights, search_available_properties
+from reservations.services_occupancy_metrics import occupancy_metrics
+from reservations.services_pace import take_pace_snapshot
+from reservations.services_price_push import MAX_DATES_PER_CALL, flush_price_pushes
+from reservations.services_pricing import apply_daily_rates, find_raw_rate, sync_daily_rates_from_beds24, sync_rates_to_db
+from reservations.services_quote import quote_properties, quote_stay
+from reservations.services_revenue import compare_fiscal_years, monthly_revenue, rebuild_revenue_rollup
+
+# クエリ数を数えるテストでは、キャッシュの読み書き（既定はDBのキャッシュテーブル）を数えないよう
+# ローカルメモリのキャッシュを使う
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
 
 
 class Beds24ParsingTests(SimpleTestCase):
@@ -31,3 +66,1029 @@ class Beds24ParsingTests(SimpleTestCase):
 		bookings = parse_beds24_csv(csv_text, include_cancelled=True, excluded_statuses={'Cancelled'})
 
 		self.assertEqual(bookings, [])
+
+
+class ApplyDailyRatesTests(TestCase):
+	def setUp(self):
+		self.prop = Property.objects.create(name='Villa', slug='villa')
+
+	def test_only_changed_rows_are_written(self):
+		rows = [
+			{'date': date(2025, 1, 1), 'base_price': 10000, 'min_stay': 1, 'available': True},
+			{'date': date(2025, 1, 2), 'base_price': '12000', 'min_stay': 2, 'available': True},
+		]
+		self.assertEqual(apply_daily_rates(self.prop, rows), {'created': 2, 'updated': 0, 'unchanged': 0})
+
+		rows[1] = {'date': date(2025, 1, 2), 'base_price': 13000.0, 'min_stay': 2, 'available': True}
+		counts = apply_daily_rates(self.prop, rows)
+
+		self.assertEqual(counts, {'created': 0, 'updated': 1, 'unchanged': 1})
+		self.assertEqual(DailyRate.objects.get(date=date(2025, 1, 2)).base_price, Decimal('13000.00'))
+
+	def test_unchanged_window_is_a_single_read(self):
+		rows = [{'date': date(2025, 1, 1), 'base_price': 10000, 'min_stay': 1, 'available': True}]
+		apply_daily_rates(self.prop, rows)
+
+		with self.assertNumQueries(1):
+			counts = apply_daily_rates(self.prop, rows)
+
+		self.assertEqual(counts, {'created': 0, 'updated': 0, 'unchanged': 1})
+
+
+class DailyRateGridTests(APITestCase):
+	def test_grid_is_columnar_and_single_query(self):
+		villa = Property.objects.create(name='Villa', slug='villa')
+		cabin = Property.objects.create(name='Cabin', slug='cabin')
+		DailyRate.objects.create(property=villa, date=date(2025, 1, 1), base_price=Decimal('8000'), min_stay=2)
+		DailyRate.objects.create(property=cabin, date=date(2025, 1, 2), base_price=Decimal('9500.50'), available=False)
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/daily-rates/grid/', {'start_date': '2025-01-01', 'end_date': '2025-01-03'})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data['dates'], ['2025-01-01', '2025-01-02', '2025-01-03'])
+		self.assertEqual([p['name'] for p in response.data['properties']], ['Cabin', 'Villa'])
+		self.assertEqual(response.data['price'], [[None, 9500.5, None], [8000, None, None]])
+		self.assertEqual(response.data['min_stay'], [[None, 1, None], [2, None, None]])
+		self.assertEqual(response.data['available'], [[None, False, None], [True, None, None]])
+
+
+class RateRangeTests(TestCase):
+	def setUp(self):
+		self.prop = Property.objects.create(name='Villa', slug='villa')
+
+	def _ranges(self):
+		return list(RateRange.objects.filter(property=self.prop).order_by('start_date').values_list(
+			'start_date', 'end_date', 'base_price'
+		))
+
+	def test_daily_sync_is_run_length_encoded(self):
+		rows = [
+			{'date': date(2025, 1, day), 'base_price': 8000 if day <= 20 else 12000, 'min_stay': 1, 'available': True}
+			for day in range(1, 32)
+		]
+		apply_daily_rates(self.prop, rows)
+
+		self.assertEqual(self._ranges(), [
+			(date(2025, 1, 1), date(2025, 1, 20), Decimal('8000.00')),
+			(date(2025, 1, 21), date(2025, 1, 31), Decimal('12000.00')),
+		])
+
+	def test_single_rate_edits_split_and_merge(self):
+		apply_daily_rates(self.prop, [
+			{'date': date(2025, 1, day), 'base_price': 8000, 'min_stay': 1, 'available': True} for day in range(1, 32)
+		])
+		# 管理画面・API・コマンドでの個別の保存もシグナルで期間料金に反映される
+		rates = {rate.date: rate for rate in DailyRate.objects.filter(property=self.prop)}
+		for day in (10, 11, 12):
+			rates[date(2025, 1, day)].base_price = Decimal('15000')
+			rates[date(2025, 1, day)].save()
+
+		self.assertEqual(self._ranges(), [
+			(date(2025, 1, 1), date(2025, 1, 9), Decimal('8000.00')),
+			(date(2025, 1, 10), date(2025, 1, 12), Decimal('15000.00')),
+			(date(2025, 1, 13), date(2025, 1, 31), Decimal('8000.00')),
+		])
+
+		for day in (10, 11, 12):
+			rates[date(2025, 1, day)].base_price = Decimal('8000')
+			rates[date(2025, 1, day)].save()
+		self.assertEqual(self._ranges(), [(date(2025, 1, 1), date(2025, 1, 31), Decimal('8000.00'))])
+
+		rates[date(2025, 1, 31)].date = date(2025, 2, 1)
+		rates[date(2025, 1, 31)].save()
+		rates[date(2025, 1, 15)].delete()
+		self.assertEqual(self._ranges(), [
+			(date(2025, 1, 1), date(2025, 1, 14), Decimal('8000.00')),
+			(date(2025, 1, 16), date(2025, 1, 30), Decimal('8000.00')),
+			(date(2025, 2, 1), date(2025, 2, 1), Decimal('8000.00')),
+		])
+
+	def test_ranges_endpoint_clips_to_the_period_and_rejects_bad_periods(self):
+		apply_daily_rates(self.prop, [
+			{'date': date(2025, 1, day), 'base_price': 8000, 'min_stay': 1, 'available': True} for day in range(1, 32)
+		])
+		url = '/api/daily-rates/ranges/'
+
+		response = self.client.get(url, {'property_id': self.prop.id, 'start_date': '2025-01-10', 'end_date': '2025-01-20'})
+		self.assertEqual(
+			[(row['start_date'], row['end_date']) for row in response.json()],
+			[('2025-01-10', '2025-01-20')],
+		)
+		# 逆順の期間・上限を超える期間は、期間行を返さず400
+		for start_date, end_date in [('2025-01-20', '2025-01-10'), ('2025-01-01', '2027-01-02')]:
+			response = self.client.get(url, {'property_id': self.prop.id, 'start_date': start_date, 'end_date': end_date})
+			self.assertEqual(response.status_code, 400)
+
+
+class RawRateArchiveTests(TestCase):
+	def setUp(self):
+		self.prop = Property.objects.create(name='Villa', slug='villa', beds24_property_key='villa-key')
+
+	def test_sync_archives_raw_rows_outside_daily_rate(self):
+		prices = [
+			{'date': '2025-01-01', 'price': 8000, 'minStay': 2, 'available': True, 'extra': 'a'},
+			{'date': '2025-01-02', 'price': 9000, 'minStay': 1, 'available': False, 'extra': 'b'},
+		]
+		with mock.patch(
+			'reservations.services_pricing.fetch_beds24_daily_price_setup',
+			return_value={'dailyPriceSetup': {'prices': prices}},
+		):
+			result = sync_daily_rates_from_beds24(self.prop, date(2025, 1, 1), date(2025, 1, 2))
+		self.assertEqual(result['created'], 2)
+
+		# DailyRate には整形済みの値だけを持ち、生データは同期1回につき1行のアーカイブに入る
+		self.assertEqual(
+			sorted(field.name for field in DailyRate._meta.concrete_fields),
+			['available', 'base_price', 'created_at', 'date', 'id', 'min_stay', 'property', 'updated_at'],
+		)
+		archive = DailyRateRawArchive.objects.get(property=self.prop)
+		self.assertEqual((archive.source, archive.row_count), ('json', 2))
+		self.assertEqual(find_raw_rate(self.prop, date(2025, 1, 2)), prices[1])
+		self.assertIsNone(find_raw_rate(self.prop, date(2025, 1, 3)))
+
+		# 後の同期の生データが優先され、その同期に含まれない日付は前のアーカイブから引ける
+		sync_rates_to_db(self.prop, [
+			{'date': date(2025, 1, 2), 'price': 9500, 'available': True, 'min_stay': 1, 'raw_data': {'price': '9500'}},
+		])
+		self.assertEqual(DailyRateRawArchive.objects.filter(property=self.prop).count(), 2)
+		self.assertEqual(find_raw_rate(self.prop, date(2025, 1, 2)), {'price': '9500'})
+		self.assertEqual(find_raw_rate(self.prop, date(2025, 1, 1)), prices[0])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StayQuoteTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.prop = Property.objects.create(
+			name='Villa', slug='villa', base_price=10000, base_guests=2,
+			adult_extra_price=3000, child_extra_price=1500, min_nights=2, capacity=6,
+		)
+
+	def test_nightly_breakdown_uses_rule_then_rate_then_default(self):
+		DailyRate.objects.create(property=self.prop, date=date(2025, 8, 1), base_price=Decimal('12000'), min_stay=1)
+		DailyRate.objects.create(property=self.prop, date=date(2025, 8, 2), base_price=Decimal('12000'))
+		PricingRule.objects.create(property=self.prop, date=date(2025, 8, 2), price=20000)
+
+		quote = quote_stay(self.prop, date(2025, 8, 1), date(2025, 8, 4), adults=3, children=1)
+
+		self.assertEqual([n['base_price'] for n in quote['nightly']], [12000, 20000, 10000])
+		self.assertEqual(quote['extra_adults'], 1)
+		self.assertEqual(quote['extra_children'], 1)
+		self.assertEqual(quote['total'], 42000 + 3 * 4500)
+		self.assertTrue(quote['bookable'])
+
+	def test_constraints_are_reported(self):
+		PricingRule.objects.create(property=self.prop, date=date(2025, 8, 1), is_blackout=True)
+
+		quote = quote_stay(self.prop, date(2025, 8, 1), date(2025, 8, 2), adults=7)
+
+		self.assertFalse(quote['bookable'])
+		self.assertEqual(
+			[e['code'] for e in quote['errors']],
+			['blackout', 'min_nights', 'capacity'],
+		)
+
+	def test_cached_quote_is_invalidated_by_rule_change(self):
+		quote_properties([self.prop], date(2025, 8, 1), date(2025, 8, 3), adults=2)
+		with self.assertNumQueries(0):
+			quote = quote_stay(self.prop, date(2025, 8, 1), date(2025, 8, 3), adults=2)
+		self.assertEqual(quote['total'], 20000)
+
+		PricingRule.objects.create(property=self.prop, date=date(2025, 8, 1), price=15000)
+
+		quote = quote_stay(self.prop, date(2025, 8, 1), date(2025, 8, 3), adults=2)
+		self.assertEqual(quote['total'], 25000)
+
+	def test_invalid_property_id_is_a_bad_request(self):
+		params = {'check_in': '2025-08-01', 'check_out': '2025-08-03'}
+
+		response = self.client.get('/api/quote/', {**params, 'property_id': 'abc'})
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(self.client.get('/api/quote/', {**params, 'property_id': self.prop.id + 1}).status_code, 404)
+		self.assertEqual(self.client.get('/api/quote/', {**params, 'property_id': self.prop.id}).json()['total'], 20000)
+
+
+class AvailabilitySearchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.villa = Property.objects.create(name='Villa', slug='villa', capacity=6, min_nights=1)
+		self.cabin = Property.objects.create(name='Cabin', slug='cabin', capacity=2, min_nights=1)
+		self.house = Property.objects.create(name='House', slug='house', capacity=8, min_nights=1)
+		# 2025-08-01 を今日として、検索期間の実効料金を保存期間に含める
+		window = mock.patch(
+			'reservations.services_effective_rates.stored_window',
+			return_value=(date(2025, 8, 1), date(2026, 8, 1)),
+		)
+		window.start()
+		self.addCleanup(window.stop)
+
+	def _search(self, check_in, check_out, guests):
+		return [p.slug for p in search_available_properties(check_in, check_out, guests)]
+
+	def test_booked_nights_and_cancellation(self):
+		reservation = Reservation.objects.create(
+			property=self.villa, status='Confirmed',
+			check_in_date=date(2025, 8, 1), check_out_date=date(2025, 8, 2),
+		)
+		refresh_reservation_nights([reservation.id])
+		self.assertEqual(ReservationNight.objects.filter(reservation=reservation).count(), 2)
+
+		rebuild_effective_rates(date(2025, 8, 1), date(2025, 8, 10))
+		# 候補の施設 + 実効料金の範囲読み込み + 結果の施設
+		with self.assertNumQueries(3):
+			self.assertEqual(self._search(date(2025, 8, 2), date(2025, 8, 4), 3), ['house'])
+		self.assertEqual(self._search(date(2025, 8, 3), date(2025, 8, 4), 3), ['house', 'villa'])
+
+		Reservation.objects.filter(id=reservation.id).update(status='Cancelled')
+		refresh_reservation_nights([reservation.id])
+		self.assertEqual(self._search(date(2025, 8, 2), date(2025, 8, 4), 3), ['house', 'villa'])
+
+	def test_blackout_unavailable_and_min_stay(self):
+		PricingRule.objects.create(property=self.house, date=date(2025, 8, 2), is_blackout=True)
+		DailyRate.objects.create(property=self.villa, date=date(2025, 8, 1), min_stay=3)
+
+		self.assertEqual(self._search(date(2025, 8, 1), date(2025, 8, 3), 2), ['cabin'])
+		self.assertEqual(self._search(date(2025, 8, 1), date(2025, 8, 4), 2), ['cabin', 'villa'])
+
+
+class EffectiveRateTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		# 2026-05-01 を今日として保存期間を固定する
+		window = mock.patch(
+			'reservations.services_effective_rates.stored_window',
+			return_value=(date(2026, 5, 1), date(2027, 5, 1)),
+		)
+		window.start()
+		self.addCleanup(window.stop)
+		self.prop = Property.objects.create(name='Villa', slug='villa', base_price=10000, min_nights=1)
+		DailyRate.objects.create(property=self.prop, date=date(2026, 5, 2), base_price=Decimal('12000'), min_stay=2)
+		DailyRate.objects.create(property=self.prop, date=date(2026, 5, 3), base_price=Decimal('12000'), available=False)
+		PricingRule.objects.create(property=self.prop, date=date(2026, 5, 4), price=20000)
+		EffectiveRate.objects.all().delete()
+
+	def test_sources_are_resolved_in_priority_order(self):
+		days = load_effective_rates([self.prop], date(2026, 5, 1), date(2026, 5, 4))[self.prop.id]
+
+		self.assertEqual((days[date(2026, 5, 1)].price, days[date(2026, 5, 1)].price_source), (Decimal('10000'), 'base'))
+		self.assertEqual((days[date(2026, 5, 2)].price, days[date(2026, 5, 2)].min_nights), (Decimal('12000'), 2))
+		self.assertFalse(days[date(2026, 5, 3)].available)
+		self.assertEqual(days[date(2026, 5, 4)].price_source, 'rule')
+		# 読み込みでは保存しない
+		self.assertFalse(EffectiveRate.objects.exists())
+
+		# 保存済みの期間は1回の範囲読み込みで済む
+		rebuild_effective_rates(date(2026, 5, 1), date(2026, 5, 4))
+		with self.assertNumQueries(1):
+			self.assertEqual(load_effective_rates([self.prop], date(2026, 5, 1), date(2026, 5, 4))[self.prop.id], days)
+
+	def test_explicit_zero_price_overrides_daily_rate(self):
+		PricingRule.objects.create(property=self.prop, date=date(2026, 5, 2), price=0)
+
+		days = load_effective_rates([self.prop], date(2026, 5, 2), date(2026, 5, 2))[self.prop.id]
+		self.assertEqual((days[date(2026, 5, 2)].price, days[date(2026, 5, 2)].price_source), (Decimal('0'), 'rule'))
+
+	def test_source_changes_update_materialized_rows(self):
+		rebuild_effective_rates(date(2026, 5, 1), date(2026, 5, 4))
+
+		PricingRule.objects.create(property=self.prop, date=date(2026, 5, 3), price=9000, is_blackout=False)
+		DailyRate.objects.filter(property=self.prop, date=date(2026, 5, 2)).delete()
+		apply_daily_rates(self.prop, [{'date': date(2026, 5, 1), 'base_price': '11000', 'min_stay': 3, 'available': True}])
+		self.prop.base_price = 9500
+		self.prop.save()
+
+		rows = {row.date: row for row in EffectiveRate.objects.filter(property=self.prop)}
+		self.assertEqual((rows[date(2026, 5, 1)].price, rows[date(2026, 5, 1)].min_nights), (Decimal('11000'), 3))
+		self.assertEqual(rows[date(2026, 5, 2)].price, Decimal('9500'))
+		self.assertEqual(rows[date(2026, 5, 3)].price, Decimal('9000'))
+		# 日別ルールでは売止めを解除しないため Beds24 側の予約不可は残る
+		self.assertFalse(rows[date(2026, 5, 3)].available)
+		self.assertEqual(find_inconsistencies(date(2026, 5, 1), date(2026, 5, 4)), [])
+
+	def test_only_the_fixed_window_is_stored(self):
+		EffectiveRate.objects.create(
+			property=self.prop, date=date(2026, 4, 30), price=Decimal('1'), min_nights=1,
+			available=True, is_blackout=False, price_source='base',
+		)
+		PricingRule.objects.create(property=self.prop, date=date(2027, 6, 1), price=30000)
+		self.assertFalse(EffectiveRate.objects.filter(date=date(2027, 6, 1)).exists())
+
+		# 施設の保存では保存期間だけを作り直し、期間より前の行は削除する
+		self.prop.save()
+		stored = EffectiveRate.objects.filter(property=self.prop)
+		self.assertEqual(stored.count(), (date(2027, 5, 1) - date(2026, 5, 1)).days + 1)
+		self.assertEqual(
+			stored.aggregate(first=Min('date'), last=Max('date')),
+			{'first': date(2026, 5, 1), 'last': date(2027, 5, 1)},
+		)
+
+		# 保存期間外の日付は読み込み時に計算する
+		days = load_effective_rates([self.prop], date(2027, 6, 1), date(2027, 6, 1))[self.prop.id]
+		self.assertEqual(days[date(2027, 6, 1)].price, Decimal('30000'))
+		self.assertEqual(stored.count(), 366)
+
+	def test_consistency_checker_reports_drift(self):
+		rebuild_effective_rates(date(2026, 5, 1), date(2026, 5, 4))
+		EffectiveRate.objects.filter(property=self.prop, date=date(2026, 5, 4)).update(price=Decimal('1'))
+
+		problems = find_inconsistencies(date(2026, 5, 1), date(2026, 5, 4))
+		self.assertEqual([(p['date'], p['fields']) for p in problems], [(date(2026, 5, 4), ['price'])])
+
+
+class FakeBeds24Handler(BaseHTTPRequestHandler):
+	"""setRoomDates を受け付けるローカルの擬似 Beds24 エンドポイント"""
+	requests = []
+	fail_next = 0
+
+	def do_POST(self):
+		body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+		type(self).requests.append((self.path, body))
+		if type(self).fail_next:
+			type(self).fail_next -= 1
+			self.send_response(503)
+			self.end_headers()
+			return
+		self.send_response(200)
+		self.send_header('Content-Type', 'application/json')
+		self.end_headers()
+		self.wfile.write(json.dumps({'success': True}).encode())
+
+	def log_message(self, *args):
+		pass
+
+
+class PricePushTests(TestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.server = HTTPServer(('127.0.0.1', 0), FakeBeds24Handler)
+		threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+		cls.settings_override = override_settings(
+			BEDS24_API_KEY='test-key',
+			BEDS24_JSON_API_URL=f'http://127.0.0.1:{cls.server.server_port}/json',
+		)
+		cls.settings_override.enable()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.settings_override.disable()
+		cls.server.shutdown()
+		cls.server.server_close()
+		super().tearDownClass()
+
+	def setUp(self):
+		cache.clear()
+		FakeBeds24Handler.requests = []
+		FakeBeds24Handler.fail_next = 0
+		self.prop = Property.objects.create(
+			name='Villa', slug='villa', base_price=10000, beds24_property_key='prop-key', room_id=501,
+		)
+		self.day = date.today() + timedelta(days=10)
+
+	def test_edits_are_coalesced_and_sent_in_one_call(self):
+		rule = PricingRule.objects.create(property=self.prop, date=self.day, price=12000)
+		rule.price = 13000
+		rule.save()
+		PricingRule.objects.create(property=self.prop, date=self.day + timedelta(days=1), price=14000, min_nights=2)
+		self.assertEqual(PricePush.objects.count(), 2)
+
+		result = flush_price_pushes()
+
+		self.assertEqual(result, {'dates': 2, 'calls': 1, 'failed': 0})
+		path, body = FakeBeds24Handler.requests[0]
+		self.assertEqual(path, '/json/setRoomDates')
+		self.assertEqual(body['roomId'], '501')
+		self.assertEqual(body['dates'], {
+			self.day.strftime('%Y%m%d'): {'p1': '13000', 'm': '1', 'o': '0'},
+			(self.day + timedelta(days=1)).strftime('%Y%m%d'): {'p1': '14000', 'm': '2', 'o': '0'},
+		})
+		self.assertFalse(PricePush.objects.exists())
+
+	def test_blackouts_close_the_date_and_past_dates_are_dropped(self):
+		PricingRule.objects.create(property=self.prop, date=self.day, is_blackout=True, blackout_reason='点検')
+		past = PricePush.objects.create(
+			property=self.prop, date=date.today() - timedelta(days=1), enqueued_at=timezone.now(), next_attempt_at=timezone.now(),
+		)
+
+		self.assertEqual(flush_price_pushes(), {'dates': 1, 'calls': 1, 'failed': 0})
+		_, body = FakeBeds24Handler.requests[0]
+		self.assertEqual(list(body['dates']), [self.day.strftime('%Y%m%d')])
+		self.assertEqual(body['dates'][self.day.strftime('%Y%m%d')]['o'], '1')
+		self.assertFalse(PricePush.objects.filter(pk=past.pk).exists())
+
+	def test_large_ranges_are_split_into_batches(self):
+		end = self.day + timedelta(days=MAX_DATES_PER_CALL + 9)
+		self.client.force_login(get_user_model().objects.create_user('staff', password='pw'))
+		self.client.post(f'/api/pricing/{self.prop.id}/bulk/', {
+			'ranges': [{'startDate': self.day.isoformat(), 'endDate': end.isoformat(), 'price': 15000}],
+		}, content_type='application/json')
+
+		result = flush_price_pushes()
+
+		self.assertEqual(result, {'dates': MAX_DATES_PER_CALL + 10, 'calls': 2, 'failed': 0})
+		self.assertEqual([len(body['dates']) for _, body in FakeBeds24Handler.requests], [MAX_DATES_PER_CALL, 10])
+
+	def test_failed_push_is_retried_with_backoff(self):
+		FakeBeds24Handler.fail_next = 1
+		PricingRule.objects.create(property=self.prop, date=self.day, price=12000)
+
+		with self.assertLogs('reservations.services_price_push', 'WARNING'):
+			self.assertEqual(flush_price_pushes()['failed'], 1)
+		push = PricePush.objects.get()
+		self.assertEqual(push.attempts, 1)
+		self.assertIn('503', push.last_error)
+
+		# 再送時刻まではスキップされる
+		self.assertEqual(flush_price_pushes()['calls'], 0)
+		PricePush.objects.update(next_attempt_at=push.enqueued_at)
+		self.assertEqual(flush_price_pushes(), {'dates': 1, 'calls': 1, 'failed': 0})
+
+	def test_properties_without_room_id_and_beds24_rates_are_not_queued(self):
+		other = Property.objects.create(name='Cabin', slug='cabin')
+		PricingRule.objects.create(property=other, date=self.day, price=12000)
+		DailyRate.objects.create(property=self.prop, date=self.day, base_price=Decimal('9000'))
+
+		self.assertFalse(PricePush.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class MonthlyRevenueRollupTests(APITestCase):
+	def setUp(self):
+		cache.clear()
+		self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+		self.villa = Property.objects.create(name='Villa', slug='villa', room_id=10, management_type='自社')
+		self.cabin = Property.objects.create(name='Cabin', slug='cabin', room_id=20, management_type='受託')
+
+	def _booking(self, book_id, room_id, check_in, price, status='Confirmed', adults=2):
+		return {
+			'beds24_book_id': book_id, 'room_id': str(room_id), 'status': status, 'total_price': Decimal(price),
+			'check_in_date': check_in, 'check_out_date': check_in, 'adult_guests': adults, 'child_guests': 0,
+		}
+
+	def _rollup(self):
+		return sorted(
+			MonthlyRevenueRollup.objects.values_list('property__name', 'month', 'fiscal_year', 'fiscal_month', 'status', 'revenue', 'booking_count', 'guest_count')
+		)
+
+	def test_sync_updates_affected_months_incrementally(self):
+		window = (date(2026, 1, 1), date(2026, 12, 31))
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2026, 3, 5), '30000'),
+			self._booking(2, 10, date(2026, 3, 20), '20000', adults=3),
+			self._booking(3, 20, date(2026, 2, 10), '15000'),
+		], *window)
+
+		villa_march = MonthlyRevenueRollup.objects.get(property=self.villa, month=date(2026, 3, 1))
+		self.assertEqual((villa_march.revenue, villa_march.booking_count, villa_march.guest_count), (Decimal('50000'), 2, 5))
+		self.assertEqual((villa_march.fiscal_year, villa_march.fiscal_month), (2026, 1))
+		cabin_feb = MonthlyRevenueRollup.objects.get(property=self.cabin)
+		self.assertEqual((cabin_feb.fiscal_year, cabin_feb.fiscal_month), (2025, 12))
+
+		# 予約2を4月へ移動、予約3はBeds24から消えてキャンセル扱い
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2026, 3, 5), '30000'),
+			self._booking(2, 10, date(2026, 4, 2), '20000', adults=3),
+		], *window)
+
+		incremental = self._rollup()
+		self.assertEqual(MonthlyRevenueRollup.objects.get(property=self.villa, month=date(2026, 3, 1)).revenue, Decimal('30000'))
+		self.assertEqual(MonthlyRevenueRollup.objects.get(property=self.cabin).status, 'Cancelled')
+
+		rebuild_revenue_rollup()
+		self.assertEqual(self._rollup(), incremental)
+
+	def test_revenue_endpoints_read_the_rollup(self):
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2026, 3, 5), '30000'),
+			self._booking(2, 20, date(2027, 2, 10), '15000'),
+			self._booking(3, 10, date(2025, 3, 8), '10000'),
+		], date(2025, 1, 1), date(2027, 12, 31))
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/revenue/', {'year': 2026})
+		by_month = {row['date']: row for row in response.data}
+		self.assertEqual(by_month['2026-03'], {'date': '2026-03', '自社': Decimal('30000'), '受託': 0, 'total': Decimal('30000')})
+		self.assertEqual(by_month['2027-02']['受託'], Decimal('15000'))
+
+		response = self.client.get('/api/revenue/yoy/', {'year': 2026})
+		self.assertEqual((response.data[0]['current_year'], response.data[0]['previous_year']), (Decimal('30000'), Decimal('10000')))
+		self.assertEqual(response.data[11]['current_year'], Decimal('15000'))
+
+		rows = self._csv_rows({'year': 2026})
+		self.assertEqual(rows['Villa'], [Decimal('30000')] + [Decimal(0)] * 11 + [Decimal('30000')])
+		self.assertEqual(rows['合計'][-1], Decimal('45000'))
+
+	def _csv_rows(self, params):
+		response = self.client.get('/api/revenue/csv/', params)
+		content = b''.join(response.streaming_content).decode('utf-8')
+		# BOM はファイル先頭の1回だけ
+		self.assertEqual((content[0], content.count('\ufeff')), ('\ufeff', 1))
+		lines = list(csv.reader(io.StringIO(content[1:])))
+		self.rows_in_order = [line[0] for line in lines if line]
+		return {line[0]: [Decimal(value) for value in line[1:]] for line in lines[3:] if line and not line[0].startswith('---')}
+
+	def test_csv_streams_several_years_or_a_custom_range(self):
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2025, 3, 5), '10000'),
+			self._booking(2, 20, date(2026, 3, 20), '15000'),
+			self._booking(3, 10, date(2026, 4, 2), '20000'),
+		], date(2025, 1, 1), date(2026, 12, 31))
+
+		# 施設×月の集計1回のみ
+		with self.assertNumQueries(1):
+			rows = self._csv_rows({'years': '2025,2026'})
+		self.assertEqual(len(rows['Villa']), 24 + 1)
+		self.assertEqual((rows['Villa'][0], rows['Villa'][13], rows['Villa'][-1]), (Decimal('10000'), Decimal('20000'), Decimal('30000')))
+		self.assertEqual(self.rows_in_order[1:], ['施設名', '--- 自社 ---', 'Villa', '小計(自社)', '--- 受託 ---', 'Cabin', '小計(受託)', '合計'])
+
+		rows = self._csv_rows({'start': '2026-03-10', 'end': '2026-04-01'})
+		self.assertEqual(rows['合計'], [Decimal('15000'), Decimal('0'), Decimal('15000')])
+
+		response = self.client.get('/api/revenue/csv/', {'start': '2026-03-10'})
+		self.assertEqual(response.status_code, 400)
+
+	def test_compare_endpoint_reads_several_years_at_once(self):
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2024, 3, 5), '10000'),
+			self._booking(2, 10, date(2025, 3, 5), '20000'),
+			self._booking(3, 20, date(2026, 2, 10), '15000'),
+			self._booking(4, 10, date(2026, 4, 1), '30000'),
+		], date(2024, 1, 1), date(2026, 12, 31))
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/revenue/compare/', {'year': 2026, 'count': 4})
+		self.assertEqual(response.data['years'], [2023, 2024, 2025, 2026])
+		self.assertEqual([entry['total'] for entry in response.data['series']], [0, Decimal('10000'), Decimal('35000'), Decimal('30000')])
+		self.assertEqual(response.data['series'][2]['monthly'][11], Decimal('15000'))
+
+		response = self.client.get('/api/revenue/compare/', {'years': '2025,2026', 'group_by': 'management_type'})
+		self.assertEqual(
+			[(entry['year'], entry['key'], entry['total']) for entry in response.data['series']],
+			[(2025, '受託', Decimal('15000')), (2025, '自社', Decimal('20000')), (2026, '自社', Decimal('30000'))],
+		)
+
+		response = self.client.get('/api/revenue/compare/', {'years': '2025', 'group_by': 'room'})
+		self.assertEqual(response.status_code, 400)
+		for count in (0, -1, 11, 30000000):
+			response = self.client.get('/api/revenue/compare/', {'year': 2026, 'count': count})
+			self.assertEqual(response.status_code, 400)
+
+	def test_analytics_responses_are_cached_until_sync_or_submission(self):
+		window = (date(2026, 1, 1), date(2026, 12, 31))
+		sync_bookings_to_db([self._booking(1, 10, date(2026, 3, 5), '30000')], *window)
+
+		self.client.get('/api/revenue/', {'year': 2026})
+		with self.assertNumQueries(0):
+			response = self.client.get('/api/revenue/', {'year': 2026})
+		self.assertEqual(response.data[0]['total'], Decimal('30000'))
+		self.client.get('/api/analytics/nationality/', {'year': 2026})
+
+		# 同期が終わるとキャッシュは無効になる
+		sync_bookings_to_db([self._booking(1, 10, date(2026, 3, 5), '45000')], *window)
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/revenue/', {'year': 2026})
+		self.assertEqual(response.data[0]['total'], Decimal('45000'))
+
+		# 名簿の提出でも無効になる
+		GuestSubmission.objects.create(
+			reservation=Reservation.objects.get(beds24_book_id=1),
+			status=GuestSubmission.SubmissionStatus.COMPLETED, nationality='TW',
+		)
+		response = self.client.get('/api/analytics/nationality/', {'year': 2026})
+		self.assertEqual(response.data, [{'country': '台湾', 'code': 'TW', 'count': 1}])
+
+		stats = self.client.get('/api/analytics/cache-stats/').data
+		self.assertEqual((stats['revenue']['hits'], stats['revenue']['misses']), (1, 2))
+		self.assertEqual(stats['nationality'], {'hits': 0, 'misses': 2, 'hit_rate': 0.0})
+
+	def test_dashboard_snapshot_combines_sections_and_is_precomputed_on_sync(self):
+		window = (date(2025, 1, 1), date(2026, 12, 31))
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2026, 3, 5), '30000'),
+			self._booking(2, 20, date(2026, 3, 20), '15000', status='New'),
+			self._booking(3, 10, date(2025, 3, 8), '10000'),
+		], *window)
+		GuestSubmission.objects.create(
+			reservation=Reservation.objects.get(beds24_book_id=1),
+			status=GuestSubmission.SubmissionStatus.COMPLETED, nationality='JP',
+		)
+		sync_bookings_to_db([
+			self._booking(1, 10, date(2026, 3, 5), '30000'),
+			self._booking(2, 20, date(2026, 3, 20), '15000', status='New'),
+			self._booking(3, 10, date(2025, 3, 8), '10000'),
+		], *window)
+
+		# 同期の直後に既定の条件で事前計算されている
+		with self.assertNumQueries(0):
+			self.assertEqual(self.client.get('/api/dashboard/').status_code, 200)
+
+		response = self.client.get('/api/dashboard/', {'year': 2026, 'month': '2026-03'})
+		self.assertEqual(response.status_code, 200)
+		snapshot = response.data
+		self.assertEqual(snapshot['revenue'][0], {'date': '2026-03', '自社': Decimal('30000'), '受託': Decimal('15000'), 'total': Decimal('45000')})
+		self.assertEqual(snapshot['yoy'], self.client.get('/api/revenue/yoy/', {'year': 2026}).data)
+		self.assertEqual(snapshot['nationality'], [{'country': '日本', 'code': 'JP', 'count': 1}])
+		self.assertEqual([row['beds24_book_id'] for row in snapshot['monthly_reservations']], [1, 2])
+		self.assertIsNotNone(snapshot['last_sync_time'])
+
+		with self.assertNumQueries(0):
+			self.client.get('/api/dashboard/', {'year': 2026, 'month': '2026-03'})
+		self.assertEqual(self.client.get('/api/dashboard/', {'month': '03/2026'}).status_code, 400)
+
+	def test_sync_succeeds_when_precomputing_the_dashboard_fails(self):
+		with mock.patch('reservations.services.warm_dashboard_snapshot', side_effect=RuntimeError('boom')), \
+				self.assertLogs('reservations.services', 'ERROR'):
+			result = sync_bookings_to_db([self._booking(1, 10, date(2026, 3, 5), '30000')], date(2026, 1, 1), date(2026, 12, 31))
+		self.assertEqual(result['created'], 1)
+		self.assertEqual(MonthlyRevenueRollup.objects.get().revenue, Decimal('30000'))
+
+	def test_dashboard_sections_run_in_worker_threads_on_postgresql(self):
+		postgres = SimpleNamespace(vendor='postgresql', in_atomic_block=False)
+		with mock.patch('reservations.services_dashboard.connection', postgres), \
+				mock.patch('reservations.services_dashboard.connections') as worker_connections:
+			results = _run_concurrently({name: threading.get_ident for name in ('a', 'b', 'c')})
+		self.assertEqual(list(results), ['a', 'b', 'c'])
+		self.assertNotIn(threading.get_ident(), results.values())
+		# スレッドが開いた接続はタスクごとに閉じる
+		self.assertEqual(worker_connections.close_all.call_count, 3)
+
+		# トランザクション中（他の接続から未コミットのデータが見えない）は順に実行する
+		postgres.in_atomic_block = True
+		with mock.patch('reservations.services_dashboard.connection', postgres):
+			results = _run_concurrently({'a': threading.get_ident})
+		self.assertEqual(results, {'a': threading.get_ident()})
+
+	def test_night_allocation_splits_revenue_across_months(self):
+		booking = self._booking(1, 10, date(2026, 3, 30), '10000')
+		booking['check_out_date'] = date(2026, 4, 1)
+		sync_bookings_to_db([booking], date(2026, 1, 1), date(2026, 12, 31))
+
+		self.assertEqual(
+			list(ReservationNight.objects.order_by('date').values_list('date', 'revenue')),
+			[(date(2026, 3, 30), Decimal('3333.33')), (date(2026, 3, 31), Decimal('3333.33')), (date(2026, 4, 1), Decimal('3333.34'))],
+		)
+
+		response = self.client.get('/api/revenue/', {'year': 2026, 'property_name': 'Villa'})
+		self.assertEqual([row['revenue'] for row in response.data[:2]], [Decimal('10000'), 0])
+
+		response = self.client.get('/api/revenue/', {'year': 2026, 'property_name': 'Villa', 'allocation': 'night'})
+		self.assertEqual([row['revenue'] for row in response.data[:2]], [Decimal('6666.66'), Decimal('3333.34')])
+
+		response = self.client.get('/api/revenue/compare/', {'years': '2026', 'allocation': 'night'})
+		self.assertEqual(response.data['series'][0]['monthly'][:2], [Decimal('6666.66'), Decimal('3333.34')])
+		self.assertEqual(response.data['series'][0]['total'], Decimal('10000'))
+
+		response = self.client.get('/api/revenue/', {'year': 2026, 'allocation': 'checkout'})
+		self.assertEqual(response.status_code, 400)
+
+	def test_months_without_revenue_are_zero_filled_by_the_date_dimension(self):
+		sync_bookings_to_db([self._booking(1, 10, date(2040, 5, 3), '12000')], date(2040, 1, 1), date(2040, 12, 31))
+
+		# 既定の範囲外の年度は、読み込み時にディメンションを作らず 400 を返す
+		self.assertFalse(DateDimension.objects.filter(fiscal_year=2040).exists())
+		for path, params in [
+			('/api/revenue/', {'year': 2040}), ('/api/revenue/', {'year': 3000}),
+			('/api/revenue/compare/', {'years': '2039,2040'}), ('/api/revenue/csv/', {'year': 2040}),
+		]:
+			self.assertEqual(self.client.get(path, params).status_code, 400)
+		self.assertFalse(DateDimension.objects.filter(fiscal_year__gte=2039).exists())
+
+		# 日付として扱えない会計年度も500にせず400で返す
+		for path, params in [
+			('/api/revenue/csv/', {'years': '0'}), ('/api/revenue/csv/', {'years': '2025,10000'}), ('/api/revenue/csv/', {'year': 9999}),
+			('/api/revenue/compare/', {'years': '10000'}), ('/api/revenue/compare/', {'year': 1, 'count': 5}),
+			('/api/dashboard/', {'year': 10000}), ('/api/analytics/occupancy/', {'start': '9999-11-01', 'end': '9999-12-31'}),
+			('/api/analytics/pace/', {'stay_month': '0001-03'}),
+		]:
+			self.assertEqual(self.client.get(path, params).status_code, 400, (path, params))
+
+		self.assertEqual(build_date_dimension([2039, 2040]), 731)
+		series = compare_fiscal_years([2039, 2040])
+		self.assertEqual([entry['year'] for entry in series], [2039, 2040])
+		self.assertEqual(series[0]['monthly'], [Decimal(0)] * 12)
+		self.assertEqual(series[1]['monthly'][:3], [Decimal(0), Decimal(0), Decimal('12000')])
+
+		with self.assertNumQueries(1):
+			rows = monthly_revenue(date(2040, 3, 1), date(2041, 2, 28), by_property=True)
+		self.assertEqual(len(rows), 12)
+		self.assertEqual([row['property_name'] for row in rows if row['property_id']], ['Villa'])
+
+		series = compare_fiscal_years([2039, 2040])
+		self.assertEqual([entry['year'] for entry in series], [2039, 2040])
+		self.assertEqual(series[0]['monthly'], [Decimal(0)] * 12)
+		self.assertEqual(series[1]['monthly'][:3], [Decimal(0), Decimal(0), Decimal('12000')])
+		self.assertEqual(DateDimension.objects.filter(fiscal_year=2040).count(), 365)
+
+		with self.assertNumQueries(1):
+			rows = monthly_revenue(date(2040, 3, 1), date(2041, 2, 28), by_property=True)
+		self.assertEqual(len(rows), 12)
+		self.assertEqual([row['property_name'] for row in rows if row['property_id']], ['Villa'])
+
+
+class DateDimensionTests(TestCase):
+	def test_japanese_holidays(self):
+		holidays = holidays_of_year(2025)
+		self.assertEqual(holidays[date(2025, 1, 13)], '成人の日')
+		self.assertEqual(holidays[date(2025, 2, 24)], '振替休日')
+		self.assertEqual(holidays[date(2025, 3, 20)], '春分の日')
+		self.assertEqual(holidays[date(2025, 5, 6)], '振替休日')
+		self.assertEqual(holidays[date(2025, 9, 23)], '秋分の日')
+		self.assertEqual(len(holidays), 19)
+		self.assertEqual(holidays_of_year(2019)[date(2019, 4, 30)], '国民の休日')
+		self.assertEqual(holidays_of_year(2020)[date(2020, 7, 24)], 'スポーツの日')
+
+	def test_dimension_is_prebuilt_with_calendar_attributes(self):
+		day = DateDimension.objects.get(date=date(2026, 2, 23))
+		self.assertEqual(
+			(day.month_start, day.month_end, day.fiscal_year, day.fiscal_month, day.iso_week, day.weekday),
+			(date(2026, 2, 1), date(2026, 2, 28), 2025, 12, 9, 0),
+		)
+		self.assertEqual((day.is_weekend, day.is_holiday, day.holiday_name, day.season), (False, True, '天皇誕生日', 'winter'))
+		self.assertEqual(DateDimension.objects.filter(fiscal_year=2026).count(), 365)
+		self.assertEqual(DateDimension.objects.filter(fiscal_year=2026, is_holiday=True).count(), 18)
+
+		self.assertEqual(build_date_dimension([2026]), 365)
+		self.assertEqual(DateDimension.objects.filter(fiscal_year=2026).count(), 365)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class OccupancyMetricsTests(APITestCase):
+	def setUp(self):
+		cache.clear()
+		self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+		self.villa = Property.objects.create(name='Villa', slug='villa', management_type='自社')
+		self.cabin = Property.objects.create(name='Cabin', slug='cabin', management_type='受託')
+		PricingRule.objects.create(property=self.villa, date=date(2025, 3, 10), is_blackout=True)
+		self._reserve(self.villa, date(2025, 3, 30), date(2025, 4, 1), '30000')
+		self._reserve(self.cabin, date(2025, 3, 5), date(2025, 3, 6), '20000', status='Cancelled')
+
+	def _reserve(self, prop, check_in, last_night, price, status='Confirmed'):
+		reservation = Reservation.objects.create(
+			property=prop, status=status, check_in_date=check_in, check_out_date=last_night, total_price=Decimal(price),
+		)
+		refresh_reservation_nights([reservation.id])
+		return reservation
+
+	def test_metrics_per_property_and_month_are_cached_per_fiscal_year(self):
+		result = occupancy_metrics(date(2025, 3, 15), date(2025, 4, 10))
+		self.assertEqual((result['start'], result['end']), (date(2025, 3, 1), date(2025, 4, 30)))
+		cabin, villa = result['properties']
+		self.assertEqual(villa['periods'][0], {
+			'period': date(2025, 3, 1), 'available_nights': 30, 'sold_nights': 2, 'revenue': Decimal('20000.00'),
+			'occupancy': Decimal('0.0667'), 'adr': Decimal('10000.00'), 'revpar': Decimal('666.67'),
+		})
+		self.assertEqual(villa['total']['sold_nights'], 3)
+		self.assertEqual((cabin['total']['sold_nights'], cabin['total']['adr']), (0, None))
+		self.assertEqual(result['overall']['total']['available_nights'], 121)
+
+		# 施設の読み込みのみ（集計はキャッシュから）
+		with self.assertNumQueries(1):
+			self.assertEqual(occupancy_metrics(date(2025, 3, 15), date(2025, 4, 10)), result)
+
+		self._reserve(self.cabin, date(2025, 4, 20), date(2025, 4, 21), '16000')
+		cabin_april = occupancy_metrics(date(2025, 4, 1), date(2025, 4, 30))['properties'][0]['periods'][0]
+		self.assertEqual((cabin_april['sold_nights'], cabin_april['adr']), (2, Decimal('8000.00')))
+
+	def test_weekly_endpoint_merges_weeks_across_fiscal_years(self):
+		self._reserve(self.villa, date(2025, 2, 27), date(2025, 3, 1), '9000')
+		response = self.client.get('/api/analytics/occupancy/', {
+			'start': '2025-02-26', 'end': '2025-03-02', 'grain': 'week', 'property_name': 'Villa',
+		})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data['periods'], [date(2025, 2, 24)])
+		week = response.data['properties'][0]['periods'][0]
+		self.assertEqual((week['available_nights'], week['sold_nights'], week['revenue']), (7, 3, Decimal('9000.00')))
+
+		response = self.client.get('/api/analytics/occupancy/', {'year': 2025, 'grain': 'day'})
+		self.assertEqual(response.status_code, 400)
+		response = self.client.get('/api/analytics/occupancy/', {'start': '2020-03-01', 'end': '2025-03-01'})
+		self.assertEqual(response.status_code, 400)
+
+
+class BookingPaceTests(APITestCase):
+	def setUp(self):
+		self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+		self.villa = Property.objects.create(name='Villa', slug='villa', management_type='自社')
+		self.cabin = Property.objects.create(name='Cabin', slug='cabin', management_type='受託')
+
+	def _reserve(self, prop, check_in, last_night, price, status='Confirmed'):
+		reservation = Reservation.objects.create(
+			property=prop, status=status, check_in_date=check_in, check_out_date=last_night, total_price=Decimal(price),
+		)
+		refresh_reservation_nights([reservation.id])
+		return reservation
+
+	def test_snapshot_groups_future_nights_in_one_query(self):
+		self._reserve(self.villa, date(2025, 7, 30), date(2025, 8, 1), '30000')
+		self._reserve(self.cabin, date(2025, 8, 10), date(2025, 8, 10), '12000')
+		self._reserve(self.cabin, date(2025, 8, 20), date(2025, 8, 21), '20000', status='Cancelled')
+		self._reserve(self.cabin, date(2025, 5, 1), date(2025, 5, 1), '9000')
+
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(take_pace_snapshot(date(2025, 7, 15)), 3)
+		self.assertEqual(len([query for query in queries if query['sql'].startswith('SELECT')]), 1)
+		self.assertEqual(
+			sorted(BookingPaceSnapshot.objects.values_list('property__name', 'stay_month', 'nights', 'revenue', 'booking_count')),
+			[
+				('Cabin', date(2025, 8, 1), 1, Decimal('12000'), 1),
+				('Villa', date(2025, 7, 1), 2, Decimal('20000'), 1),
+				('Villa', date(2025, 8, 1), 1, Decimal('10000'), 1),
+			],
+		)
+
+		# 同じ日に再実行すると置き換える
+		take_pace_snapshot(date(2025, 7, 15))
+		self.assertEqual(BookingPaceSnapshot.objects.count(), 3)
+
+	def test_pace_endpoint_compares_same_lead_time_last_year(self):
+		self._reserve(self.villa, date(2024, 8, 5), date(2024, 8, 6), '20000')
+		take_pace_snapshot(date(2024, 6, 1))
+		self._reserve(self.villa, date(2024, 8, 10), date(2024, 8, 10), '8000')
+		take_pace_snapshot(date(2024, 7, 1))
+
+		self._reserve(self.villa, date(2025, 8, 1), date(2025, 8, 3), '45000')
+		take_pace_snapshot(date(2025, 6, 15))
+
+		response = self.client.get('/api/analytics/pace/', {'stay_month': '2025-08'})
+		self.assertEqual(response.status_code, 200)
+		this_year, last_year = response.data['series']
+		self.assertEqual([point['days_before'] for point in last_year['points']], [61, 31])
+		self.assertEqual(response.data['lead_time'], 47)
+		current, previous = response.data['comparison']
+		self.assertEqual((current['nights'], previous['nights']), (3, 2))
+		self.assertEqual(previous['snapshot_date'], date(2024, 6, 1))
+
+		self.assertEqual(self.client.get('/api/analytics/pace/', {'stay_month': '2025-08', 'property_name': 'Cabin'}).data['lead_time'], None)
+		self.assertEqual(self.client.get('/api/analytics/pace/', {'stay_month': '2025'}).status_code, 400)
+		self.assertEqual(self.client.get('/api/analytics/pace/', {'stay_month': '2025-08', 'years': 9}).status_code, 400)
+
+
+class ReservationExportTests(APITestCase):
+	def setUp(self):
+		self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+		villa = Property.objects.create(name='Villa', slug='villa')
+		self.first = Reservation.objects.create(
+			property=villa, status='Confirmed', guest_name='A', check_in_date=date(2025, 5, 1), total_price=Decimal('12000'),
+		)
+		GuestSubmission.objects.create(reservation=self.first, status=GuestSubmission.SubmissionStatus.COMPLETED, nationality='JP')
+		AccommodationTax.objects.create(reservation=self.first, num_nights=2, tax_amount=Decimal('400'))
+		Reservation.objects.create(property=villa, status='Cancelled', check_in_date=date(2025, 5, 2))
+		Reservation.objects.create(property=villa, status='New', check_in_date=date(2025, 7, 1))
+
+	def _content(self, params):
+		response = self.client.get('/api/reservations/export/', params)
+		self.assertEqual(response.status_code, 200)
+		return b''.join(response.streaming_content).decode('utf-8')
+
+	def test_csv_export_streams_filtered_rows_with_joined_fields(self):
+		with self.assertNumQueries(1):
+			content = self._content({'include': 'submission,tax', 'check_in_to': '2025-06-30'})
+		lines = list(csv.reader(io.StringIO(content.lstrip('\ufeff'))))
+		header = lines[0]
+		self.assertEqual(len(lines), 3)
+		first = dict(zip(header, lines[1]))
+		self.assertEqual((first['property'], first['total_price'], first['nationality'], first['tax_amount']), ('Villa', '12000.00', 'JP', '400.00'))
+		self.assertEqual(dict(zip(header, lines[2]))['tax_amount'], '')
+
+	def test_ndjson_export_and_invalid_parameters(self):
+		records = [json.loads(line) for line in self._content({'format': 'ndjson', 'status': 'Confirmed,New'}).splitlines()]
+		self.assertEqual([record['status'] for record in records], ['Confirmed', 'New'])
+		self.assertEqual(records[0]['check_in_date'], '2025-05-01')
+		self.assertNotIn('tax_amount', records[0])
+
+		self.assertEqual(self.client.get('/api/reservations/export/', {'format': 'xlsx'}).status_code, 400)
+		self.assertEqual(self.client.get('/api/reservations/export/', {'include': 'payments'}).status_code, 400)
+		self.assertEqual(self.client.get('/api/reservations/export/', {'check_in_from': '05/01'}).status_code, 400)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RosterStatusTests(APITestCase):
+	def setUp(self):
+		cache.clear()
+		self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+		self.villa = Property.objects.create(name='Villa', slug='villa')
+		self.cabin = Property.objects.create(name='Cabin', slug='cabin')
+		Property.objects.create(name='Empty', slug='empty')
+		roster = Reservation.RosterStatus
+		for day, property_obj, roster_status in [
+			(1, self.villa, roster.PENDING), (2, self.villa, roster.SUBMITTED), (3, self.villa, roster.VERIFIED),
+			(20, self.villa, roster.VERIFIED), (5, self.cabin, roster.PENDING),
+		]:
+			Reservation.objects.create(
+				property=property_obj, status='Accepted', check_in_date=date(2025, 5, day), guest_roster_status=roster_status,
+			)
+		Reservation.objects.create(property=self.cabin, status='Cancelled', check_in_date=date(2025, 5, 6))
+
+	def test_roster_stats_count_every_property_in_one_query(self):
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/roster-stats/')
+		self.assertEqual(list(response.data), ['villa', 'cabin'])
+		self.assertEqual(response.data['villa'], {
+			'property_id': self.villa.id, 'property_name': 'Villa',
+			'total': 4, 'pending': 1, 'submitted': 1, 'verified': 2, 'completion_rate': 75.0,
+		})
+		self.assertEqual((response.data['cabin']['total'], response.data['cabin']['completion_rate']), (1, 0.0))
+
+		response = self.client.get('/api/roster-stats/', {'start': '2025-05-02', 'end': '2025-05-10'})
+		self.assertEqual({slug: stats['total'] for slug, stats in response.data.items()}, {'villa': 2, 'cabin': 1})
+		response = self.client.get('/api/roster-stats/', {'property_name': 'Cabin'})
+		self.assertEqual(list(response.data), ['cabin'])
+		response = self.client.get('/api/roster-stats/', {'start': '2025-05'})
+		self.assertEqual(response.status_code, 400)
+
+	def test_roster_status_pages_with_a_keyset_cursor(self):
+		first = Reservation.objects.get(property=self.villa, check_in_date=date(2025, 5, 20))
+		GuestSubmission.objects.create(reservation=first, status=GuestSubmission.SubmissionStatus.COMPLETED)
+
+		with self.assertNumQueries(1):
+			response = self.client.get('/api/roster-status/', {'limit': 2})
+		self.assertNotIn('count', response.data)
+		self.assertEqual([row['check_in_date'] for row in response.data['results']], ['2025-05-20', '2025-05-05'])
+		self.assertEqual(response.data['results'][0]['property'], {'id': self.villa.id, 'name': 'Villa', 'slug': 'villa'})
+		self.assertEqual(response.data['results'][0]['submission']['status'], GuestSubmission.SubmissionStatus.COMPLETED)
+		self.assertIsNotNone(response.data['results'][0]['submission']['submitted_at'])
+		self.assertIsNone(response.data['results'][1]['submission'])
+
+		seen = [row['id'] for row in response.data['results']]
+		cursor = response.data['next_cursor']
+		while cursor:
+			response = self.client.get('/api/roster-status/', {'limit': 2, 'cursor': cursor, 'count': 'true'})
+			self.assertEqual(response.data['count'], 5)
+			seen += [row['id'] for row in response.data['results']]
+			cursor = response.data['next_cursor']
+		self.assertEqual(seen, list(Reservation.objects.filter(status='Accepted').order_by('-check_in_date', '-id').values_list('id', flat=True)))
+
+		response = self.client.get('/api/roster-status/', {'status': 'verified', 'count': 'true'})
+		self.assertEqual((response.data['count'], len(response.data['results']), response.data['next_cursor']), (2, 2, None))
+		for params in ({'cursor': 'not-a-cursor'}, {'limit': 0}, {'limit': 'all'}):
+			self.assertEqual(self.client.get('/api/roster-status/', params).status_code, 400)
+
+	def test_pending_rosters_page_in_check_in_order(self):
+		today = date.today()
+		for days in (3, 1, 1, 5):
+			reservation = Reservation.objects.create(property=self.cabin, status='Accepted', check_in_date=today + timedelta(days=days))
+		GuestSubmission.objects.create(reservation=reservation)
+
+		response = self.client.get('/api/pending-rosters/', {'limit': 2, 'count': 'true'})
+		self.assertEqual(response.data['count'], 3)
+		self.assertEqual([row['days_until_checkin'] for row in response.data['results']], [1, 1])
+		self.assertEqual(response.data['results'][0]['property'], {'id': self.cabin.id, 'name': 'Cabin'})
+
+		response = self.client.get('/api/pending-rosters/', {'limit': 2, 'cursor': response.data['next_cursor'], 'days_ahead': 7})
+		self.assertEqual([row['days_until_checkin'] for row in response.data['results']], [3, 5])
+		self.assertIsNone(response.data['next_cursor'])
+		self.assertTrue(response.data['results'][1]['submission_form_url'].endswith(f"/submit-roster/{reservation.guestsubmission.token}/"))
+
+
+class ConditionalGetTests(APITestCase):
+	def setUp(self):
+		self.client.force_authenticate(get_user_model().objects.create_user('staff', password='pw'))
+		self.villa = Property.objects.create(name='Villa', slug='villa')
+		self.rate = DailyRate.objects.create(property=self.villa, date=date(2026, 4, 1), base_price=Decimal('8000'))
+
+	def test_daily_rates_answer_304_until_a_rate_changes(self):
+		url = f'/api/daily-rates/?property_id={self.villa.id}'
+		first = self.client.get(url)
+		self.assertEqual(first.status_code, 200)
+		self.assertIn('no-cache', first['Cache-Control'])
+
+		with self.assertNumQueries(1):
+			cached = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(cached.status_code, 304)
+		self.assertEqual(cached.content, b'')
+
+		detail = self.client.get(f'/api/daily-rates/{self.rate.id}/')
+		self.assertIn('Last-Modified', detail)
+		self.assertEqual(self.client.get(f'/api/daily-rates/{self.rate.id}/', HTTP_IF_NONE_MATCH=detail['ETag']).status_code, 304)
+		self.assertEqual(self.client.get('/api/daily-rates/999999/').status_code, 404)
+
+		DailyRate.objects.create(property=self.villa, date=date(2026, 4, 2), base_price=Decimal('9000'))
+		changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(changed.status_code, 200)
+		self.assertNotEqual(changed['ETag'], first['ETag'])
+
+	def test_related_changes_invalidate_the_etag(self):
+		reservation = Reservation.objects.create(property=self.villa, guest_name='A', check_in_date=date(2026, 4, 1), status='Confirmed')
+		AccommodationTax.objects.create(reservation=reservation)
+		taxes = self.client.get('/api/accommodation-taxes/')
+		rates = self.client.get('/api/daily-rates/')
+
+		reservation.guest_name = 'B'
+		reservation.save()
+		changed = self.client.get('/api/accommodation-taxes/', HTTP_IF_NONE_MATCH=taxes['ETag'])
+		self.assertEqual(changed.status_code, 200)
+		self.assertEqual(changed.data[0]['reservation_guest_name'], 'B')
+
+		self.villa.name = 'Villa Annex'
+		self.villa.save()
+		self.assertEqual(self.client.get('/api/daily-rates/', HTTP_IF_NONE_MATCH=rates['ETag']).status_code, 200)
+		self.assertEqual(self.client.get('/api/accommodation-taxes/', HTTP_IF_NONE_MATCH=changed['ETag']).status_code, 200)
+
+	def test_sync_status_answers_304_until_next_sync(self):
+		self.assertEqual(self.client.get('/api/sync-status/').status_code, 404)
+		SyncStatus.objects.create(pk=1, last_sync_time=timezone.now())
+		first = self.client.get('/api/sync-status/')
+		self.assertEqual(first.status_code, 200)
+		self.assertEqual(self.client.get('/api/sync-status/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+		self.assertEqual(self.client.get('/api/sync-status/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
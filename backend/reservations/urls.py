@@ -16,10 +16,18 @@ urlpatterns = [
     path('revenue/csv/', views.DownloadRevenueCSVView.as_view(), name='revenue-csv'),
     path('revenue/', views.RevenueAPIView.as_view(), name='revenue-api'),
     path('revenue/yoy/', views.YoYRevenueAPIView.as_view(), name='yoy-revenue-api'),
+    path('revenue/compare/', views.RevenueComparisonAPIView.as_view(), name='revenue-compare-api'),
     path('analytics/nationality/', views.NationalityRatioAPIView.as_view(), name='nationality-ratio-api'),
+    path('dashboard/', views.DashboardSnapshotView.as_view(), name='dashboard-snapshot'),
+    path('analytics/cache-stats/', views.AnalyticsCacheStatsView.as_view(), name='analytics-cache-stats'),
+    path('analytics/pace/', views.BookingPaceAPIView.as_view(), name='booking-pace-api'),
+    path('analytics/occupancy/', views.OccupancyMetricsAPIView.as_view(), name='occupancy-metrics-api'),
+    path('reservations/export/', views.ReservationExportView.as_view(), name='reservation-export'),
     path('reservations/monthly/', views.MonthlyReservationListView.as_view(), name='monthly-reservations-api'),
     path('sync-status/', views.LastSyncTimeView.as_view(), name='sync-status'),
     path('debug/reservations/', views.DebugReservationListView.as_view(), name='debug-reservations-api'),
+    path('quote/', views.StayQuoteView.as_view(), name='stay-quote'),
+    path('availability/search/', views.AvailabilitySearchView.as_view(), name='availability-search'),
     # 宿泊者名簿提出状況API
     path('roster-status/', views.RosterSubmissionStatusView.as_view(), name='roster-status'),
     path('roster-stats/', views.RosterSubmissionStatsView.as_view(), name='roster-stats'),
@@ -5,17 +5,36 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Max
 from datetime import datetime, date, timedelta
 from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
 import calendar
 
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncMonth, Extract
 
+from api.conditional import ConditionalGetMixin, single_value_fingerprint
 from .models import Reservation, SyncStatus, AccommodationTax
 from .models_pricing import DailyRate
+from .services_rate_ranges import rate_ranges_between
+from .services_quote import QuoteError, quote_properties
+from .services_occupancy import search_available_properties
+from .services_occupancy_metrics import GRAIN_MONTH, GRAINS, MAX_FISCAL_YEARS, occupancy_metrics
+from .services_calendar import DateDimensionError, MAX_FISCAL_YEAR, MIN_FISCAL_YEAR, check_fiscal_year
+from .services_revenue import (
+    ALLOCATION_CHECK_IN, ALLOCATIONS, COMPARISON_GROUPS, FISCAL_MONTH_LABELS,
+    compare_fiscal_years, fiscal_year_bounds, fiscal_year_of, monthly_revenue, revenue_by_management_type,
+)
+from .services_export import ExportError, export_columns, export_csv_rows, export_filter, export_records, export_rows
+from .response_cache import analytics_cache_stats, cache_analytics_response
+from .services_analytics import monthly_reservations, nationality_ratio, roster_submission_stats
+from .services_dashboard import dashboard_snapshot
+from .services_pace import MAX_PACE_YEARS, pace_curves
+from .services_roster import RosterPageError, page_limit, pending_roster_rows, roster_page, roster_status_rows
+from .streaming import stream_csv, stream_ndjson
 from guest_forms.models import GuestSubmission, Property, FormTemplate
 from .serializers import (
     SyncStatusSerializer, ReservationSerializer, DebugReservationSerializer,
@@ -61,336 +80,430 @@ class ReservationLookupView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+def _fiscal_year_param(request):
+    """会計年度（?year=2025、既定は今年度）。不正な値・範囲外の場合も今年度"""
+    try:
+        return check_fiscal_year(int(request.query_params.get('year') or fiscal_year_of(date.today())))
+    except ValueError:
+        return fiscal_year_of(date.today())
+
+
+def _revenue_allocation(request):
+    """売上の計上方法（?allocation=check_in|night、既定は check_in）。不正な値の場合は None"""
+    allocation = request.query_params.get('allocation') or ALLOCATION_CHECK_IN
+    return allocation if allocation in ALLOCATIONS else None
+
+
 class RevenueAPIView(APIView):
     """
-    ローカルDBに保存された予約データから、月別売上レポートを生成するAPIビュー。
+    月別売上集計（MonthlyRevenueRollup）から、月別売上レポートを生成するAPIビュー。
     会計年度は3月から翌年2月までとする。
+    ?allocation=night を指定すると、月をまたぐ滞在の売上を宿泊日ごとに按分して計上する。
     """
+    @cache_analytics_response('revenue')
     def get(self, request, *args, **kwargs):
-        try:
-            today = date.today()
-            default_year = today.year - 1 if today.month < 3 else today.year
-            selected_year = int(request.query_params.get('year', default_year))
-        except (ValueError, TypeError):
-            selected_year = default_year
-
+        selected_year = _fiscal_year_param(request)
         property_name = request.query_params.get('property_name')
 
         # 会計年度の開始日と終了日を決定
-        start_date = date(selected_year, 3, 1)
-        end_date = (date(selected_year + 1, 3, 1) - timedelta(days=1))
+        start_date, end_date = fiscal_year_bounds(selected_year)
 
-        # ベースとなるクエリセットを作成
-        queryset = Reservation.objects.filter(
-            check_in_date__range=(start_date, end_date),
-            status__in=['Confirmed', 'New'] # 集計対象とするステータス
-        )
-
-        # 特定の施設が指定されていれば、それでフィルタリング
-        if property_name:
-            queryset = queryset.filter(property__name=property_name)
-
-        # 全施設か単一施設かで返すデータ形式を変える
-        if property_name:
-            # 単一施設: 月ごとの合計売上を返す
-            monthly_totals = queryset.annotate(
-                month=TruncMonth('check_in_date')
-            ).values('month').annotate(
-                total=Sum('total_price')
-            ).order_by('month')
-            
-            response_data = self._format_for_single_property(monthly_totals, start_date, end_date)
-        else:
-            # 全施設: 管理形態ごとの月別売上を返す (積み上げグラフ用)
-            monthly_by_type = queryset.annotate(
-                month=TruncMonth('check_in_date')
-            ).values('month', 'property__management_type').annotate(
-                total=Sum('total_price')
-            ).order_by('month', 'property__management_type')
+        allocation = _revenue_allocation(request)
+        if allocation is None:
+            return Response(
+                {"error": "allocation は check_in または night を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            response_data = self._format_for_stacked_chart(monthly_by_type, start_date, end_date)
+        # 日付ディメンションを起点に月別売上を集計する（売上のない月も0で返る）
+        try:
+            if property_name:
+                # 単一施設: 月ごとの合計売上を返す
+                monthly_totals = monthly_revenue(start_date, end_date, allocation, property_name)
+                response_data = [
+                    {"date": row['month_start'].strftime('%Y-%m'), "revenue": row['total']}
+                    for row in monthly_totals
+                ]
+            else:
+                # 全施設: 管理形態ごとの月別売上を返す (積み上げグラフ用)
+                response_data = revenue_by_management_type(
+                    monthly_revenue(start_date, end_date, allocation, by_property=True)
+                )
+        except DateDimensionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         print(f"DEBUG: property_name='{property_name}', response_data={response_data}")
         return Response(response_data)
 
-    def _format_for_single_property(self, monthly_totals, start_date, end_date):
-        """月別合計のクエリセットを、12ヶ月分のデータに整形する"""
-        revenue_map = {item['month'].strftime('%Y-%m'): item['total'] for item in monthly_totals}
-        
-        result = []
-        current_date = start_date
-        while current_date <= end_date:
-            date_key = current_date.strftime('%Y-%m')
-            result.append({
-                "date": date_key,
-                "revenue": revenue_map.get(date_key, 0) or 0
-            })
-            # 次の月へ
-            next_month = current_date.month % 12 + 1
-            next_year = current_date.year + (1 if current_date.month == 12 else 0)
-            current_date = date(next_year, next_month, 1)
-        return result
-
-    def _format_for_stacked_chart(self, monthly_by_type, start_date, end_date):
-        """管理形態ごとの月別クエリセットを、積み上げグラフ用の形式に整形する"""
-        pivoted_data = defaultdict(lambda: defaultdict(int))
-        all_management_types = set()
-        
-        for item in monthly_by_type:
-            date_key = item['month'].strftime('%Y-%m')
-            # management_type が None や空文字の場合は '不明' とする
-            m_type = item["property__management_type"] or '不明'
-            all_management_types.add(m_type)
-            pivoted_data[date_key][m_type] = item['total'] or 0
-
-        result = []
-        current_date = start_date
-        while current_date <= end_date:
-            date_key = current_date.strftime('%Y-%m')
-            month_data = {"date": date_key}
-            details = pivoted_data.get(date_key, {})
-            
-            # すべての管理形態キーを含める（存在しない場合は0を設定）
-            for m_type in all_management_types:
-                month_data[m_type] = details.get(m_type, 0)
-            
-            total = sum(details.values())
-            month_data['total'] = total
-            result.append(month_data)
-
-            # 次の月へ
-            next_month = current_date.month % 12 + 1
-            next_year = current_date.year + (1 if current_date.month == 12 else 0)
-            current_date = date(next_year, next_month, 1)
-        return result
-
 
-class LastSyncTimeView(APIView):
+class LastSyncTimeView(ConditionalGetMixin, APIView):
     """
     GET /api/sync-status/
-    最終同期時刻を返す
+    最終同期時刻を返す（最終同期時刻を ETag / Last-Modified に使い、変化がなければ 304）
     """
     def get(self, request, *args, **kwargs):
-        try:
-            # SyncStatusは常にpk=1の単一レコードとして扱う
-            sync_status = SyncStatus.objects.get(pk=1)
-            serializer = SyncStatusSerializer(sync_status)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except SyncStatus.DoesNotExist:
+        # SyncStatusは常にpk=1の単一レコードとして扱う
+        sync_status = SyncStatus.objects.filter(pk=1).first()
+        if sync_status is None:
             # まだ一度も同期されていない場合
             return Response(
                 {"error": "No sync has been performed yet."},
                 status=status.HTTP_404_NOT_FOUND
             )
+        return self.conditional_response(
+            request,
+            single_value_fingerprint(sync_status.last_sync_time),
+            lambda: Response(SyncStatusSerializer(sync_status).data, status=status.HTTP_200_OK),
+            last_modified=sync_status.last_sync_time,
+        )
 
 class YoYRevenueAPIView(APIView):
     """
     前年同月比の売上データを生成するAPIビュー。
     """
+    @cache_analytics_response('revenue-yoy')
     def get(self, request, *args, **kwargs):
-        try:
-            today = date.today()
-            default_year = today.year - 1 if today.month < 3 else today.year
-            selected_year = int(request.query_params.get('year', default_year))
-        except (ValueError, TypeError):
-            selected_year = default_year
-
+        selected_year = _fiscal_year_param(request)
         property_name = request.query_params.get('property_name')
 
-        # 対象年度と前年度のデータを取得
-        current_year_data = self._get_revenue_data(selected_year, property_name)
-        previous_year_data = self._get_revenue_data(selected_year - 1, property_name)
+        allocation = _revenue_allocation(request)
+        if allocation is None:
+            return Response(
+                {"error": "allocation は check_in または night を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 対象年度と前年度のデータを1回の集計で取得
+        try:
+            previous_year_data, current_year_data = compare_fiscal_years(
+                [selected_year - 1, selected_year], property_name, allocation=allocation
+            )
+        except DateDimensionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         # データをマージ
         response_data = []
-        for i in range(12):
-            month_label = f"{((i + 2) % 12) + 1}月" # 3月から始まるため
+        for i, month_label in enumerate(FISCAL_MONTH_LABELS):
             response_data.append({
                 "month": month_label,
-                "current_year": current_year_data[i].get("total", 0),
-                "previous_year": previous_year_data[i].get("total", 0),
+                "current_year": current_year_data['monthly'][i],
+                "previous_year": previous_year_data['monthly'][i],
             })
         
         return Response(response_data)
 
-    def _get_revenue_data(self, year, property_name):
-        start_date = date(year, 3, 1)
-        end_date = (date(year + 1, 3, 1) - timedelta(days=1))
 
-        queryset = Reservation.objects.filter(
-            check_in_date__range=(start_date, end_date),
-            status__in=['Confirmed', 'New']
-        )
-        if property_name:
-            queryset = queryset.filter(property__name=property_name)
-        
-        monthly_totals = queryset.annotate(
-            month=Extract('check_in_date', 'month')
-        ).values('month').annotate(
-            total=Sum('total_price')
-        ).order_by('month')
+class RevenueComparisonAPIView(APIView):
+    """
+    GET /api/revenue/compare/?years=2022,2023,2024
+    GET /api/revenue/compare/?year=2025&count=5
+    複数の会計年度の月別売上を比較するAPIビュー。月別売上集計を1回だけ読み込む。
 
-        revenue_by_month = {item['month']: item['total'] or 0 for item in monthly_totals}
+    クエリパラメータ:
+    - years: 会計年度のカンマ区切り（指定時は year / count より優先）
+    - year, count: year を最終年度として count 年分（既定は今年度から5年分）
+    - property_name, management_type: 絞り込み（optional）
+    - group_by: 'property' / 'management_type'（optional、指定すると年度×グループごとに返す）
+    - allocation: 'check_in'（既定）/ 'night'（宿泊日ごとの按分売上）
+    """
+    MAX_YEARS = 10
 
-        result_list = []
-        # Fiscal year months: Mar, Apr, ..., Dec, Jan, Feb
-        fiscal_month_order = [3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2]
-        
-        for month in fiscal_month_order:
-            result_list.append({"total": revenue_by_month.get(month, 0)})
+    @cache_analytics_response('revenue-compare')
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            if params.get('years'):
+                years = sorted({check_fiscal_year(int(year)) for year in params['years'].split(',') if year.strip()})
+            else:
+                today = date.today()
+                last_year = int(params.get('year', fiscal_year_of(today)))
+                count = int(params.get('count', 5))
+                # 範囲外の count はリストを作る前に弾く（下の件数チェックで400を返す）
+                years = list(range(last_year - count + 1, last_year + 1)) if 0 < count <= self.MAX_YEARS else []
+                for year in years:
+                    check_fiscal_year(year)
+        except ValueError:
+            return Response(
+                {"error": f"years はカンマ区切りの年、year / count は整数で指定してください（会計年度は{MIN_FISCAL_YEAR}〜{MAX_FISCAL_YEAR}）"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 < len(years) <= self.MAX_YEARS:
+            return Response(
+                {"error": f"比較できる会計年度は1〜{self.MAX_YEARS}年分です"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        group_by = params.get('group_by') or None
+        if group_by not in COMPARISON_GROUPS:
+            return Response(
+                {"error": "group_by は property または management_type を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        allocation = _revenue_allocation(request)
+        if allocation is None:
+            return Response(
+                {"error": "allocation は check_in または night を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return result_list
+        try:
+            series = compare_fiscal_years(
+                years,
+                property_name=params.get('property_name'),
+                management_type=params.get('management_type'),
+                group_by=group_by,
+                allocation=allocation,
+            )
+        except DateDimensionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'years': years,
+            'months': FISCAL_MONTH_LABELS,
+            'group_by': group_by,
+            'allocation': allocation,
+            'series': series,
+        })
 
 
 class NationalityRatioAPIView(APIView):
     """
     国籍別比率データを生成するAPIビュー。
+    提出時に取り出した国籍（GuestSubmission.nationality、国コード）をDBで1回のグループ集計で数える。
+    """
+    @cache_analytics_response('nationality')
+    def get(self, request, *args, **kwargs):
+        selected_year = _fiscal_year_param(request)
+        property_name = request.query_params.get('property_name')
+
+        return Response(nationality_ratio(selected_year, property_name))
+
+
+class DashboardSnapshotView(APIView):
+    """
+    GET /api/dashboard/?year=2025&property_name=...&allocation=check_in&month=2025-08
+    ダッシュボードの表示に必要な集計（売上・前年同月比・国籍比率・名簿提出統計・
+    月別予約一覧・最終同期時刻）を1回のレスポンスでまとめて返す。
+    結果はキャッシュされ、同期完了時に既定の条件（今年度・全施設・今月）で事前計算される。
     """
     def get(self, request, *args, **kwargs):
+        params = request.query_params
         try:
-            today = date.today()
-            default_year = today.year - 1 if today.month < 3 else today.year
-            selected_year = int(request.query_params.get('year', default_year))
-        except (ValueError, TypeError):
-            selected_year = default_year
+            fiscal_year = check_fiscal_year(int(params['year'])) if params.get('year') else None
+            month = datetime.strptime(params['month'], '%Y-%m').date() if params.get('month') else None
+        except ValueError:
+            return Response(
+                {"error": f"year は{MIN_FISCAL_YEAR}〜{MAX_FISCAL_YEAR}の整数、month は YYYY-MM で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        property_name = request.query_params.get('property_name')
-        
-        start_date = date(selected_year, 3, 1)
-        end_date = (date(selected_year + 1, 3, 1) - timedelta(days=1))
-
-        submissions = GuestSubmission.objects.filter(
-            reservation__check_in_date__range=(start_date, end_date),
-            status=GuestSubmission.SubmissionStatus.COMPLETED
-        ).select_related('reservation__property')
-
-        if property_name:
-            submissions = submissions.filter(reservation__property__name=property_name)
-
-        nationality_counts = defaultdict(int)
-        for submission in submissions:
-            if submission.submitted_data:
-                # 'nationality' or 'country' key, case-insensitive
-                nationality = submission.submitted_data.get('nationality') or submission.submitted_data.get('country')
-                if nationality:
-                    nationality_counts[nationality] += 1
-                else:
-                    nationality_counts['不明'] += 1
+        allocation = _revenue_allocation(request)
+        if allocation is None:
+            return Response(
+                {"error": "allocation は check_in または night を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            snapshot = dashboard_snapshot(fiscal_year, params.get('property_name'), allocation, month)
+        except DateDimensionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(snapshot)
+
+
+class AnalyticsCacheStatsView(APIView):
+    """
+    GET /api/analytics/cache-stats/
+    分析APIのレスポンスキャッシュのヒット・ミス回数を view ごとに返す。
+    """
+    def get(self, request, *args, **kwargs):
+        return Response(analytics_cache_stats())
+
+
+class OccupancyMetricsAPIView(APIView):
+    """
+    GET /api/analytics/occupancy/
+    施設ごとの稼働率・ADR・RevPAR を月別（または週別）に返す。
+
+    クエリパラメータ:
+    - start, end: 集計期間（YYYY-MM-DD）。省略時は year の会計年度
+    - year: 会計年度（既定は今年度）
+    - grain: 'month'（既定）/ 'week'
+    - property_name, management_type: 絞り込み（optional）
+    """
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            if params.get('start') or params.get('end'):
+                start = date.fromisoformat(params.get('start', ''))
+                end = date.fromisoformat(params.get('end', ''))
             else:
-                nationality_counts['不明'] += 1
+                start, end = fiscal_year_bounds(check_fiscal_year(int(params.get('year', fiscal_year_of(date.today())))))
+            check_fiscal_year(fiscal_year_of(start))
+            check_fiscal_year(fiscal_year_of(end))
+        except ValueError:
+            return Response(
+                {"error": f"start, end は YYYY-MM-DD、year は数値で指定してください（会計年度は{MIN_FISCAL_YEAR}〜{MAX_FISCAL_YEAR}）"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end < start or fiscal_year_of(end) - fiscal_year_of(start) >= MAX_FISCAL_YEARS:
+            return Response(
+                {"error": f"end は start 以降、{MAX_FISCAL_YEARS}会計年度以内で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        response_data = [{"country": country, "count": count} for country, count in nationality_counts.items()]
-        
-        return Response(response_data)
+        grain = params.get('grain') or GRAIN_MONTH
+        if grain not in GRAINS:
+            return Response(
+                {"error": "grain は month または week を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        properties = Property.objects.all()
+        if params.get('property_name'):
+            properties = properties.filter(name=params['property_name'])
+        if params.get('management_type'):
+            properties = properties.filter(management_type=params['management_type'])
 
-from django.http import HttpResponse
-import csv
+        return Response(occupancy_metrics(start, end, grain, properties))
 
-class DownloadRevenueCSVView(APIView):
+
+class BookingPaceAPIView(APIView):
     """
-    選択された会計年度の売上データをCSV形式でダウンロードするAPIビュー。
+    GET /api/analytics/pace/?stay_month=2026-08&years=2
+    宿泊月の予約ペース（リードタイムごとの予約済み泊数・売上）を前年以前の同じ宿泊月と比較する。
+    データは snapshot_booking_pace コマンドが毎日記録する BookingPaceSnapshot から読む。
     """
     def get(self, request, *args, **kwargs):
+        params = request.query_params
         try:
-            today = date.today()
-            default_year = today.year - 1 if today.month < 3 else today.year
-            selected_year = int(request.query_params.get('year', default_year))
-        except (ValueError, TypeError):
-            selected_year = default_year
+            stay_month = datetime.strptime(params.get('stay_month', ''), '%Y-%m').date()
+            years = int(params.get('years', 2))
+        except ValueError:
+            return Response(
+                {"error": "stay_month は YYYY-MM、years は整数で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # 比較する前年以前の宿泊月も1年以降の日付になる範囲に限る
+        if not 0 < years <= min(MAX_PACE_YEARS, stay_month.year):
+            return Response(
+                {"error": f"years は1〜{MAX_PACE_YEARS}（stay_month の年まで）で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # 会計年度の開始日と終了日を決定
-        start_date = date(selected_year, 3, 1)
-        end_date = date(selected_year + 1, 3, 1) - timedelta(days=1)
-
-        # データ取得
-        queryset = Reservation.objects.filter(
-            check_in_date__range=(start_date, end_date),
-            status__in=['Confirmed', 'New']
-        ).select_related('property')
-
-        # 施設ごと、および管理タイプごとの月別売上を計算
-        facility_monthly_sales = defaultdict(lambda: defaultdict(int))
-        subtotals = defaultdict(lambda: defaultdict(int))
-        facilities_by_type = defaultdict(list)
-        
-        for res in queryset:
-            month_key = res.check_in_date.strftime('%Y-%m')
-            prop = res.property
-            
-            facility_monthly_sales[prop.name][month_key] += res.total_price
-            
-            management_type = prop.management_type or '不明'
-            subtotals[management_type][month_key] += res.total_price
-            
-            if prop.name not in facilities_by_type[management_type]:
-                facilities_by_type[management_type].append(prop.name)
+        curves = pace_curves(
+            stay_month, years,
+            property_name=params.get('property_name'),
+            management_type=params.get('management_type'),
+        )
+        return Response({'stay_month': stay_month.strftime('%Y-%m'), **curves})
 
-        # CSVファイルを作成
-        response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-        response['Content-Disposition'] = f'attachment; filename="revenue_{selected_year}_{today.strftime("%Y%m%d")}.csv"'
-        
-        writer = csv.writer(response)
-
-        # 生成日を記入
-        writer.writerow([f"生成日: {today.strftime('%Y-%m-%d')}"])
-        writer.writerow([]) # 空行
-
-        # ヘッダー行の作成
-        months = []
-        current_date = start_date
-        while current_date <= end_date:
-            months.append(current_date.strftime('%Y-%m'))
-            if current_date.month == 12:
-                current_date = date(current_date.year + 1, 1, 1)
+
+class DownloadRevenueCSVView(APIView):
+    """
+    売上データ（施設×月）をCSV形式でダウンロードするAPIビュー。
+    施設×月の売上は1回のグループ集計で取得し、CSVは行ごとにストリーミングで返す。
+
+    クエリパラメータ（期間はいずれか1つ）:
+    - year: 会計年度（既定は今年度）
+    - years: 会計年度のカンマ区切り（複数年度を1ファイルに出力）
+    - start, end: 任意の期間（YYYY-MM-DD）
+    - allocation: 'check_in'（既定）/ 'night'（宿泊日ごとの按分売上）
+    """
+    MAX_YEARS = 10
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        today = date.today()
+        fiscal_years = None
+        start_date = end_date = None
+        try:
+            if params.get('start') or params.get('end'):
+                start_date = date.fromisoformat(params.get('start', ''))
+                end_date = date.fromisoformat(params.get('end', ''))
+            elif params.get('years'):
+                fiscal_years = sorted({check_fiscal_year(int(year)) for year in params['years'].split(',') if year.strip()})
             else:
-                current_date = date(current_date.year, current_date.month + 1, 1)
+                fiscal_years = [check_fiscal_year(int(params.get('year', fiscal_year_of(today))))]
+        except ValueError:
+            return Response(
+                {"error": f"year / years は{MIN_FISCAL_YEAR}〜{MAX_FISCAL_YEAR}の整数、start / end は YYYY-MM-DD で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        header = ["施設名"] + months + ["年間売上"]
-        writer.writerow(header)
+        if fiscal_years is not None:
+            if not 0 < len(fiscal_years) <= self.MAX_YEARS:
+                return Response(
+                    {"error": f"出力できる会計年度は1〜{self.MAX_YEARS}年分です"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            start_date, _ = fiscal_year_bounds(fiscal_years[0])
+            _, end_date = fiscal_year_bounds(fiscal_years[-1])
+            label = str(fiscal_years[0]) if len(fiscal_years) == 1 else f"{fiscal_years[0]}-{fiscal_years[-1]}"
+        else:
+            if end_date < start_date or fiscal_year_of(end_date) - fiscal_year_of(start_date) >= self.MAX_YEARS:
+                return Response(
+                    {"error": f"end は start 以降、{self.MAX_YEARS}会計年度以内で指定してください"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            label = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
+
+        allocation = _revenue_allocation(request)
+        if allocation is None:
+            return Response(
+                {"error": "allocation は check_in または night を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # データ取得（施設×月の売上集計、管理形態・施設名順）。月の並びも日付ディメンションから得る
+        try:
+            monthly_rows = monthly_revenue(start_date, end_date, allocation, by_property=True, fiscal_years=fiscal_years)
+        except DateDimensionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        months = sorted({row['month_start'] for row in monthly_rows})
+        total_label = "年間売上" if fiscal_years is not None and len(fiscal_years) == 1 else "期間売上"
+        return stream_csv(
+            _revenue_csv_rows(monthly_rows, months, total_label, today),
+            f"revenue_{label}_{today.strftime('%Y%m%d')}.csv",
+        )
+
+
+def _revenue_csv_rows(monthly_rows, months, total_label, today):
+    """
+    施設×月の集計行（管理形態・施設名順）からCSVの行を順に作る。
+    管理形態ごとに施設の行と小計、最後に合計行を出力する。
+    months は月初日のリストで、売上のない月の行（property_id が None）は列にだけ使う。
+    """
+    # 生成日を記入
+    yield [f"生成日: {today.strftime('%Y-%m-%d')}"]
+    yield [] # 空行
+    yield ["施設名"] + [month.strftime('%Y-%m') for month in months] + [total_label]
+
+    all_monthly_totals = defaultdict(int)
+    facility_rows = (row for row in monthly_rows if row['property_id'] is not None)
+    for m_type, type_rows in groupby(facility_rows, key=itemgetter('management_type')):
+        # 管理タイプごとのセクションヘッダー
+        yield [f"--- {m_type} ---"]
+
+        subtotals = defaultdict(int)
+        for facility, rows in groupby(type_rows, key=itemgetter('property_name')):
+            monthly_sales = defaultdict(int)
+            for row in rows:
+                monthly_sales[row['month_start']] += row['total']
+            yield [facility] + [monthly_sales.get(month, 0) for month in months] + [sum(monthly_sales.values())]
+            for month, sales in monthly_sales.items():
+                subtotals[month] += sales
+
+        # 管理タイプごとの小計
+        yield [f"小計({m_type})"] + [subtotals.get(month, 0) for month in months] + [sum(subtotals.values())]
+        yield [] # セクション間の空行
+        for month, sales in subtotals.items():
+            all_monthly_totals[month] += sales
+
+    # 合計行の作成
+    yield ["合計"] + [all_monthly_totals[month] for month in months] + [sum(all_monthly_totals.values())]
 
-        # データ行の作成 (管理タイプごとにグループ化し、その後に小計)
-        all_monthly_totals = defaultdict(int)
-        
-        # '自社' を先に、次に '受託'、その後に他のタイプをソートして表示
-        management_order = ['自社', '受託']
-        sorted_types = sorted(facilities_by_type.keys(), key=lambda x: (management_order.index(x) if x in management_order else len(management_order), x))
 
-        for m_type in sorted_types:
-            # 管理タイプごとのセクションヘッダー (任意)
-            writer.writerow([f"--- {m_type} ---"])
-            
-            for facility in sorted(facilities_by_type[m_type]):
-                monthly_sales = facility_monthly_sales[facility]
-                yearly_sales = sum(monthly_sales.values())
-                row = [facility]
-                for month in months:
-                    sales = monthly_sales.get(month, 0)
-                    row.append(sales)
-                    all_monthly_totals[month] += sales # 合計行のために集計
-                row.append(yearly_sales)
-                writer.writerow(row)
-            
-            # 管理タイプごとの小計
-            if m_type in subtotals:
-                monthly_sales = subtotals[m_type]
-                yearly_total = sum(monthly_sales.values())
-                row = [f"小計({m_type})"]
-                for month in months:
-                    row.append(monthly_sales.get(month, 0))
-                row.append(yearly_total)
-                writer.writerow(row)
-            writer.writerow([]) # セクション間の空行
-            
-        # 合計行の作成
-        grand_total = sum(all_monthly_totals.values())
-        total_row = ["合計"]
-        for month in months:
-            total_row.append(all_monthly_totals[month])
-        total_row.append(grand_total)
-        writer.writerow(total_row)
-
-        return response
 class MonthlyReservationListView(APIView):
     """
     指定された年/月の予約リストを返すAPIビュー。
@@ -407,13 +520,7 @@ class MonthlyReservationListView(APIView):
 
         property_name = request.query_params.get('property_name')
 
-        queryset = Reservation.objects.filter(
-            check_in_date__year=year,
-            check_in_date__month=month
-        ).exclude(status='Cancelled').select_related('property').prefetch_related('guestsubmission').order_by('check_in_date')
-
-        if property_name:
-            queryset = queryset.filter(property__name=property_name)
+        queryset = monthly_reservations(year, month, property_name)
 
         serializer = ReservationSerializer(queryset, many=True)
         return Response(serializer.data)
@@ -428,7 +535,47 @@ class DebugReservationListView(APIView):
         return Response(serializer.data)
 
 
-class AccommodationTaxViewSet(ModelViewSet):
+class ReservationExportView(APIView):
+    """
+    GET /api/reservations/export/?format=csv&include=submission,tax&check_in_from=2025-03-01
+    予約を一括でエクスポートする（CSV / NDJSON をストリーミングで返す）。
+    件数に上限はなく、サーバー側では chunk_size 行ずつ読み込んで書き出す。
+
+    クエリパラメータ:
+    - format: 'csv'（既定）/ 'ndjson'
+    - include: 追加する項目（'submission', 'tax' のカンマ区切り、optional）
+    - property_id, property_name, status, check_in_from, check_in_to, updated_since, roster_status: 絞り込み（optional）
+    """
+    FORMATS = ('csv', 'ndjson')
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= はDRFのレンダラー選択にも使われるため、一致するレンダラーがなくても404にしない
+        # （エラー応答は既定のレンダラーで返し、出力形式は get() で扱う）
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        export_format = params.get('format') or 'csv'
+        if export_format not in self.FORMATS:
+            return Response(
+                {"error": "format は csv または ndjson を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            include = [name.strip() for name in params.get('include', '').split(',') if name.strip()]
+            columns = export_columns(include)
+            condition = export_filter(params)
+        except ExportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = export_rows(condition, columns)
+        filename = f"reservations_{date.today().strftime('%Y%m%d')}.{export_format}"
+        if export_format == 'ndjson':
+            return stream_ndjson(export_records(rows, columns), filename)
+        return stream_csv(export_csv_rows(rows, columns), filename)
+
+
+class AccommodationTaxViewSet(ConditionalGetMixin, ModelViewSet):
     """
     宿泊税管理API
     /api/accommodation-taxes/ - List, Create, Retrieve, Update, Destroy
@@ -445,6 +592,11 @@ class AccommodationTaxViewSet(ModelViewSet):
         'reservation',
         'reservation__property'
     )
+    # 予約のゲスト名・日付と施設名も返すため、それらの更新も指紋に含める
+    conditional_extra_aggregates = {
+        'reservation_updated_at': Max('reservation__updated_at'),
+        'property_updated_at': Max('reservation__property__updated_at'),
+    }
     serializer_class = AccommodationTaxSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['payment_status', 'tax_type', 'reservation__property__id']
@@ -471,12 +623,14 @@ class AccommodationTaxViewSet(ModelViewSet):
             instance.save()
 
 
-class DailyRateViewSet(ModelViewSet):
+class DailyRateViewSet(ConditionalGetMixin, ModelViewSet):
     """
     日別料金（カレンダー料金）のCRUD操作を提供するViewSet。
     Beds24から取得した施設ごとの日別基本料金を管理。
     """
     queryset = DailyRate.objects.select_related('property').all()
+    # 施設名も返すため、施設の更新も指紋に含める
+    conditional_extra_aggregates = {'property_updated_at': Max('property__updated_at')}
     serializer_class = DailyRateSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['property', 'property__id', 'date', 'available']
@@ -506,15 +660,202 @@ class DailyRateViewSet(ModelViewSet):
             
         return queryset
 
+    # グリッド・期間料金で一度に返す最大日数
+    GRID_MAX_DAYS = 731
+
+    @action(detail=False, methods=['get'])
+    def ranges(self, request):
+        """
+        GET /api/daily-rates/ranges/?property_id=1&start_date=2026-04-01&end_date=2027-03-31
+        同じ料金が続く期間ごとにまとめた料金（RateRange）を返す。
+        """
+        try:
+            property_id = int(request.query_params.get('property_id', ''))
+            start = date.fromisoformat(request.query_params.get('start_date', ''))
+            end = date.fromisoformat(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response(
+                {"error": "property_id, start_date, end_date (YYYY-MM-DD) を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end < start or (end - start).days >= self.GRID_MAX_DAYS:
+            return Response(
+                {"error": f"期間は{self.GRID_MAX_DAYS}日以内で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            property_obj = Property.objects.get(id=property_id)
+        except Property.DoesNotExist:
+            return Response({"error": "施設が見つかりません"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response([
+            {
+                'start_date': max(r.start_date, start).isoformat(),
+                'end_date': min(r.end_date, end).isoformat(),
+                'base_price': r.base_price,
+                'min_stay': r.min_stay,
+                'available': r.available,
+            }
+            for r in rate_ranges_between(property_obj, start, end)
+        ])
+
+    @action(detail=False, methods=['get'])
+    def grid(self, request):
+        """
+        GET /api/daily-rates/grid/?start_date=2026-04-01&end_date=2027-03-31&property_ids=1,2,3
+        施設 × 日付のグリッドを列指向で返す（1クエリ）。
+
+        レスポンス:
+        - dates: 日付軸 ["2026-04-01", ...]
+        - properties: 施設軸 [{"id": 1, "name": "..."}, ...]
+        - price / min_stay / available: properties × dates の2次元配列（データなしは null）
+        """
+        try:
+            start = date.fromisoformat(request.query_params.get('start_date', ''))
+            end = date.fromisoformat(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response(
+                {"error": "start_date と end_date を YYYY-MM-DD 形式で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end < start or (end - start).days >= self.GRID_MAX_DAYS:
+            return Response(
+                {"error": f"期間は{self.GRID_MAX_DAYS}日以内で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = DailyRate.objects.filter(date__range=(start, end))
+        property_ids = request.query_params.get('property_ids') or request.query_params.get('property_id')
+        if property_ids:
+            try:
+                rows = rows.filter(property_id__in=[int(pid) for pid in property_ids.split(',') if pid])
+            except ValueError:
+                return Response(
+                    {"error": "property_ids はカンマ区切りの整数で指定してください"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        num_days = (end - start).days + 1
+        properties = []
+        prices, min_stays, availability = [], [], []
+        current_property = None
+        for property_id, property_name, rate_date, base_price, min_stay, available in rows.order_by(
+            'property__name', 'property_id', 'date'
+        ).values_list('property_id', 'property__name', 'date', 'base_price', 'min_stay', 'available'):
+            if property_id != current_property:
+                current_property = property_id
+                properties.append({'id': property_id, 'name': property_name})
+                prices.append([None] * num_days)
+                min_stays.append([None] * num_days)
+                availability.append([None] * num_days)
+
+            offset = (rate_date - start).days
+            if base_price is not None:
+                prices[-1][offset] = int(base_price) if base_price == base_price.to_integral_value() else float(base_price)
+            min_stays[-1][offset] = min_stay
+            availability[-1][offset] = available
+
+        return Response({
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'dates': [(start + timedelta(days=i)).isoformat() for i in range(num_days)],
+            'properties': properties,
+            'price': prices,
+            'min_stay': min_stays,
+            'available': availability,
+        })
+
+
+class StayQuoteView(APIView):
+    """
+    GET /api/quote/?property_id=1&check_in=2026-08-01&check_out=2026-08-04&adults=2&children=1
+    宿泊料金の見積もり（1泊ごとの内訳と合計、最小宿泊数・ブラックアウト・定員の検証結果）を返す。
+    property_id を省略すると全施設分をまとめて返す（検索ページ用）。
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            check_in = date.fromisoformat(request.query_params.get('check_in', ''))
+            check_out = date.fromisoformat(request.query_params.get('check_out', ''))
+            adults = int(request.query_params.get('adults', 1))
+            children = int(request.query_params.get('children', 0))
+            property_id = request.query_params.get('property_id')
+            property_id = int(property_id) if property_id else None
+        except ValueError:
+            return Response(
+                {"error": "check_in, check_out (YYYY-MM-DD), adults, children, property_id を正しく指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        properties = Property.objects.order_by('name')
+        if property_id is not None:
+            properties = properties.filter(id=property_id)
+            if not properties:
+                return Response({"error": "施設が見つかりません"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            quotes = quote_properties(list(properties), check_in, check_out, adults, children)
+        except QuoteError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if property_id is not None:
+            return Response(quotes[0])
+        if request.query_params.get('bookable_only') == 'true':
+            quotes = [quote for quote in quotes if quote['bookable']]
+        return Response(quotes)
+
+
+class AvailabilitySearchView(APIView):
+    """
+    GET /api/availability/search/?check_in=2026-08-01&check_out=2026-08-04&guests=4
+    指定期間に空いていて、定員・ブラックアウト・最小宿泊数の条件を満たす施設を返す。
+    """
+    permission_classes = [permissions.AllowAny]
+
+    # 一度に検索できる最大宿泊数
+    MAX_NIGHTS = 90
+
+    def get(self, request):
+        try:
+            check_in = date.fromisoformat(request.query_params.get('check_in', ''))
+            check_out = date.fromisoformat(request.query_params.get('check_out', ''))
+            guests = int(request.query_params.get('guests', 1))
+        except ValueError:
+            return Response(
+                {"error": "check_in, check_out (YYYY-MM-DD), guests を正しく指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 < (check_out - check_in).days <= self.MAX_NIGHTS:
+            return Response(
+                {"error": f"check_out は check_in の翌日から{self.MAX_NIGHTS}日以内で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        properties = search_available_properties(check_in, check_out, guests).values(
+            'id', 'name', 'slug', 'capacity', 'required_nights'
+        )
+        return Response({
+            'check_in': check_in.isoformat(),
+            'check_out': check_out.isoformat(),
+            'guests': guests,
+            'results': list(properties),
+        })
+
 
 class RosterSubmissionStatusView(APIView):
     """
     GET /api/reservations/roster-status/
     予約に対する宿泊者名簿の提出状況を確認するエンドポイント
+    チェックイン日の新しい順に、キーセット方式（cursor）でページ分割して返す。
     
     クエリパラメータ:
     - property_id: 施設ID（optional）
     - status: 'pending', 'submitted', 'verified'（optional）
+    - cursor: 前のレスポンスの next_cursor（optional）
+    - limit: 1ページの件数（既定50、最大200）
+    - count: 'true' の場合は総件数も返す
     """
     
     def get(self, request):
@@ -525,11 +866,9 @@ class RosterSubmissionStatusView(APIView):
         status_filter = request.query_params.get('status')
         
         # 基本的なクエリセット
-        reservations = Reservation.objects.select_related(
-            'property', 'guestsubmission'
-        ).filter(
+        reservations = Reservation.objects.filter(
             status='Accepted'  # 確定済みの予約のみ
-        ).order_by('-check_in_date')
+        )
         
         # フィルタリング
         if property_id:
@@ -549,91 +888,70 @@ class RosterSubmissionStatusView(APIView):
                 )
             reservations = reservations.filter(guest_roster_status=status_filter)
         
+        try:
+            page = _roster_page(request, reservations, descending=True)
+        except RosterPageError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # レスポンスデータを構築
-        data = {
-            'count': reservations.count(),
-            'results': []
-        }
-        
-        for reservation in reservations:
-            submission = getattr(reservation, 'guestsubmission', None)
-            data['results'].append({
-                'id': reservation.id,
-                'beds24_book_id': reservation.beds24_book_id,
-                'property': {
-                    'id': reservation.property.id,
-                    'name': reservation.property.name,
-                    'slug': reservation.property.slug,
-                },
-                'guest_name': reservation.guest_name,
-                'guest_email': reservation.guest_email,
-                'check_in_date': reservation.check_in_date.isoformat(),
-                'check_out_date': reservation.check_out_date.isoformat() if reservation.check_out_date else None,
-                'num_guests': reservation.num_guests,
-                'total_price': float(reservation.total_price),
-                'roster_status': reservation.guest_roster_status,
-                'submission': {
-                    'id': submission.id if submission else None,
-                    'token': str(submission.token) if submission else None,
-                    'status': submission.status if submission else None,
-                    'submitted_at': submission.updated_at.isoformat() if submission and submission.status == GuestSubmission.SubmissionStatus.COMPLETED else None,
-                } if submission else None,
-                'created_at': reservation.created_at.isoformat(),
-            })
-        
-        return Response(data, status=status.HTTP_200_OK)
+        page['results'] = roster_status_rows(page.pop('rows'))
+        return Response(page, status=status.HTTP_200_OK)
+
+
+def _roster_page(request, reservations, descending=False):
+    """?cursor= / ?limit= / ?count=true に従って名簿一覧の1ページを読む"""
+    params = request.query_params
+    return roster_page(
+        reservations,
+        cursor=params.get('cursor'),
+        limit=page_limit(params.get('limit')),
+        descending=descending,
+        with_count=params.get('count') == 'true',
+    )
 
 
 class RosterSubmissionStatsView(APIView):
     """
     GET /api/reservations/roster-stats/
-    施設ごとの名簿提出状況の統計情報を取得
+    施設ごとの名簿提出状況の統計情報を取得（施設数によらず1クエリで集計）
+
+    クエリパラメータ:
+    - property_name: 施設名（optional）
+    - start, end: チェックイン日の範囲（YYYY-MM-DD、optional）
     """
     
+    @cache_analytics_response('roster-stats')
     def get(self, request):
         """
         名簿提出状況の統計を取得
         """
-        # 確定済みの予約を対象
-        reservations = Reservation.objects.filter(
-            status='Accepted'
-        ).select_related('property')
-        
-        # 施設ごとの統計
-        stats = {}
-        for property_obj in Property.objects.all():
-            property_reservations = reservations.filter(property=property_obj)
-            
-            pending_count = property_reservations.filter(
-                guest_roster_status=Reservation.RosterStatus.PENDING
-            ).count()
-            submitted_count = property_reservations.filter(
-                guest_roster_status=Reservation.RosterStatus.SUBMITTED
-            ).count()
-            verified_count = property_reservations.filter(
-                guest_roster_status=Reservation.RosterStatus.VERIFIED
-            ).count()
-            
-            total_count = property_reservations.count()
-            
-            if total_count > 0:
-                stats[property_obj.slug] = {
-                    'property_id': property_obj.id,
-                    'property_name': property_obj.name,
-                    'total': total_count,
-                    'pending': pending_count,
-                    'submitted': submitted_count,
-                    'verified': verified_count,
-                    'completion_rate': round((verified_count + submitted_count) / total_count * 100, 2),
-                }
-        
-        return Response(stats, status=status.HTTP_200_OK)
+        params = request.query_params
+        try:
+            start = date.fromisoformat(params['start']) if params.get('start') else None
+            end = date.fromisoformat(params['end']) if params.get('end') else None
+        except ValueError:
+            return Response(
+                {"error": "start, end は YYYY-MM-DD で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start and end and end < start:
+            return Response(
+                {"error": "end は start 以降を指定してください"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            roster_submission_stats(params.get('property_name'), start, end),
+            status=status.HTTP_200_OK
+        )
 
 
 class PendingRostersView(APIView):
     """
     GET /api/reservations/pending-rosters/
     名簿提出がまだ完了していない予約を一覧取得
+    チェックイン日の近い順に、キーセット方式（cursor）でページ分割して返す。
+    cursor / limit / count は roster-status と同じ。
     """
     
     def get(self, request):
@@ -657,7 +975,7 @@ class PendingRostersView(APIView):
             check_in_date__gte=today,
             check_in_date__lte=future_date,
             guest_roster_status=Reservation.RosterStatus.PENDING
-        ).select_related('property', 'guestsubmission').order_by('check_in_date')
+        )
         
         if property_id:
             try:
@@ -668,32 +986,14 @@ class PendingRostersView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        data = {
-            'count': reservations.count(),
-            'date_range': {
-                'from': today.isoformat(),
-                'to': future_date.isoformat(),
-            },
-            'results': []
+        try:
+            page = _roster_page(request, reservations)
+        except RosterPageError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page['date_range'] = {
+            'from': today.isoformat(),
+            'to': future_date.isoformat(),
         }
-        
-        for reservation in reservations:
-            submission = getattr(reservation, 'guestsubmission', None)
-            days_until_checkin = (reservation.check_in_date - today).days
-            
-            data['results'].append({
-                'id': reservation.id,
-                'beds24_book_id': reservation.beds24_book_id,
-                'property': {
-                    'id': reservation.property.id,
-                    'name': reservation.property.name,
-                },
-                'guest_name': reservation.guest_name,
-                'guest_email': reservation.guest_email,
-                'check_in_date': reservation.check_in_date.isoformat(),
-                'num_guests': reservation.num_guests,
-                'days_until_checkin': days_until_checkin,
-                'submission_form_url': f"https://your-domain.com/submit-roster/{submission.token}/" if submission else None,
-            })
-        
-        return Response(data, status=status.HTTP_200_OK)
+        page['results'] = pending_roster_rows(page.pop('rows'), today)
+        return Response(page, status=status.HTTP_200_OK)
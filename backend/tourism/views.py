@@ -3,6 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import datetime
+
+from api.conditional import ConditionalGetMixin
 from .models import TouristAttraction, Event, SeasonalRecommendation
 from .serializers import (
     TouristAttractionSerializer,
@@ -11,7 +13,7 @@ from .serializers import (
 )
 
 
-class TouristAttractionViewSet(viewsets.ModelViewSet):
+class TouristAttractionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """観光施設のViewSet"""
     queryset = TouristAttraction.objects.all()
     serializer_class = TouristAttractionSerializer
@@ -40,7 +42,7 @@ class TouristAttractionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """イベントのViewSet"""
     queryset = Event.objects.all()
     serializer_class = EventSerializer
@@ -94,7 +96,7 @@ class EventViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SeasonalRecommendationViewSet(viewsets.ModelViewSet):
+class SeasonalRecommendationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """季節のおすすめのViewSet"""
     queryset = SeasonalRecommendation.objects.all()
     serializer_class = SeasonalRecommendationSerializer
@@ -84,3 +84,21 @@ export const deleteDailyRate = async (id) => {
     throw error;
   }
 };
+
+/**
+ * 複数施設 × 日付の料金グリッドを取得（列指向）
+ * @param {object} params - クエリパラメータ
+ * @param {string} params.start_date - 開始日 (YYYY-MM-DD)
+ * @param {string} params.end_date - 終了日 (YYYY-MM-DD)
+ * @param {string} [params.property_ids] - 施設IDのカンマ区切り
+ * @returns {Promise<object>} - { dates, properties, price, min_stay, available }
+ */
+export const fetchRateGrid = async (params) => {
+  try {
+    const response = await apiClient.get('/daily-rates/grid/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching rate grid:', error);
+    throw error;
+  }
+};
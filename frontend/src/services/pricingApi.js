@@ -22,6 +22,25 @@ export const fetchMonthlyPricing = async (propertyId, year, month) => {
   }
 };
 
+/**
+ * 複数月の価格データを一括取得
+ * @param {number} propertyId - 施設ID
+ * @param {string} start - 開始月（YYYY-MM）
+ * @param {string} end - 終了月（YYYY-MM）
+ * @returns {Promise<Object>} - {basicSettings, startDate, endDate, calendarData}
+ */
+export const fetchPricingRange = async (propertyId, start, end) => {
+  try {
+    const response = await apiClient.get(`/pricing/${propertyId}/calendar/`, {
+      params: { start, end },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching pricing range:', error);
+    throw error;
+  }
+};
+
 /**
  * 月別の価格データを更新（複数日一括）
  * @param {number} propertyId - 施設ID
@@ -43,6 +62,24 @@ export const updateMonthlyPricing = async (propertyId, year, month, updates) =>
   }
 };
 
+/**
+ * 価格カレンダーを一括更新（日付ごとの上書き + 期間操作）
+ * @param {number} propertyId - 施設ID
+ * @param {Object} changes - {updates, ranges}
+ *   updates: [{date: '2026-07-01', price: 12000, minNights: 2, isBlackout: false}]
+ *   ranges: [{startDate: '2026-07-01', endDate: '2026-08-31', price: 15000}]
+ * @returns {Promise<Object>} - {status, dates, range_days}
+ */
+export const bulkUpdatePricing = async (propertyId, { updates = [], ranges = [] }) => {
+  try {
+    const response = await apiClient.post(`/pricing/${propertyId}/bulk/`, { updates, ranges });
+    return response.data;
+  } catch (error) {
+    console.error('Error bulk updating pricing data:', error);
+    throw error;
+  }
+};
+
 /**
  * 個別の日付ルールを作成・更新
  * @param {Object} ruleData - ルールデータ
@@ -175,3 +212,50 @@ export const syncWithBeds24 = async (propertyId, syncType = 'basic') => {
     throw error;
   }
 };
+
+/**
+ * 繰り返し価格ルール一覧を取得
+ * @param {number} propertyId - 施設ID
+ * @returns {Promise<Array>}
+ */
+export const fetchRecurringPricingRules = async (propertyId) => {
+  try {
+    const response = await apiClient.get('/recurring-pricing-rules/', {
+      params: { property: propertyId },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching recurring pricing rules:', error);
+    throw error;
+  }
+};
+
+/**
+ * 繰り返し価格ルールを作成・更新
+ * @param {Object} rule - ルール（id があれば更新）
+ * @returns {Promise<Object>}
+ */
+export const saveRecurringPricingRule = async (rule) => {
+  try {
+    const response = rule.id
+      ? await apiClient.put(`/recurring-pricing-rules/${rule.id}/`, rule)
+      : await apiClient.post('/recurring-pricing-rules/', rule);
+    return response.data;
+  } catch (error) {
+    console.error('Error saving recurring pricing rule:', error);
+    throw error;
+  }
+};
+
+/**
+ * 繰り返し価格ルールを削除
+ * @param {number} ruleId - ルールID
+ */
+export const deleteRecurringPricingRule = async (ruleId) => {
+  try {
+    await apiClient.delete(`/recurring-pricing-rules/${ruleId}/`);
+  } catch (error) {
+    console.error('Error deleting recurring pricing rule:', error);
+    throw error;
+  }
+};
@@ -22,7 +22,7 @@ export const fetchRevenueData = async (params) => {
 
 /**
  * 前年同月比の売上データをバックエンドから取得する
- * @param {object} params - クエリパラメータ (year, property_name)
+ * @param {object} params - クエリパラメータ (year, property_name, allocation: 'check_in' | 'night')
  * @returns {Promise<Array>}
  */
 export const fetchYoYRevenueData = async (params) => {
@@ -35,6 +35,21 @@ export const fetchYoYRevenueData = async (params) => {
   }
 };
 
+/**
+ * 複数年度の月別売上比較データをバックエンドから取得する
+ * @param {object} params - クエリパラメータ (years | year + count, property_name, management_type, group_by, allocation)
+ * @returns {Promise<Object>} - {years, months, group_by, series}
+ */
+export const fetchRevenueComparison = async (params) => {
+  try {
+    const response = await apiClient.get('/revenue/compare/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching revenue comparison data:', error);
+    throw error;
+  }
+};
+
 /**
  * 国籍別比率データをバックエンドから取得する
  * @param {object} params - クエリパラメータ (year, property_name)
@@ -51,6 +66,51 @@ export const fetchNationalityData = async (params) => {
   }
 };
 
+/**
+ * ダッシュボードの集計（売上・前年同月比・国籍比率・名簿提出統計・月別予約一覧・最終同期時刻）をまとめて取得する
+ * @param {object} params - クエリパラメータ (year, property_name, allocation, month: 'YYYY-MM')
+ * @returns {Promise<Object>} - {revenue, yoy, nationality, roster_stats, monthly_reservations, last_sync_time, ...}
+ */
+export const fetchDashboardSnapshot = async (params) => {
+  try {
+    const response = await apiClient.get('/dashboard/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching dashboard snapshot:', error);
+    throw error;
+  }
+};
+
+/**
+ * 宿泊月の予約ペース（リードタイムごとの予約済み泊数・売上）を前年以前と比較して取得する
+ * @param {object} params - クエリパラメータ (stay_month: 'YYYY-MM', years, property_name, management_type)
+ * @returns {Promise<Object>} - {stay_month, lead_time, series, comparison}
+ */
+export const fetchBookingPace = async (params) => {
+  try {
+    const response = await apiClient.get('/analytics/pace/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching booking pace:', error);
+    throw error;
+  }
+};
+
+/**
+ * 施設ごとの稼働率・ADR・RevPARを月別（週別）にバックエンドから取得する
+ * @param {object} params - クエリパラメータ (start + end | year, grain: 'month' | 'week', property_name, management_type)
+ * @returns {Promise<Object>} - {grain, start, end, periods, properties, overall}
+ */
+export const fetchOccupancyMetrics = async (params) => {
+  try {
+    const response = await apiClient.get('/analytics/occupancy/', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching occupancy metrics:', error);
+    throw error;
+  }
+};
+
 
 /**
  * 施設のリストをバックエンドから取得する